@@ -0,0 +1,272 @@
+# ==============================================================================
+# ALMACÉN DE ESCENARIOS (SQLITE INDEXADO POR HUELLA DE CONTENIDO)
+# ==============================================================================
+# Cada escenario calculado se guarda con la huella SHA-256 de sus parámetros
+# canónicos (y de los precios con que se valoró). Una fila por escenario: las
+# métricas principales en columnas indexadas para filtrar y ordenar en SQL, y
+# todas las salidas de evaluar_lote más las partidas del CAPEX en un bloque
+# comprimido. Guardar un escenario que ya está es un acierto: no se recalcula.
+import datetime
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import zlib
+
+import numpy as np
+
+from cpd_motor import (PARAMETROS_DISENO, ESCENARIO_DEFECTO, PRECIOS_REF, _columnas_lote, _lineas_presupuesto_lote,
+                       evaluar_lote)
+
+VERSION_ALMACEN = 1     # cambia la huella de todos los escenarios (p. ej. si cambia el cálculo)
+
+# Columnas consultables: (nombre, tipo SQL); la fila se rellena en _metricas
+COLUMNAS_METRICAS = (
+    ("nombre", "TEXT"), ("creado", "TEXT"),
+    ("redundancia_electrica", "TEXT"), ("redundancia_hvac", "TEXT"), ("tipo_cerramiento", "TEXT"),
+    ("prodfrio_tec", "TEXT"), ("tecnologia_pci", "TEXT"), ("cerramientos_con_dlc", "INTEGER"),
+    ("num_racks", "INTEGER"), ("P_IT_kW", "REAL"), ("PUE", "REAL"), ("CAPEX_Total", "REAL"),
+    ("CAPEX_por_kW", "REAL"), ("densidad_IT_kW_m2", "REAL"), ("Valido", "INTEGER"),
+)
+_TIPOS = dict(COLUMNAS_METRICAS)
+INDICES = (("PUE",), ("CAPEX_Total",), ("CAPEX_por_kW",), ("P_IT_kW",), ("creado",),
+           ("redundancia_electrica", "PUE"), ("redundancia_electrica", "CAPEX_por_kW"))
+OPERADORES = ("<=", ">=", "!=", "=", "<", ">")
+_FILTRO = re.compile(r"^\s*(\w+)\s*(<=|>=|!=|=|<|>)\s*(.+?)\s*$")
+_TAMANO_CONSULTA_IN = 900    # huellas por consulta IN (límite de variables de SQLite)
+
+
+def ruta_almacen_defecto():
+    return os.environ.get("CPD_ALMACEN") or os.path.join(os.path.expanduser("~"), ".cache", "cpd_almacen", "escenarios.sqlite")
+
+
+# --- Huella de contenido ---
+def _columnas_canonicas(escenarios):
+    # {parámetro: lista de valores Python} con el tipo del valor por defecto: 4 y 4.0 en un
+    # entero, o 500 y 500.0 en un real, dan la misma huella
+    if isinstance(escenarios, (list, tuple)):
+        escenarios = {k: [{**ESCENARIO_DEFECTO, **e}[k] for e in escenarios] for k in PARAMETROS_DISENO}
+    c = _columnas_lote(escenarios)
+    columnas = {}
+    for k in PARAMETROS_DISENO:
+        defecto, v = ESCENARIO_DEFECTO[k], c[k]
+        if isinstance(defecto, str):
+            columnas[k] = v.astype(str).tolist()
+        elif isinstance(defecto, int) and np.all(np.mod(v.astype(float), 1) == 0):
+            columnas[k] = v.astype(np.int64).tolist()
+        else:
+            columnas[k] = v.astype(float).tolist()
+    return columnas
+
+
+def _sal(precios):
+    # Parte común de la huella: versión del almacén y precios con que se valora
+    precios = PRECIOS_REF if precios is None else precios
+    return json.dumps([VERSION_ALMACEN, sorted((k, float(v)) for k, v in precios.items())], ensure_ascii=False).encode()
+
+
+def huella_escenario(escenario, precios=None):
+    """SHA-256 (hex) de los parámetros canónicos de un escenario (dict) y de los precios."""
+    columnas = _columnas_canonicas([escenario])
+    return _huellas(columnas, _sal(precios))[0]
+
+
+def _huellas(columnas, sal):
+    # Texto canónico por columna (repr de números, JSON de textos) y unido por filas:
+    # evita un json.dumps por escenario, que dominaba el coste con 100k+ escenarios
+    tokens = []
+    for k in PARAMETROS_DISENO:
+        v = columnas[k]
+        if isinstance(ESCENARIO_DEFECTO[k], str):
+            textos = {u: json.dumps(u, ensure_ascii=False) for u in set(v)}
+            tokens.append(map(textos.__getitem__, v))
+        else:
+            tokens.append(map(repr, v))
+    return [hashlib.sha256(sal + f.encode()).hexdigest() for f in map(",".join, zip(*tokens))]
+
+
+# --- Almacén ---
+class AlmacenEscenarios:
+    """Almacén SQLite de escenarios calculados (un fichero; WAL para leer mientras se escribe).
+
+    Seguro entre hilos: una conexión compartida protegida por un cerrojo (la GUI guarda
+    desde el hilo de cálculo y consulta desde el de Tk).
+    """
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta or ruta_almacen_defecto()
+        if self.ruta != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.ruta)), exist_ok=True)
+        self._cerrojo = threading.Lock()
+        self.con = sqlite3.connect(self.ruta, check_same_thread=False)
+        self.con.execute("PRAGMA journal_mode=WAL")
+        self.con.execute("PRAGMA synchronous=NORMAL")
+        columnas = ", ".join(f'"{n}" {t}' for n, t in COLUMNAS_METRICAS)
+        with self.con:
+            self.con.execute(f"CREATE TABLE IF NOT EXISTS escenarios (huella TEXT PRIMARY KEY, {columnas}, "
+                             "esquema INTEGER NOT NULL, parametros TEXT NOT NULL, textos TEXT NOT NULL, salidas BLOB NOT NULL)")
+            self.con.execute("CREATE TABLE IF NOT EXISTS esquemas (id INTEGER PRIMARY KEY, definicion TEXT UNIQUE NOT NULL)")
+            for cols in INDICES:
+                self.con.execute(f"CREATE INDEX IF NOT EXISTS idx_{'_'.join(cols)} ON escenarios ({', '.join(cols)})")
+        self._esquemas = {}
+
+    def cerrar(self):
+        self.con.close()
+
+    def __len__(self):
+        with self._cerrojo:
+            return self.con.execute("SELECT COUNT(*) FROM escenarios").fetchone()[0]
+
+    def _existentes(self, huellas):
+        hay = set()
+        unicas = list(set(huellas))
+        for ini in range(0, len(unicas), _TAMANO_CONSULTA_IN):
+            trozo = unicas[ini:ini + _TAMANO_CONSULTA_IN]
+            hay.update(h for (h,) in self.con.execute(
+                f"SELECT huella FROM escenarios WHERE huella IN ({','.join('?' * len(trozo))})", trozo))
+        return hay
+
+    def _id_esquema(self, esquema):
+        # Esquema: nombres de parámetros, de resultados numéricos y de texto, y partidas (Cat, Item, Ud)
+        # en el orden en que se guardan en cada fila; cambia sólo si cambia el motor
+        definicion = json.dumps(esquema, ensure_ascii=False)
+        if definicion not in self._esquemas:
+            self.con.execute("INSERT OR IGNORE INTO esquemas (definicion) VALUES (?)", (definicion,))
+            self._esquemas[definicion] = self.con.execute("SELECT id FROM esquemas WHERE definicion = ?",
+                                                          (definicion,)).fetchone()[0]
+        return self._esquemas[definicion]
+
+    def guardar(self, escenarios, nombres=None, precios=None, bloque=20_000):
+        """Guarda escenarios (lista de dicts, dict de columnas o DataFrame) que no estén ya.
+
+        Sólo se evalúan (evaluar_lote, no estricto) los que faltan. Devuelve
+        {"huellas": una por escenario, "nuevos": n calculados, "aciertos": n ya guardados}.
+        """
+        columnas = _columnas_canonicas(escenarios)
+        huellas = _huellas(columnas, _sal(precios))
+        n = len(huellas)
+        nombres = [None] * n if nombres is None else list(nombres)
+        with self._cerrojo:
+            hay = self._existentes(huellas)
+            pendientes, vistos = [], set(hay)
+            for i, h in enumerate(huellas):
+                if h not in vistos:
+                    pendientes.append(i); vistos.add(h)
+            creado = datetime.datetime.now().isoformat(timespec="seconds")
+            marcas = ", ".join("?" * (len(COLUMNAS_METRICAS) + 5))
+            with self.con:
+                for ini in range(0, len(pendientes), bloque):
+                    idx = pendientes[ini:ini + bloque]
+                    cols = {k: [columnas[k][i] for i in idx] for k in PARAMETROS_DISENO}
+                    filas = self._filas(cols, [huellas[i] for i in idx], [nombres[i] for i in idx], creado, precios)
+                    self.con.executemany(f"INSERT OR IGNORE INTO escenarios VALUES ({marcas})", filas)
+                if len(pendientes) >= 10_000:
+                    self.con.execute("ANALYZE")
+        return {"huellas": huellas, "nuevos": len(pendientes), "aciertos": n - len(pendientes)}
+
+    def _filas(self, cols, huellas, nombres, creado, precios):
+        # Filas de la tabla escenarios para un bloque de escenarios nuevos. Resultados numéricos,
+        # cantidades y precios de las partidas van en un vector float64 comprimido por fila
+        # (cantidad NaN = partida ausente); los resultados de texto, en una lista JSON.
+        precios = PRECIOS_REF if precios is None else precios
+        c = _columnas_lote(cols)
+        r = evaluar_lote(c, precios=precios, estricto=False)
+        S = len(huellas)
+        lineas = _lineas_presupuesto_lote(c, r, precios)
+        textos = [k for k, v in r.items() if v.dtype.kind in "OUS"]
+        numericas = [k for k in r if k not in textos]
+        esquema = self._id_esquema({"parametros": list(PARAMETROS_DISENO), "textos": textos,
+                                    "numericas": [[k, r[k].dtype.kind] for k in numericas],
+                                    "partidas": [list(l[:3]) for l in lineas]})
+        M = np.column_stack([r[k] for k in numericas]
+                            + [np.where(presente, cant, np.nan) * np.ones(S) for _, _, _, cant, _, presente in lineas]
+                            + [np.broadcast_to(pu, (S,)) for _, _, _, _, pu, _ in lineas]).astype(np.float64)
+        metricas = self._metricas(c, r)
+        volcar = lambda f: json.dumps(f, ensure_ascii=False, separators=(",", ":"))
+        parametros = map(volcar, zip(*(cols[k] for k in PARAMETROS_DISENO)))
+        texto = map(volcar, zip(*(r[k].tolist() for k in textos))) if textos else ["[]"] * S
+        return [(huellas[s], nombres[s], creado, *fila, esquema, p, t, zlib.compress(M[s].tobytes(), 1))
+                for s, (fila, p, t) in enumerate(zip(zip(*metricas), parametros, texto))]
+
+    @staticmethod
+    def _metricas(c, r):
+        # Columnas de COLUMNAS_METRICAS a partir de "redundancia_electrica" (nombre y creado aparte)
+        P_IT_kW = r["P_IT_demandada"] / 1000
+        with np.errstate(divide="ignore", invalid="ignore"):
+            por_kW = np.where(P_IT_kW > 0, r["CAPEX_Total"] / P_IT_kW, np.nan)
+        nulo = lambda v: [None if x != x else x for x in v.tolist()]    # NaN -> NULL
+        return [c["redundancia_electrica"].tolist(), c["redundancia_hvac"].tolist(), c["tipo_cerramiento"].tolist(),
+                c["prodfrio_tec"].tolist(), c["tecnologia_pci"].tolist(), c["cerramientos_con_dlc"].astype(int).tolist(),
+                r["num_racks_total"].astype(int).tolist(), nulo(P_IT_kW), nulo(r["PUE"]), nulo(r["CAPEX_Total"]),
+                nulo(por_kW), nulo(r["Densidad Potencia IT (kW/m² IT)"]), r["Valido"].astype(int).tolist()]
+
+    def obtener(self, huella):
+        """Escenario guardado: {"huella", "nombre", "creado", "parametros", "resultados", "capex"}
+        (capex como el DataFrame de calcular_presupuesto_detallado); None si no está.
+        Admite un prefijo único de la huella."""
+        import pandas as pd
+        with self._cerrojo:
+            filas = self.con.execute("SELECT huella, nombre, creado, esquema, parametros, textos, salidas FROM escenarios "
+                                     "WHERE huella >= ? AND huella < ? LIMIT 2", (huella, huella + "g")).fetchall()
+            if len(filas) != 1: return None
+            h, nombre, creado, esquema, parametros, textos, salidas = filas[0]
+            esquema = json.loads(self.con.execute("SELECT definicion FROM esquemas WHERE id = ?", (esquema,)).fetchone()[0])
+        v = np.frombuffer(zlib.decompress(salidas), dtype=np.float64)
+        K, L = len(esquema["numericas"]), len(esquema["partidas"])
+        tipos = {"b": bool, "i": int, "u": int}
+        resultados = {k: tipos.get(t, float)(x) for (k, t), x in zip(esquema["numericas"], v[:K].tolist())}
+        resultados.update(zip(esquema["textos"], json.loads(textos)))
+        cant, pu = v[K:K + L], v[K + L:K + 2 * L]
+        capex = pd.DataFrame([{"Cat": cat, "Item": item, "Ud": ud, "Cant": cant[i], "PU": pu[i]}
+                              for i, (cat, item, ud) in enumerate(esquema["partidas"]) if not np.isnan(cant[i])])
+        capex["Total (€)"] = capex["Cant"] * capex["PU"]
+        return {"huella": h, "nombre": nombre, "creado": creado, "resultados": resultados, "capex": capex,
+                "parametros": dict(zip(esquema["parametros"], json.loads(parametros)))}
+
+    # --- Consultas ---
+    @staticmethod
+    def _donde(filtros):
+        # filtros: "PUE<1.4" o (columna, operador, valor); todos deben cumplirse
+        condiciones, valores = [], []
+        for f in filtros:
+            if isinstance(f, str):
+                m = _FILTRO.match(f)
+                if not m: raise ValueError(f"Filtro no válido: {f!r} (p. ej. PUE<1.4)")
+                f = m.groups()
+            columna, op, valor = f
+            if columna not in _TIPOS: raise ValueError(f"Columna desconocida: {columna} (válidas: {list(_TIPOS)})")
+            if op not in OPERADORES: raise ValueError(f"Operador no válido: {op}")
+            if _TIPOS[columna] != "TEXT":
+                try:
+                    valor = float(valor)
+                except ValueError:
+                    raise ValueError(f"{columna} es numérica: {valor!r} no es un número") from None
+            condiciones.append(f'"{columna}" {op} ?'); valores.append(valor)
+        return (" WHERE " + " AND ".join(condiciones) if condiciones else ""), valores
+
+    def consultar(self, filtros=(), orden=None, descendente=False, limite=100, desplazamiento=0):
+        """DataFrame de huella + COLUMNAS_METRICAS de los escenarios que cumplen los filtros."""
+        import pandas as pd
+        donde, valores = self._donde(filtros)
+        if orden is not None and orden not in _TIPOS: raise ValueError(f"Columna desconocida: {orden}")
+        with self._cerrojo:
+            orden_sql = f'"{orden}"'
+            if orden and donde and limite:
+                # Sin histogramas SQLite recorre el índice del orden hasta reunir `limite` filas, lento
+                # si el filtro es selectivo. Con pocas filas que cumplan (n² < limite·N) se filtra por
+                # su índice y se ordena el resultado ("+" desactiva el índice del orden)
+                n = self.con.execute("SELECT COUNT(*) FROM escenarios" + donde, valores).fetchone()[0]
+                if n * n < int(limite) * self.con.execute("SELECT COUNT(*) FROM escenarios").fetchone()[0]:
+                    orden_sql = "+" + orden_sql
+            sql = ("SELECT huella, " + ", ".join(f'"{n}"' for n, _ in COLUMNAS_METRICAS) + " FROM escenarios" + donde
+                   + (f' ORDER BY {orden_sql}{" DESC" if descendente else ""}' if orden else "")
+                   + (" LIMIT ? OFFSET ?" if limite else ""))
+            filas = self.con.execute(sql, valores + ([int(limite), int(desplazamiento)] if limite else [])).fetchall()
+        return pd.DataFrame.from_records(filas, columns=["huella"] + [n for n, _ in COLUMNAS_METRICAS])
+
+    def contar(self, filtros=()):
+        donde, valores = self._donde(filtros)
+        with self._cerrojo:
+            return self.con.execute("SELECT COUNT(*) FROM escenarios" + donde, valores).fetchone()[0]
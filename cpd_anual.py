@@ -0,0 +1,263 @@
+# ==============================================================================
+# SIMULACIÓN ENERGÉTICA ANUAL HORARIA (8760 H)
+# ==============================================================================
+# El diseño se dimensiona en el punto de máxima carga (P_max, día de diseño). Aquí
+# se recorre un año hora a hora: la potencia por servidor se interpola entre
+# P_idle y P_max con un perfil de utilización, y el COP de la producción de frío
+# (aire y DLC) depende de la tecnología elegida y del clima: free cooling total o
+# parcial según T_entrada_aire / T_salida_aire y la temperatura seca o húmeda, y
+# compresor corregido por la temperatura de condensación. Todo son arrays
+# (escenario, hora): un año cuesta unas pocas operaciones NumPy, y muchos
+# escenarios van juntos por bloques.
+import numpy as np
+
+from cpd_motor import _columnas_lote, _evaluar_tecnico
+
+HORAS_ANO = 8760
+PRECIO_ENERGIA_DEFECTO = 0.15      # €/kWh
+
+# COP(T) = COP de diseño x (COP de Carnot a T) / (COP de Carnot a T_EXTERIOR_DISENO)
+T_EXTERIOR_DISENO = 35.0           # °C seca, temperatura a la que se da el COP del formulario
+T_HUMEDA_DISENO = 24.0             # °C húmeda, ídem para condensación por agua (torre)
+APROXIMACION_CONDENSACION_K = 10.0 # T condensación = T exterior + aproximación
+SALTO_AIRE_AGUA_K = 8.0            # agua fría = T de aire (impulsión / retorno) - salto
+T_AGUA_DLC = 32.0                  # °C, impulsión del circuito DLC
+SALTO_AGUA_DLC_K = 8.0             # retorno DLC = impulsión + salto (ΔT del secundario DLC)
+SALTO_MINIMO_K = 5.0               # salto térmico mínimo del ciclo (acota el COP en invierno)
+FACTOR_COP_MAX = 3.0
+
+# Free cooling: el agua se enfría con aire exterior (seca), torre (húmeda) o dry cooler
+# adiabático (seca preenfriada hacia la húmeda) hasta T exterior + aproximación
+APROXIMACION_ECONOMIZADOR_K = {"seca": 5.0, "humeda": 4.0, "adiabatica": 5.0}
+EFICIENCIA_ADIABATICA = 0.8
+COP_FREE_COOLING = 20.0            # ventiladores y bombas con el compresor parado
+
+# Tecnología (prodfrio_tec / tipo_gen_frio_dlc) -> (economizador, condensación del compresor)
+# None en economizador: sin free cooling; None en condensación: sin compresor
+TECNOLOGIAS_FRIO = {
+    "Condensadora DX": (None, "seca"),
+    "Chiller A/W": (None, "seca"),
+    "Chiller A/W con free cooling": ("seca", "seca"),
+    "Chiller W/W": (None, "humeda"),
+    "Dry cooler seco": ("seca", None),
+    "Chiller W/W + Torre de refrigeración": ("humeda", "humeda"),
+    "Torre de refrigeración": ("humeda", None),
+    "Dry cooler adiabático": ("adiabatica", None),
+    "Chiller A/W de alta temperatura": (None, "seca"),
+}
+
+
+# --- Series horarias ---
+def perfil_utilizacion(media=0.6, amplitud_diaria=0.15, factor_fin_de_semana=0.85, hora_pico=15):
+    # Perfil sintético: onda diaria con pico por la tarde y fines de semana más bajos (el año empieza en lunes)
+    h = np.arange(HORAS_ANO)
+    u = media + amplitud_diaria * np.cos(2 * np.pi * (h % 24 - hora_pico) / 24)
+    u = np.where((h // 24) % 7 >= 5, u * factor_fin_de_semana, u)
+    return np.clip(u, 0.0, 1.0)
+
+
+def temperaturas_sinteticas(media=15.0, amplitud_anual=9.0, amplitud_diaria=5.0):
+    # Clima sintético: mínimo a mediados de enero, máximo diario a las 15 h
+    h = np.arange(HORAS_ANO)
+    return (media - amplitud_anual * np.cos(2 * np.pi * (h / 24 - 15) / 365)
+            + amplitud_diaria * np.cos(2 * np.pi * (h % 24 - 15) / 24))
+
+
+def cargar_serie_horaria(ruta, columna=None):
+    """Serie de 8760 valores de un CSV (columna indicada o la última numérica).
+
+    Un año bisiesto (8784) pierde el 29 de febrero; los huecos se interpolan.
+    """
+    import pandas as pd
+    df = pd.read_csv(ruta)
+    if columna is None:
+        numericas = df.select_dtypes("number").columns
+        if not len(numericas): raise ValueError(f"{ruta}: no hay columnas numéricas")
+        columna = numericas[-1]
+    return serie_8760(df[columna], f"{ruta} ({columna})")
+
+
+def serie_8760(valores, origen):
+    # 8760 valores float: quita el 29 de febrero de un año bisiesto e interpola los huecos (NaN)
+    v = np.array(valores, dtype=float)
+    if len(v) == HORAS_ANO + 24:
+        v = np.delete(v, np.s_[59 * 24:60 * 24])
+    if len(v) != HORAS_ANO:
+        raise ValueError(f"{origen}: se esperaban {HORAS_ANO} valores horarios, hay {len(v)}")
+    huecos = np.isnan(v)
+    if huecos.all(): raise ValueError(f"{origen}: no hay datos")
+    if huecos.any():
+        v[huecos] = np.interp(np.flatnonzero(huecos), np.flatnonzero(~huecos), v[~huecos])
+    return v
+
+
+# --- Modelo de producción de frío (compresor + economizador) ---
+def factor_cop(T_exterior, T_fria, T_diseno=T_EXTERIOR_DISENO):
+    # Relación de COP de Carnot respecto a la temperatura exterior de diseño
+    def carnot(T):
+        return (T_fria + 273.15) / np.maximum(T + APROXIMACION_CONDENSACION_K - T_fria, SALTO_MINIMO_K)
+    return np.minimum(carnot(T_exterior) / carnot(T_diseno), FACTOR_COP_MAX)
+
+
+def fraccion_free_cooling(T_economizador, T_impulsion, T_retorno):
+    # 1: el economizador enfría el agua hasta la impulsión; 0: ni siquiera preenfría el retorno
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.clip((T_retorno - T_economizador) / (T_retorno - T_impulsion), 0.0, 1.0)
+
+
+def cop_efectivo(tecnologia, cop_diseno, T_impulsion, T_retorno, T_seca, T_humeda):
+    """COP horario de una tecnología de TECNOLOGIAS_FRIO y fracción de la carga en free cooling.
+
+    Con compresor: la fracción en free cooling va a COP_FREE_COOLING y el resto al COP del
+    compresor corregido por la temperatura de condensación (seca o húmeda). Sin compresor
+    (dry cooler, torre), cop_diseno es el de ventiladores/bombas y las horas con fracción < 1
+    son horas sin capacidad suficiente.
+    """
+    economizador, condensacion = TECNOLOGIAS_FRIO.get(tecnologia, (None, "seca"))
+    forma = np.broadcast_shapes(np.shape(cop_diseno), np.shape(T_impulsion), np.shape(T_seca))
+    if economizador is None:
+        f = np.zeros(forma)
+    else:
+        T_ext = {"seca": T_seca, "humeda": T_humeda,
+                 "adiabatica": T_seca - EFICIENCIA_ADIABATICA * (T_seca - T_humeda)}[economizador]
+        f = np.broadcast_to(fraccion_free_cooling(T_ext + APROXIMACION_ECONOMIZADOR_K[economizador], T_impulsion, T_retorno), forma)
+    if condensacion is None:
+        return np.broadcast_to(cop_diseno, forma), f
+    if condensacion == "seca":
+        cop_compresor = cop_diseno * factor_cop(T_seca, T_impulsion)
+    else:
+        cop_compresor = cop_diseno * factor_cop(T_humeda, T_impulsion, T_HUMEDA_DISENO)
+    cop_compresor = np.minimum(cop_compresor, np.maximum(cop_diseno, COP_FREE_COOLING))  # con poco salto no mejora al free cooling
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 1.0 / (f / COP_FREE_COOLING + (1.0 - f) / cop_compresor), f
+
+
+def _cop_por_tecnologia(tecnologias, cop_diseno, T_impulsion, T_retorno, T_seca, T_humeda):
+    # Escenarios con distintas tecnologías: un cálculo por tecnología sobre sus filas
+    forma = np.broadcast_shapes(cop_diseno.shape, np.shape(T_impulsion), T_seca.shape)
+    cop, f = np.empty(forma), np.empty(forma)
+    fila = lambda v, m: v[m] if np.ndim(v) and v.shape[0] > 1 else v
+    for tec in np.unique(tecnologias):
+        m = tecnologias == tec
+        cop[m], f[m] = cop_efectivo(tec, fila(cop_diseno, m), fila(T_impulsion, m), fila(T_retorno, m),
+                                    fila(T_seca, m), fila(T_humeda, m))
+    return cop, f
+
+
+def _potencias_horarias(c, r, u, T_seca, T_humeda):
+    # Arrays (escenario, hora) en W, con la misma estructura que DisenadorV14._calcular_cargas_electricas_refrigeracion
+    col = lambda v: np.asarray(v, dtype=float)[:, None]
+    P_servidor = col(c["P_idle"]) + u * (col(c["P_max"]) - col(c["P_idle"]))
+    P_IT = col(r["N_servidores_total"]) * P_servidor
+    T_imp_aire = col(c["T_entrada_aire"]) - SALTO_AIRE_AGUA_K
+    cop_aire, f_aire = _cop_por_tecnologia(c["prodfrio_tec"], col(c["cop_hvac_aire"]), T_imp_aire,
+                                           col(c["T_salida_aire"]) - SALTO_AIRE_AGUA_K, T_seca, T_humeda)
+    cop_dlc, f_dlc = _cop_por_tecnologia(c["tipo_gen_frio_dlc"], col(c["cop_dlc_gen"]), T_AGUA_DLC,
+                                         T_AGUA_DLC + SALTO_AGUA_DLC_K, T_seca, T_humeda)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Q_DLC = P_IT * col(c["cerramientos_con_dlc"] / c["num_cerramientos"]) * col(c["eficiencia_captura_dlc"])
+        P_DLC = np.where(cop_dlc > 0, Q_DLC / np.where(cop_dlc > 0, cop_dlc, 1), 0) + col(c["cerramientos_con_dlc"] * c["pot_aux_dlc_dist"])
+        factor_aire = col(np.where(c["tipo_cerramiento"] == "Pasillo Frío", 1.05, 1.25))
+        P_HVAC = np.where(cop_aire > 0, (P_IT - Q_DLC) * factor_aire / np.where(cop_aire > 0, cop_aire, 1), 0)
+    P_Aux = np.broadcast_to(col(r["P_Aux_total"]), P_IT.shape)
+    return {"P_IT": P_IT, "P_HVAC": P_HVAC, "P_DLC": P_DLC, "P_Aux": P_Aux, "P_total": P_IT + P_HVAC + P_DLC + P_Aux,
+            "fc_aire": f_aire, "fc_dlc": np.where(Q_DLC > 0, f_dlc, 0.0)}
+
+
+def _series(utilizacion, temperatura):
+    # Utilización (0-1) y temperaturas seca/húmeda con los valores por defecto de simular_anual
+    from cpd_clima import HUMEDAD_RELATIVA_DEFECTO, temperatura_humeda
+    u = np.clip(perfil_utilizacion() if utilizacion is None else np.asarray(utilizacion, dtype=float), 0.0, 1.0)
+    if isinstance(temperatura, dict):
+        T_seca, T_humeda = (np.asarray(temperatura[k], dtype=float) for k in ("T_seca", "T_humeda"))
+    else:
+        T_seca = temperaturas_sinteticas() if temperatura is None else np.asarray(temperatura, dtype=float)
+        T_humeda = temperatura_humeda(T_seca, HUMEDAD_RELATIVA_DEFECTO)
+    return u, T_seca, T_humeda
+
+
+def horas_representativas(utilizacion=None, temperatura=None, paso_T=1.0, paso_u=0.02):
+    """Agrupa las 8760 h en horas tipo: misma T seca, T húmeda (redondeadas a paso_T) y
+    utilización (a paso_u). Devuelve (u, T_seca, T_humeda, horas): medias de cada grupo y
+    nº de horas que representa. Series comunes a todos los escenarios (1-D)."""
+    u, T_seca, T_humeda = (np.broadcast_to(v, (HORAS_ANO,)) for v in _series(utilizacion, temperatura))
+    clave = np.column_stack([np.rint(T_seca / paso_T), np.rint(T_humeda / paso_T), np.rint(u / paso_u)])
+    _, grupo, horas = np.unique(clave, axis=0, return_inverse=True, return_counts=True)
+    grupo = grupo.ravel()
+    media = lambda v: np.bincount(grupo, weights=v) / horas
+    return media(u), media(T_seca), media(T_humeda), horas.astype(float)
+
+
+def anual_representativo(c, r, horas_tipo, CEF=0.35, bloque=4096):
+    """PUE y CUE anuales y energía total (kWh) con horas_representativas en lugar de las 8760 h.
+
+    c, r: columnas y resultados de _columnas_lote / _evaluar_tecnico (o evaluar_lote) ya
+    calculados; pensado para barridos de cientos de miles de escenarios.
+    """
+    u, T_seca, T_humeda, horas = horas_tipo
+    n = len(r["P_IT_demandada"])
+    E_IT, E_total = np.empty(n), np.empty(n)
+    for ini in range(0, n, bloque):
+        sl = slice(ini, min(ini + bloque, n))
+        p = _potencias_horarias({k: v[sl] for k, v in c.items()}, {k: v[sl] for k, v in r.items()},
+                                u[None], T_seca[None], T_humeda[None])
+        E_IT[sl] = p["P_IT"] @ horas / 1000; E_total[sl] = p["P_total"] @ horas / 1000
+    with np.errstate(divide="ignore", invalid="ignore"):
+        PUE = np.where(E_IT > 0, E_total / E_IT, 1.0)
+    return {"PUE_anual": PUE, "CUE_anual": np.where(E_IT > 0, PUE * CEF, 0.0), "E_total_kWh": E_total}
+
+
+def simular_anual(escenarios, utilizacion=None, temperatura=None, WCR=0.5, CEF=0.35,
+                  precio_kWh=PRECIO_ENERGIA_DEFECTO, horario=False, bloque=256):
+    """Año horario de un lote de escenarios (DataFrame o dict de columnas, como evaluar_lote).
+
+    utilizacion: array de 8760 (común) o (escenarios, 8760); por defecto perfil_utilizacion().
+    temperatura: clima de cpd_clima.cargar_clima ({"T_seca", "T_humeda"}) o sólo la seca como
+    array (la húmeda se estima con HUMEDAD_RELATIVA_DEFECTO); por defecto temperaturas_sinteticas().
+    WCR, CEF y precio_kWh: escalar o uno por escenario. Devuelve un dict {resultado: array por
+    escenario}: energías anuales (kWh), PUE/WUE/CUE anuales, coste (€), PUE de diseño y horas de
+    free cooling; con horario=True añade "horario" {P_IT, P_HVAC, P_DLC, P_Aux, P_total} en W y
+    las fracciones de free cooling {fc_aire, fc_dlc} (escenario, hora).
+    """
+    c = _columnas_lote(escenarios)
+    r = _evaluar_tecnico(c, estricto=False)
+    n = len(r["P_IT_demandada"])
+    u, T_seca, T_humeda = _series(utilizacion, temperatura)
+    for nombre, serie in (("utilizacion", u), ("temperatura", T_seca), ("temperatura húmeda", T_humeda)):
+        if serie.shape[-1] != HORAS_ANO or serie.ndim > 2 or (serie.ndim == 2 and serie.shape[0] not in (1, n)):
+            raise ValueError(f"{nombre}: se esperaba (8760,) o ({n}, 8760), no {serie.shape}")
+    u, T_seca, T_humeda = np.atleast_2d(u), np.atleast_2d(T_seca), np.atleast_2d(T_humeda)
+    por_bloque = lambda v, sl: v if len(v) == 1 else v[sl]
+
+    energias = {k: np.empty(n) for k in ("IT", "HVAC", "DLC", "Aux", "total")}
+    horas = {f"horas_fc_{tipo}_{k}": np.empty(n) for k in ("aire", "dlc") for tipo in ("total", "parcial")}
+    horas.update({"horas_sin_capacidad_aire": np.empty(n), "horas_sin_capacidad_dlc": np.empty(n)})
+    pico = np.empty(n)
+    series = {}
+    for ini in range(0, n, bloque):
+        sl = slice(ini, min(ini + bloque, n))
+        p = _potencias_horarias({k: v[sl] for k, v in c.items()}, {k: v[sl] for k, v in r.items()},
+                                por_bloque(u, sl), por_bloque(T_seca, sl), por_bloque(T_humeda, sl))
+        for k in energias:
+            energias[k][sl] = p[f"P_{k}"].sum(axis=1) / 1000     # W durante 1 h -> kWh
+        pico[sl] = p["P_total"].max(axis=1)
+        for k, tecnologias, carga in (("aire", c["prodfrio_tec"][sl], p["P_HVAC"]), ("dlc", c["tipo_gen_frio_dlc"][sl], p["P_DLC"])):
+            f = p[f"fc_{k}"]
+            horas[f"horas_fc_total_{k}"][sl] = (f >= 1.0).sum(axis=1)
+            horas[f"horas_fc_parcial_{k}"][sl] = ((f > 0.0) & (f < 1.0)).sum(axis=1)
+            sin_compresor = np.array([TECNOLOGIAS_FRIO.get(t, (None, "seca"))[1] is None for t in tecnologias])
+            horas[f"horas_sin_capacidad_{k}"][sl] = np.where(sin_compresor, ((f < 1.0) & (carga > 0)).sum(axis=1), 0)
+        if horario:
+            for k, v in p.items(): series.setdefault(k, []).append(np.array(v))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        PUE = np.where(energias["IT"] > 0, energias["total"] / energias["IT"], 1.0)
+        WUE = np.where(energias["IT"] > 0, energias["HVAC"] / energias["IT"] * WCR, 0.0)
+    res = {f"E_{k}_kWh": v for k, v in energias.items()}
+    res.update({"PUE_anual": PUE, "WUE_anual": WUE, "CUE_anual": np.where(energias["IT"] > 0, PUE * CEF, 0.0),
+                "coste_energia": energias["total"] * precio_kWh, "P_total_pico_W": pico,
+                "PUE_diseno": r["PUE"], "utilizacion_media": np.broadcast_to(u.mean(axis=1), (n,)).copy()})
+    res.update(horas)
+    if horario:
+        res["horario"] = {k: np.concatenate(v) for k, v in series.items()}
+    return res
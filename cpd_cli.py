@@ -0,0 +1,1037 @@
+# ==============================================================================
+# CLI SIN GUI: CALCULAR ESCENARIOS DESDE FICHERO Y EXPORTAR RESULTADOS
+# ==============================================================================
+# Uso:
+#   python cpd_cli.py calcular escenarios.json --json res.json --csv res.csv --docx proyecto.docx
+#   python cpd_cli.py calcular escenarios.json --docx proyecto.docx --traza traza.json --perfil
+#   python cpd_cli.py lote variantes.xlsx --salida informes/ --procesos 8
+#   python cpd_cli.py medir-importacion
+#   python cpd_cli.py medir-en-vivo --json en_vivo.jsonl
+#   python cpd_cli.py medir-graficos --recalculos 1000
+#   python cpd_cli.py medir-docx --filas 1000 10000
+#   python cpd_cli.py montecarlo escenario.json --sorteos 1000000 --csv capex_p10_p90.csv
+#   python cpd_cli.py anual escenarios.json --clima madrid.epw sevilla.epw --utilizacion perfil.csv --precio 0.15
+#   python cpd_cli.py racks --sintetico 100000 --csv cerramientos.csv
+#   python cpd_cli.py racks --inventario activos.csv --escenario-equivalente escenario.json
+#   python cpd_cli.py medir-inventario --filas 2000000
+#   python cpd_cli.py disponibilidad escenario.json --comparar --anos 1000000 --csv redundancias.csv
+#   python cpd_cli.py hidraulica escenario.json --cerramientos 2000 --plantas 10 --csv tramos.csv
+#   python cpd_cli.py optimizar --base escenario.json --pue-max 1.4 --trafo-max 2500 --checkpoint opt.pkl
+#   python cpd_cli.py pareto --base escenario.json --puntos 100000 --csv frente.csv
+#   python cpd_cli.py sensibilidad escenario.json --delta 0.1 --top 15 --csv tornado.csv
+#   python cpd_cli.py precios escenarios.json --libros regiones.yaml fabricante.csv --csv capex_libros.csv
+#   python cpd_cli.py medir-precios --escenarios 10000 --libros 50
+#   python cpd_cli.py almacen guardar escenarios.json
+#   python cpd_cli.py almacen consultar --filtro redundancia_electrica=2N "PUE<1.4" --orden CAPEX_por_kW
+#   python cpd_cli.py almacen mostrar 5e3c59c8
+#   python cpd_cli.py medir-almacen --filas 300000
+#   xvfb-run -a python cpd_cli.py medir-suite --tamanos pequeno mediano enorme
+#
+# Nunca importa tkinter. matplotlib y python-docx sólo se cargan si se pide --docx.
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from cpd_motor import (PARAMETROS_DISENO, ESCENARIO_DEFECTO, ErrorDimensionado,
+                       calcular_metricas_sostenibilidad, evaluar_lote)
+
+from cpd_grafo import PRESUPUESTO_EN_VIVO_MS
+from cpd_anual import PRECIO_ENERGIA_DEFECTO
+from cpd_inventario import BLOQUE_FILAS_DEFECTO
+
+WCR_DEFECTO = 0.5
+CEF_DEFECTO = 0.35
+
+# Presupuesto de importación del motor (s) y módulos que no debe arrastrar
+PRESUPUESTO_IMPORTACION_MOTOR_S = 0.3
+MODULOS_PESADOS = ("tkinter", "matplotlib", "docx", "pandas")
+
+# Umbrales de medir-graficos: crecimiento de memoria residente y deriva del redibujo
+MAX_CRECIMIENTO_RSS_MB = 5.0
+MAX_DERIVA_REDIBUJO = 1.5
+
+
+# --- Lectura de escenarios ---
+def _valor_de_tabla(clave, v):
+    # Celdas de CSV/XLSX: tipos de numpy a Python; números leídos como texto (columna con
+    # alguna celda no numérica) o enteros leídos como float (columna con huecos) a su tipo.
+    # Lo que no se puede convertir se deja: falla sólo ese escenario.
+    v = v.item() if isinstance(v, np.generic) else v
+    defecto = ESCENARIO_DEFECTO.get(clave)
+    if isinstance(defecto, (int, float)) and isinstance(v, str):
+        try:
+            v = float(v)
+        except ValueError:
+            return v
+    if type(defecto) is int and isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def cargar_escenarios(ruta):
+    # JSON/YAML: un objeto o una lista de objetos. CSV/XLSX: una fila por escenario (celdas vacías = defecto).
+    ext = os.path.splitext(ruta)[1].lower()
+    if ext in (".csv", ".xlsx", ".xls"):
+        import pandas as pd
+        try:
+            df = pd.read_csv(ruta) if ext == ".csv" else pd.read_excel(ruta)
+        except ImportError:
+            raise SystemExit("Instala 'openpyxl' para leer escenarios XLSX.")
+        escenarios = [{k: _valor_de_tabla(k, v) for k, v in fila.items() if not (isinstance(v, float) and np.isnan(v))}
+                      for fila in df.to_dict("records")]
+    elif ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise SystemExit("Instala 'PyYAML' para leer escenarios YAML.")
+        with open(ruta, encoding="utf-8") as f:
+            escenarios = yaml.safe_load(f)
+    else:
+        with open(ruta, encoding="utf-8") as f:
+            escenarios = json.load(f)
+    if isinstance(escenarios, dict):
+        escenarios = [escenarios]
+
+    resultado = []
+    for i, esc in enumerate(escenarios):
+        esc = dict(esc)
+        extra = {"WCR": float(esc.pop("WCR", WCR_DEFECTO)), "CEF": float(esc.pop("CEF", CEF_DEFECTO)),
+                 "nombre": str(esc.pop("nombre", f"escenario_{i + 1:03d}"))}
+        desconocidos = set(esc) - set(PARAMETROS_DISENO)
+        if desconocidos:
+            raise SystemExit(f"Escenario {i + 1}: parámetros desconocidos {sorted(desconocidos)}")
+        resultado.append(({**ESCENARIO_DEFECTO, **esc}, extra))
+    return resultado
+
+
+# --- Serialización ---
+def _a_json(obj):
+    if isinstance(obj, np.generic): return obj.item()
+    if isinstance(obj, np.ndarray): return obj.tolist()
+    if hasattr(obj, "to_dict"): return obj.to_dict("records")
+    raise TypeError(f"No serializable: {type(obj).__name__}")
+
+
+def resumen_proyecto(proyecto, extra):
+    d = proyecto["diseno"]
+    return {
+        "nombre": extra["nombre"],
+        "cargas_W": {"IT": d.P_IT_demandada, "HVAC": d.P_HVAC_demandada, "DLC": d.P_DLC_demandada,
+                     "Aux": d.P_Aux_total, "Total": d.P_total_demandada},
+        "electrico": proyecto["res_elec"], "hvac": proyecto["res_hvac"], "dlc": proyecto["res_dlc"],
+        "kpis": proyecto["kpis"],
+        "metricas": calcular_metricas_sostenibilidad(d, extra["WCR"], extra["CEF"]),
+        "consumos_W": proyecto["consumos"],
+        "capex": proyecto["dfs"]["capex"],
+        "capex_total": proyecto["dfs"]["capex"]["Total (€)"].sum(),
+    }
+
+
+def escribir_docx(proyecto, extra, ruta, trazador=None, sens=None):
+    from cpd_informe import (HAS_DOCX, png_grafico_metricas, png_grafico_consumos, png_grafico_tornado,
+                             crear_documento_proyecto_word)
+    from cpd_sensibilidad import tabla_sensibilidad
+    if not HAS_DOCX:
+        raise SystemExit("Instala 'python-docx' para exportar.")
+    span = trazador.span if trazador else lambda *a: contextlib.nullcontext()
+    dfs = proyecto["dfs"]
+    with span("informe.graficos", "graficos"):
+        png_metricas = png_grafico_metricas(calcular_metricas_sostenibilidad(proyecto["diseno"], extra["WCR"], extra["CEF"]))
+        png_consumos = png_grafico_consumos(proyecto["consumos"])
+        png_tornado = png_grafico_tornado(sens) if sens is not None else None
+    with span("informe.docx", "docx"):
+        crear_documento_proyecto_word(proyecto["diseno"], dfs["elec"], dfs["hvac"], dfs["hidro"], dfs["pci"], proyecto["consumos"],
+                                      dfs["capex"], dfs["ratios"], png_consumos, png_metricas, destino=ruta,
+                                      fig_tornado=png_tornado,
+                                      df_sensibilidad=tabla_sensibilidad(sens, 15) if sens is not None else None)
+
+
+def _ruta_por_escenario(ruta, extra, n):
+    if n == 1: return ruta
+    base, ext = os.path.splitext(ruta)
+    return f"{base}_{extra['nombre']}{ext}"
+
+
+# --- Subcomandos ---
+def cmd_calcular(args):
+    escenarios = cargar_escenarios(args.escenarios)
+    if args.csv:
+        import pandas as pd
+        columnas = {k: [esc[k] for esc, _ in escenarios] for k in PARAMETROS_DISENO}
+        try:
+            df = pd.DataFrame(evaluar_lote(columnas))
+        except ErrorDimensionado as e:
+            nombres = ", ".join(escenarios[i][1]["nombre"] for i in e.indices)
+            raise SystemExit(f"{nombres}: {e}")
+        df.insert(0, "nombre", [extra["nombre"] for _, extra in escenarios])
+        df.to_csv(args.csv, index=False)
+        print(f"CSV: {len(df)} escenarios -> {args.csv}")
+
+    if args.json or args.docx or args.traza:
+        from cpd_grafo import GrafoProyecto
+        from cpd_trazas import Trazador
+        trazador = Trazador() if args.traza else None
+        grafo = GrafoProyecto(trazador=trazador)  # variantes de un mismo diseño comparten los nodos no afectados
+        resumenes = []
+        with trazador.capturar() if args.perfil and trazador else contextlib.nullcontext():
+            for esc, extra in escenarios:
+                if trazador: trazador.iniciar(extra["nombre"])
+                try:
+                    proyecto = grafo.proyecto(esc)
+                except ErrorDimensionado as e:
+                    raise SystemExit(f"{extra['nombre']}: {e}")
+                if args.json:
+                    resumenes.append(resumen_proyecto(proyecto, extra))
+                if args.docx:
+                    from cpd_sensibilidad import analizar_sensibilidad
+                    with trazador.span("sensibilidad", "sensibilidad") if trazador else contextlib.nullcontext():
+                        sens = analizar_sensibilidad(esc)
+                    ruta = _ruta_por_escenario(args.docx, extra, len(escenarios))
+                    escribir_docx(proyecto, extra, ruta, trazador, sens)
+                    print(f"DOCX: {ruta}")
+                if trazador: print(trazador.texto_desglose())
+        if trazador:
+            print("Traza: " + ", ".join(trazador.exportar(args.traza)))
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(resumenes, f, ensure_ascii=False, indent=2, default=_a_json)
+            print(f"JSON: {len(resumenes)} escenarios -> {args.json}")
+        print(f"Caché de nodos: {sum(grafo.aciertos.values())} aciertos, {sum(grafo.fallos.values())} fallos")
+    return 0
+
+
+def cmd_montecarlo(args):
+    import pandas as pd
+    from cpd_montecarlo import distribuciones_por_defecto, simular_capex
+    esc, extra = cargar_escenarios(args.escenario)[0]
+    distribuciones = distribuciones_por_defecto(args.incertidumbre)
+    if args.distribuciones:
+        # JSON {clave PRECIOS_REF o factor: número | ["triangular", min, moda, max] | ...}
+        with open(args.distribuciones, encoding="utf-8") as f:
+            distribuciones.update({k: tuple(v) if isinstance(v, list) else v for k, v in json.load(f).items()})
+    t0 = time.perf_counter()
+    df = simular_capex(esc, distribuciones, n=args.sorteos, semilla=args.semilla)
+    print(f"{extra['nombre']}: {args.sorteos:,} sorteos en {time.perf_counter() - t0:.2f} s")
+    with pd.option_context("display.width", 160, "display.float_format", "{:,.0f}".format):
+        print(df.to_string(index=False))
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+    return 0
+
+
+def cmd_sensibilidad(args):
+    # Tornado del CAPEX y la PUE de un escenario: todas las entradas y precios en un único lote
+    import pandas as pd
+    from cpd_sensibilidad import analizar_sensibilidad, tabla_sensibilidad
+    esc, extra = cargar_escenarios(args.escenario)[0] if args.escenario else (dict(ESCENARIO_DEFECTO), {"nombre": "defecto"})
+    t0 = time.perf_counter()
+    sens = analizar_sensibilidad(esc, delta=args.delta, puntos=args.puntos, con_precios=not args.sin_precios)
+    t = time.perf_counter() - t0
+    ref = sens["referencia"]
+    print(f"{extra['nombre']}: {len(sens['entrada'])} entradas, {sens['variantes']:,} variantes en {t * 1000:.1f} ms; "
+          f"CAPEX {ref['CAPEX_Total']:,.0f} €, PUE {ref['PUE']:.3f}")
+    df = tabla_sensibilidad(sens)
+    with pd.option_context("display.width", 220, "display.max_colwidth", 60):
+        print(df.head(args.top).to_string(index=False, float_format="{:,.3f}".format))
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+    return 0
+
+
+def cmd_anual(args):
+    import pandas as pd
+    from cpd_anual import cargar_serie_horaria, simular_anual
+    from cpd_clima import cargar_clima, directorio_cache_clima
+    escenarios = cargar_escenarios(args.escenarios)
+    utilizacion = None
+    if args.utilizacion:
+        utilizacion = cargar_serie_horaria(args.utilizacion)
+        if utilizacion.max() > 1.0: utilizacion = utilizacion / 100   # en %
+    columnas = {k: [esc[k] for esc, _ in escenarios] for k in PARAMETROS_DISENO}
+    WCR, CEF = (np.array([extra[k] for _, extra in escenarios]) for k in ("WCR", "CEF"))
+    partes = []
+    for ruta in args.clima or [None]:
+        t0 = time.perf_counter()
+        clima = cargar_clima(ruta, cache=not args.sin_cache) if ruta else None
+        t_clima = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        r = simular_anual(columnas, utilizacion, clima, WCR=WCR, CEF=CEF, precio_kWh=args.precio)
+        t = time.perf_counter() - t0
+        partes.append(pd.DataFrame({"clima": os.path.basename(ruta) if ruta else "sintético",
+                                    "nombre": [extra["nombre"] for _, extra in escenarios], **r}))
+        print(f"{partes[-1]['clima'][0]}: clima en {t_clima * 1000:.1f} ms, {len(escenarios)} escenarios x 8760 h en {t * 1000:.1f} ms")
+    df = pd.concat(partes, ignore_index=True)
+    with pd.option_context("display.width", 200):
+        print(df[["clima", "nombre", "E_total_kWh", "PUE_diseno", "PUE_anual", "WUE_anual", "CUE_anual", "coste_energia",
+                  "horas_fc_total_aire", "horas_fc_parcial_aire", "horas_fc_total_dlc"]]
+              .to_string(index=False, float_format="{:,.3f}".format))
+    if args.clima and not args.sin_cache:
+        print(f"Caché de clima: {directorio_cache_clima()}")
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+    return 0
+
+
+def cmd_racks(args):
+    import pandas as pd
+    from cpd_racks import InventarioRacks, dimensionar_racks, puntos_calientes
+    t0 = time.perf_counter()
+    importacion = None
+    if args.sintetico:
+        inv, origen = InventarioRacks.sintetico(args.sintetico), f"campus sintético de {args.sintetico:,} racks"
+    elif args.inventario:
+        from cpd_inventario import importar_inventario
+        columnas = dict(c.split("=", 1) for c in args.columna or [])
+        def progreso(filas, s):
+            print(f"\r{filas:,} filas ({filas / max(s, 1e-9):,.0f} filas/s)", end="", file=sys.stderr, flush=True)
+        importacion = importar_inventario(args.inventario, bloque=args.bloque, columnas=columnas, progreso=progreso)
+        print(file=sys.stderr)
+        inv, est = importacion["inventario"], importacion["estadisticas"]
+        origen = (f"{args.inventario}: {est['filas']:,} filas en {est['bloques']} bloques, "
+                  f"{est['filas_por_segundo']:,.0f} filas/s")
+        if est["filas_descartadas"]: print(f"{est['filas_descartadas']:,} filas descartadas (sin rack, cerramiento o P_max)")
+        if est["filas_incoherentes"]: print(f"{est['filas_incoherentes']:,} filas con cerramiento/planta distinto al de su rack")
+        if est.get("racks_sin_planta"):
+            print(f"{est['filas_sin_planta']:,} filas incompletas sin planta; {est['racks_sin_planta']:,} racks quedan sin planta")
+    else:
+        esc, extra = cargar_escenarios(args.escenario)[0] if args.escenario else (dict(ESCENARIO_DEFECTO), {"nombre": "defecto"})
+        inv, origen = InventarioRacks.desde_escenario(esc), f"escenario {extra['nombre']} (racks idénticos)"
+    t_inv = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    res = dimensionar_racks(inv, args.utilizacion)
+    t = time.perf_counter() - t0
+    tot = res["totales"]
+    print(f"{origen}: inventario en {t_inv * 1000:.1f} ms, dimensionado en {t * 1000:.1f} ms")
+    print(f"{tot['racks']:,} racks en {tot['cerramientos']:,} cerramientos, {tot['servidores']:,} servidores")
+    print(f"P IT {tot['P_IT_kW']:,.0f} kW (máx. {tot['P_IT_max_kW']:,.0f} kW), DLC {tot['Q_DLC_kW']:,.0f} kW, "
+          f"aire {tot['Q_aire_kW']:,.0f} kW, rack más cargado {tot['P_rack_max_kW']:.1f} kW")
+    print("Circuitos de rack: " + ", ".join(f"{k} A x {n:,}" for k, n in tot["circuitos_por_calibre"].items())
+          + (f", {tot['racks_fuera_catalogo']:,} FUERA DE CATÁLOGO" if tot["racks_fuera_catalogo"] else ""))
+    if tot["blindobarras_fuera_catalogo"]:
+        print(f"{tot['blindobarras_fuera_catalogo']:,} blindobarras fuera de catálogo")
+    if tot["puntos_calientes"]:
+        print(f"{tot['puntos_calientes']:,} puntos calientes; los de mayor potencia:")
+        print(puntos_calientes(inv, res, 10).to_string(index=False))
+    if importacion is not None and importacion["planta"] is not None:
+        from cpd_inventario import resumen_plantas
+        print(resumen_plantas(importacion, res).to_string(index=False, float_format="{:,.1f}".format))
+    if args.csv:
+        pd.DataFrame(res["cerramiento"]).to_csv(args.csv, index=False)
+    if args.escenario_equivalente:
+        from cpd_racks import escenario_equivalente
+        with open(args.escenario_equivalente, "w", encoding="utf-8") as f:
+            json.dump(escenario_equivalente(inv), f, indent=2, ensure_ascii=False, default=_a_json)
+        print(f"Escenario equivalente (racks idénticos) -> {args.escenario_equivalente}")
+    return 0
+
+
+def cmd_hidraulica(args):
+    # Red hidráulica de un escenario: pérdidas, altura y potencia de bombeo por circuito
+    import pandas as pd
+    from cpd_motor import DisenadorV14, MODELO_RED
+    esc, extra = cargar_escenarios(args.escenario)[0] if args.escenario else (dict(ESCENARIO_DEFECTO), {"nombre": "defecto"})
+    if args.cerramientos is not None: esc["num_cerramientos"] = args.cerramientos
+    if args.cerramientos_dlc is not None: esc["cerramientos_con_dlc"] = args.cerramientos_dlc
+    if args.plantas is not None: esc["num_plantas"] = args.plantas
+    esc["modelo_hidraulico"] = MODELO_RED
+    t0 = time.perf_counter()
+    try:
+        d = DisenadorV14(**esc)
+    except ErrorDimensionado as e:
+        print(f"{extra['nombre']}: {e}", file=sys.stderr)
+        return 1
+    t = time.perf_counter() - t0
+    filas, tramos = [], []
+    for nombre, c in d.red_hidraulica.items():
+        if not isinstance(c, dict) or "Red" not in c: continue
+        filas.append({"circuito": nombre, **{k: v for k, v in c.items() if k != "Red"}})
+        red = c["Red"]
+        tramos.append(pd.DataFrame({"circuito": nombre, **{k: red[k] for k in (
+            "origen", "destino", "tipo", "longitud_m", "DN_mm", "material", "paralelos", "Q_m3s", "v_ms")},
+            "H_destino_m": red["H_m"][red["destino"]]}))
+    print(f"{extra['nombre']}: {sum(f['Tramos'] for f in filas):,} tramos resueltos en {t * 1000:.1f} ms")
+    with pd.option_context("display.width", 200):
+        print(pd.DataFrame(filas).to_string(index=False, float_format="{:,.2f}".format))
+    r = d.red_hidraulica
+    print(f"Bombeo HVAC {r['P_bombas_HVAC_W'] / 1000:,.1f} kW ({r['Bombas_HVAC']} bombas), "
+          f"DLC {r['P_bombas_DLC_W'] / 1000:,.1f} kW ({r['Bombas_DLC']} bombas); PUE {d.P_total_demandada / d.P_IT_demandada:.3f}")
+    if args.csv and tramos:
+        pd.concat(tramos, ignore_index=True).to_csv(args.csv, index=False)
+    return 0
+
+
+def cmd_disponibilidad(args):
+    # Disponibilidad (Markov y, con --anos, Monte Carlo) y Tier por escenario o por redundancias
+    import pandas as pd
+    from cpd_disponibilidad import comparar_redundancias, evaluar_disponibilidad
+    escenarios = cargar_escenarios(args.escenarios) if args.escenarios else [(dict(ESCENARIO_DEFECTO), {"nombre": "defecto"})]
+    t0 = time.perf_counter()
+    if args.comparar:
+        esc, extra = escenarios[0]
+        df = comparar_redundancias(esc, anos=args.anos, semilla=args.semilla)
+        columnas = ["Eléctrica", "HVAC"]
+        print(f"{extra['nombre']}: {len(df)} combinaciones de redundancia")
+    else:
+        df = pd.DataFrame({"nombre": [extra["nombre"] for _, extra in escenarios],
+                           **evaluar_disponibilidad({k: [esc[k] for esc, _ in escenarios] for k in PARAMETROS_DISENO},
+                                                    anos=args.anos, semilla=args.semilla)})
+        columnas = ["nombre"]
+    t = time.perf_counter() - t0
+    columnas += ["CAPEX_Total", "Disponibilidad", "Indisponibilidad_min_ano", "Cortes_ano", "Duracion_corte_h"]
+    if args.anos: columnas += ["Indisponibilidad_MC_min_ano", "P90_MC_min_ano", "Anos_con_corte"]
+    columnas += ["Tier_topologia", "Tier"] + (["Sobrecoste", "Coste_por_minuto_evitado"] if args.comparar else [])
+    print(f"Markov{f' + Monte Carlo de {args.anos:,} años' if args.anos else ''} en {t:.2f} s")
+    with pd.option_context("display.width", 220):
+        print(df[columnas].to_string(index=False, formatters={"Disponibilidad": "{:.6f}".format},
+                                     float_format="{:,.3f}".format))
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+    return 0
+
+
+def cmd_medir_inventario(args):
+    # Filas/s del importador en streaming sobre un export sintético de N servidores
+    import resource
+    import tempfile
+    from cpd_inventario import importar_inventario, inventario_sintetico
+    resumen = {"filas": args.filas, "importaciones": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = inventario_sintetico(os.path.join(tmp, "inventario.csv"), args.filas)
+        mb = os.path.getsize(ruta) / 2**20
+        print(f"Export sintético: {args.filas:,} filas, {mb:,.0f} MB")
+        for bloque in args.bloque:
+            rss = _rss_mb()
+            est = importar_inventario(ruta, bloque=bloque)["estadisticas"]
+            r = {"bloque": bloque, "s": round(est["segundos"], 3), "filas_s": round(est["filas_por_segundo"]),
+                 "racks": est["racks"], "rss_mb": round(_rss_mb() - rss, 1),
+                 "pico_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+            resumen["importaciones"].append(r)
+            print(f"bloque {bloque:>9,}: {r['s']:6.2f} s  {r['filas_s']:>10,} filas/s  {r['racks']:,} racks  "
+                  f"pico de memoria {r['pico_mb']:,.0f} MB")
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(resumen) + "\n")
+    return 0
+
+
+def cmd_optimizar(args):
+    from cpd_optimizador import optimizar
+    base = cargar_escenarios(args.base)[0][0] if args.base else None
+    restricciones = {"PUE_max": args.pue_max, "densidad_IT_max": args.densidad_max, "trafo_max_kVA": args.trafo_max}
+
+    def progreso(h):
+        mejor = f"{h['mejor_CAPEX']:,.0f} €" if h["mejor_CAPEX"] is not None else "sin solución factible"
+        print(f"Generación {h['generacion']:3d}: {h['factibles']:6d} factibles, mejor {mejor}")
+
+    t0 = time.perf_counter()
+    estado = optimizar(base=base, restricciones=restricciones, racks_objetivo=args.racks_objetivo,
+                       poblacion=args.poblacion, generaciones=args.generaciones, paciencia=args.paciencia,
+                       procesos=args.procesos, semilla=args.semilla, checkpoint=args.checkpoint,
+                       tiempo_max_s=args.tiempo_max, progreso=progreso)
+    print(f"Tiempo: {time.perf_counter() - t0:.1f} s")
+    if estado["mejor"] is None:
+        print("No se encontró ningún escenario que cumpla las restricciones.")
+        return 1
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"mejor": estado["mejor"], "historial": estado["historial"]}, f, ensure_ascii=False, indent=2, default=_a_json)
+    print(json.dumps(estado["mejor"], ensure_ascii=False, indent=2, default=_a_json))
+    return 0
+
+
+def cmd_pareto(args):
+    # Barrido + frente de Pareto; tiempos por fase para seguir la escala con 100k+ puntos
+    import pandas as pd
+    from cpd_pareto import explorar_pareto, tabla_frente
+    base = cargar_escenarios(args.base)[0][0] if args.base else None
+    ex = explorar_pareto(args.puntos, objetivos=args.objetivos, base=base, CEF=args.cef, semilla=args.semilla)
+    t = ex["tiempos"]
+    df = tabla_frente(ex)
+    print(f"{len(df)} no dominados de {args.puntos:,} escenarios ({', '.join(ex['objetivos'])}): "
+          f"barrido {t['barrido_s']:.2f} s, evaluación {t['evaluacion_s']:.2f} s, frente {t['frente_s'] * 1000:.0f} ms")
+    with pd.option_context("display.width", 250, "display.max_rows", args.filas):
+        print(df.head(args.filas).to_string(index=False, float_format="{:,.3f}".format))
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+    return 0
+
+
+def cmd_precios(args):
+    # CAPEX de cada escenario con cada libro de precios (un producto matricial)
+    import pandas as pd
+    from cpd_motor import CATEGORIAS_CAPEX
+    from cpd_precios import cargar_libros_precios, extraer_cantidades, valorar
+    escenarios = cargar_escenarios(args.escenarios)
+    libros = cargar_libros_precios(*args.libros)
+    t0 = time.perf_counter()
+    cantidades = extraer_cantidades({k: [esc[k] for esc, _ in escenarios] for k in PARAMETROS_DISENO}, estricto=False)
+    t1 = time.perf_counter()
+    res = valorar(cantidades, libros)
+    t2 = time.perf_counter()
+    print(f"{len(escenarios)} escenarios x {len(libros)} libros: cantidades {t1 - t0:.3f} s, valoración {(t2 - t1) * 1000:.1f} ms")
+    nombres = [extra["nombre"] for _, extra in escenarios]
+    df = pd.DataFrame(res["CAPEX_Total"], index=nombres, columns=libros.nombres)
+    with pd.option_context("display.width", 220, "display.float_format", "{:,.0f}".format):
+        print(df.to_string())
+    if args.csv:
+        # Formato largo: escenario, libro, versión, total y subtotales por categoría
+        S, B = res["CAPEX_Total"].shape
+        largo = pd.DataFrame({"escenario": np.repeat(nombres, B), "libro": np.tile(libros.nombres, S),
+                              "version": np.tile(libros.versiones, S), "CAPEX_Total": res["CAPEX_Total"].ravel(),
+                              **{f"CAPEX_{cat}": res[f"CAPEX_{cat}"].ravel() for cat in CATEGORIAS_CAPEX}})
+        largo.to_csv(args.csv, index=False)
+    return 0
+
+
+def cmd_medir_precios(args):
+    # Valoración matricial de N escenarios x B libros frente a evaluar_lote por libro y
+    # al presupuesto en DataFrame por diseño (ambos medidos sobre una muestra y extrapolados)
+    from cpd_motor import DisenadorV14, evaluar_lote
+    from cpd_pareto import construir_barrido, escenario_de
+    from cpd_precios import extraer_cantidades, libros_sinteticos, valorar
+    columnas, _ = construir_barrido(args.escenarios, semilla=args.semilla)
+    libros = libros_sinteticos(args.libros, semilla=args.semilla)
+    S, B = args.escenarios, len(libros)
+
+    t = time.perf_counter()
+    cantidades = extraer_cantidades(columnas, estricto=False)
+    t_extraer = time.perf_counter() - t
+    t_valorar = float("inf")
+    for _ in range(3):
+        t = time.perf_counter()
+        res = valorar(cantidades, libros)
+        t_valorar = min(t_valorar, time.perf_counter() - t)
+
+    referencia = min(args.referencia, B)
+    error = 0.0
+    t = time.perf_counter()
+    for b in range(referencia):
+        r = evaluar_lote(columnas, precios=libros.libro(libros.nombres[b]), estricto=False)
+        error = max(error, float(np.max(np.abs(res["CAPEX_Total"][:, b] - r["CAPEX_Total"]) / np.abs(r["CAPEX_Total"]))))
+    t_lote = (time.perf_counter() - t) / max(referencia, 1) * B
+
+    muestra = min(20, S)
+    libro = libros.libro(libros.nombres[0])
+    t = time.perf_counter()
+    for i in range(muestra):
+        d = DisenadorV14(**escenario_de(columnas, i))
+        d.calcular_presupuesto_detallado(d.dimensionar_sistema_electrico(), d.dimensionar_sistema_hvac_completo(),
+                                         d.dimensionar_dlc_hidraulica(), precios=libro)
+    t_df = (time.perf_counter() - t) / muestra * S * B
+
+    resumen = {"escenarios": S, "libros": B, "pares": int(cantidades.Q.shape[1]), "densidad": round(cantidades.densidad, 3),
+               "extraer_s": round(t_extraer, 3), "valorar_s": round(t_valorar, 4),
+               "evaluar_lote_por_libro_s": round(t_lote, 2), "dataframe_por_diseno_s": round(t_df, 1),
+               "error_relativo_max": error}
+    print(f"{S:,} escenarios x {B} libros ({resumen['pares']} pares categoría/precio, densidad {cantidades.densidad:.1%})")
+    print(f"  extracción de cantidades : {t_extraer:8.3f} s (una vez)")
+    print(f"  valoración (Q @ E)       : {t_valorar * 1000:8.1f} ms, con subtotales por categoría")
+    print(f"  evaluar_lote x {B} libros : {t_lote:8.2f} s (extrapolado de {referencia} libros)")
+    print(f"  DataFrame diseño a diseño: {t_df:8.1f} s (extrapolado de {muestra} diseños)")
+    print(f"  error relativo máximo    : {error:.1e}")
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(resumen) + "\n")
+    return 0
+
+
+def cmd_almacen(args):
+    # Almacén de escenarios: guardar un fichero (aciertos por huella), consultar o mostrar uno
+    import pandas as pd
+    from cpd_almacen import AlmacenEscenarios
+    almacen = AlmacenEscenarios(args.ruta)
+    if args.accion == "guardar":
+        if not args.objetivo:
+            raise SystemExit("Indica el fichero de escenarios a guardar.")
+        escenarios = cargar_escenarios(args.objetivo)
+        t = time.perf_counter()
+        g = almacen.guardar([esc for esc, _ in escenarios], nombres=[extra["nombre"] for _, extra in escenarios])
+        print(f"{g['nuevos']} nuevos, {g['aciertos']} ya guardados en {(time.perf_counter() - t) * 1000:.0f} ms "
+              f"({len(almacen):,} escenarios en {almacen.ruta})")
+        for (_, extra), h in zip(escenarios, g["huellas"]):
+            print(f"  {h[:12]}  {extra['nombre']}")
+    elif args.accion == "consultar":
+        t = time.perf_counter()
+        df = almacen.consultar(args.filtro, orden=args.orden, descendente=args.descendente, limite=args.limite)
+        dt = time.perf_counter() - t
+        print(f"{len(df)} de {almacen.contar(args.filtro):,} escenarios en {dt * 1000:.1f} ms")
+        df["huella"] = df["huella"].str[:12]
+        with pd.option_context("display.width", 250, "display.max_rows", args.limite):
+            print(df.drop(columns=["creado"]).to_string(index=False, float_format="{:,.3f}".format))
+        if args.csv:
+            df.to_csv(args.csv, index=False)
+    else:
+        e = almacen.obtener(args.objetivo or "")
+        if e is None:
+            raise SystemExit(f"No hay un único escenario con huella '{args.objetivo}'.")
+        print(f"{e['huella']}  {e['nombre'] or ''}  ({e['creado']})")
+        print(json.dumps(e["parametros"], indent=2, ensure_ascii=False))
+        with pd.option_context("display.width", 220):
+            print(e["capex"].to_string(index=False, float_format="{:,.2f}".format))
+        print(f"CAPEX total: {e['resultados']['CAPEX_Total']:,.0f} €  PUE: {e['resultados']['PUE']:.3f}")
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(e["parametros"], f, indent=2, ensure_ascii=False)
+    almacen.cerrar()
+    return 0
+
+
+def cmd_medir_almacen(args):
+    # Alta de N escenarios de un barrido, segunda pasada (todo aciertos) y consultas típicas
+    import tempfile
+    from cpd_almacen import AlmacenEscenarios
+    from cpd_pareto import construir_barrido
+    columnas, _ = construir_barrido(args.filas, semilla=args.semilla)
+    with tempfile.TemporaryDirectory() as tmp:
+        almacen = AlmacenEscenarios(os.path.join(tmp, "medir.sqlite"))
+        t = time.perf_counter()
+        g = almacen.guardar(columnas)
+        t_alta = time.perf_counter() - t
+        t = time.perf_counter()
+        g2 = almacen.guardar(columnas)
+        t_aciertos = time.perf_counter() - t
+        consultas = {
+            "2N con PUE<1.4 por €/kW": (["redundancia_electrica=2N", "PUE<1.4"], "CAPEX_por_kW"),
+            "CAPEX<2M por PUE": (["CAPEX_Total<2000000"], "PUE"),
+            "P_IT>500 kW por CAPEX": (["P_IT_kW>500"], "CAPEX_Total"),
+        }
+        tiempos = {}
+        for nombre, (filtros, orden) in consultas.items():
+            medidas = []
+            for _ in range(args.repeticiones):
+                t = time.perf_counter()
+                almacen.consultar(filtros, orden=orden, limite=100)
+                medidas.append(time.perf_counter() - t)
+            tiempos[nombre] = float(np.median(medidas))
+        almacen.con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        almacen.cerrar()
+        tamano = os.path.getsize(os.path.join(tmp, "medir.sqlite")) / 1e6
+    resumen = {"filas": args.filas, "nuevos": g["nuevos"], "aciertos_segunda_pasada": g2["aciertos"],
+               "alta_s": round(t_alta, 2), "aciertos_s": round(t_aciertos, 2), "fichero_mb": round(tamano, 1),
+               "consultas_ms": {k: round(v * 1000, 2) for k, v in tiempos.items()}}
+    print(f"{args.filas:,} escenarios: alta {t_alta:.1f} s ({g['nuevos'] / max(t_alta, 1e-9):,.0f}/s), "
+          f"segunda pasada {t_aciertos:.2f} s ({g2['aciertos']:,} aciertos), fichero {tamano:.0f} MB")
+    for nombre, dt in tiempos.items():
+        print(f"  {nombre:<26}: {dt * 1000:7.2f} ms (mediana de {args.repeticiones}, 100 filas)")
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(resumen, ensure_ascii=False) + "\n")
+    return 0
+
+
+def cmd_medir_suite(args):
+    # Suite completa (motor, tablas, gráficos, DOCX y GUI) contra umbrales e historial;
+    # código 1 si algún caso se ha ralentizado
+    import cpd_medidas as m
+    args.umbrales, args.historial = args.umbrales or m.RUTA_UMBRALES, args.historial or m.RUTA_HISTORIAL
+    def mostrar(caso, r):
+        print(f"  {caso:<52} {r['mediana_ms']:10.3f} ms  (mín {r['min_ms']:.3f}, 1ª {r['primera_ms']:.1f}, n={r['repeticiones']})")
+    resultado = m.ejecutar_suite(args.tamanos, gui=not args.sin_gui, filtro=args.caso, progreso=mostrar)
+    for parte, motivo in resultado["omitidos"].items():
+        print(f"  {parte}: omitido, {motivo}")
+    historial = m.cargar_historial(args.historial)
+    fallos = [] if args.sin_comparar else m.comparar(resultado, m.cargar_umbrales(args.umbrales), historial,
+                                                     factor=args.factor)
+    if args.actualizar_umbrales:
+        m.guardar_umbrales(resultado, args.umbrales, factor=args.actualizar_umbrales)
+        print(f"Umbrales reescritos en {args.umbrales} ({args.actualizar_umbrales:g} x mediana)")
+    m.anadir_historial(resultado, args.historial)
+    previos = sum(h.get("maquina") == resultado["maquina"] for h in historial)
+    print(f"{len(resultado['casos'])} casos en {resultado['maquina']}; {previos} ejecuciones previas de esta máquina")
+    for f in fallos:
+        print(f"REGRESIÓN {f['caso']}: {f['mediana_ms']:.3f} ms > {f['limite_ms']:.3f} ms ({f['motivo']})")
+    return 1 if fallos else 0
+
+
+def _tiempo_importacion(modulo, repeticiones=3):
+    # Mejor de N arranques en frío de un intérprete nuevo; devuelve (s, módulos pesados cargados)
+    codigo = ("import sys, time; t = time.perf_counter(); import {m}; dt = time.perf_counter() - t; "
+              "print(dt); print(','.join(p for p in {pesados!r} if p in sys.modules))").format(m=modulo, pesados=MODULOS_PESADOS)
+    mejor, cargados = float("inf"), ""
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split("\n")
+        mejor = min(mejor, float(salida[0])); cargados = salida[1]
+    return mejor, cargados
+
+
+def cmd_lote(args):
+    from cpd_lote import INDICE_LOTE, generar_lote
+    escenarios = cargar_escenarios(args.escenarios)
+    def progreso(hechos, total, fila):
+        estado = f"{fila['segundos']:.2f} s" if fila["estado"] == "ok" else fila["error"]
+        print(f"[{hechos}/{total}] {fila['nombre']}: {estado}")
+    t = time.perf_counter()
+    indice = generar_lote(escenarios, args.salida, procesos=args.procesos, progreso=progreso)
+    t = time.perf_counter() - t
+    fallidos = int((indice["estado"] != "ok").sum())
+    print(f"{len(indice) - fallidos} informes, {fallidos} fallidos en {t:.1f} s ({len(indice) / t:.2f} escenarios/s)"
+          f" -> {os.path.join(args.salida, INDICE_LOTE)}")
+    return 1 if fallidos else 0
+
+
+def cmd_medir_importacion(args):
+    t_motor, pesados_motor = _tiempo_importacion("cpd_motor")
+    t_gui, _ = _tiempo_importacion("cpd_desktop")
+    print(f"import cpd_motor   : {t_motor*1000:7.1f} ms (presupuesto {PRESUPUESTO_IMPORTACION_MOTOR_S*1000:.0f} ms)")
+    print(f"import cpd_desktop : {t_gui*1000:7.1f} ms")
+    fallos = []
+    if t_motor > PRESUPUESTO_IMPORTACION_MOTOR_S: fallos.append("cpd_motor supera el presupuesto de importación")
+    if pesados_motor: fallos.append(f"cpd_motor importa módulos pesados: {pesados_motor}")
+    for f in fallos: print("ERROR:", f)
+    return 1 if fallos else 0
+
+
+def _rss_mb():
+    # Memoria residente del proceso (MB): psutil si está, /proc en Linux o el pico de resource
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _LienzosKPI:
+    # Las figuras persistentes de la pestaña KPI sobre un lienzo Agg: lo mismo que la GUI sin Tk.
+    # El tornado se actualiza en cada edición pero, como en la GUI, se dibuja cuando se deja
+    # de editar (ANTIRREBOTE_TORNADO_MS): su dibujo va aparte, en dibujar_diferidos()
+    DIFERIDOS = ("sensibilidad",)
+
+    def __init__(self):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from cpd_informe import GraficoMetricas, GraficoConsumos, GraficoTornado
+        self.graficos = {"metricas": GraficoMetricas(), "consumos": GraficoConsumos(), "sensibilidad": GraficoTornado()}
+        self.lienzos = {n: FigureCanvasAgg(g.fig) for n, g in self.graficos.items()}
+        self.graficos["metricas"].activar_blit()
+
+    def redibujar(self, nombre, valor):
+        # Como la GUI: sin dibujo si la imagen no cambia, blit si basta, draw completo si no
+        grafico = self.graficos[nombre]
+        if grafico.actualizar(valor) is None or nombre in self.DIFERIDOS or not grafico.visible_cambiado: return
+        if not grafico.blit(): self.lienzos[nombre].draw()
+
+    def dibujar_diferidos(self):
+        for nombre in self.DIFERIDOS: self.lienzos[nombre].draw()
+
+
+def _redibujo_sin_tk(valor):
+    # Trabajo equivalente a pintar una tabla en la GUI: formatear sus filas
+    if hasattr(valor, "itertuples"):
+        [[f"{v:,.2f}" if isinstance(v, float) else v for v in fila] for fila in valor.itertuples(index=False)]
+
+
+def _aplicar_edicion(i, escenario, extra):
+    from cpd_grafo import EDICIONES_EN_VIVO
+    campo, base, paso = EDICIONES_EN_VIVO[i % len(EDICIONES_EN_VIVO)]
+    (extra if campo in extra else escenario)[campo] = base + paso * (i // len(EDICIONES_EN_VIVO) + 1)
+
+
+def cmd_medir_en_vivo(args):
+    # Latencia de una edición en vivo sobre el escenario por defecto, por pestaña:
+    # recálculo incremental + nodos de la pestaña recalculados y redibujados (sin Tk). El
+    # dibujo diferido del tornado se mide aparte (cada 5 ediciones), fuera del presupuesto
+    from cpd_grafo import GrafoProyecto, NODOS_PROYECTO, NODOS_INCERTIDUMBRE, NODOS_POR_PESTANA, resumen_latencias
+    resumen = {}
+    for pestana, nodos in NODOS_POR_PESTANA.items():
+        grafo = GrafoProyecto(NODOS_PROYECTO + NODOS_INCERTIDUMBRE, perezosos=[n for n, _, _ in NODOS_INCERTIDUMBRE])
+        lienzos = _LienzosKPI() if pestana == "kpi" else None
+        escenario, extra = dict(ESCENARIO_DEFECTO), {"WCR": WCR_DEFECTO, "CEF": CEF_DEFECTO}
+        grafo.calcular(escenario, **extra)
+        for n in nodos: grafo.valor(n)
+        latencias, diferidos = [], []
+        for i in range(args.ediciones):
+            _aplicar_edicion(i, escenario, extra)
+            t = time.perf_counter()
+            grafo.calcular(escenario, **extra)
+            for n in sorted(nodos & grafo.cambiados):
+                if lienzos and n in lienzos.graficos: lienzos.redibujar(n, grafo.valor(n))
+                else: _redibujo_sin_tk(grafo.valor(n))
+            latencias.append((time.perf_counter() - t) * 1000)
+            if lienzos and i % 5 == 4:
+                t = time.perf_counter(); lienzos.dibujar_diferidos(); diferidos.append((time.perf_counter() - t) * 1000)
+        resumen[pestana] = resumen_latencias(latencias, args.presupuesto_ms)
+        r = resumen[pestana]
+        print(f"{pestana:6s}: p50 {r['p50_ms']:6.1f} ms  p95 {r['p95_ms']:6.1f} ms  máx {r['max_ms']:6.1f} ms"
+              f"{'' if r['dentro_presupuesto'] else '  SUPERA EL PRESUPUESTO'}")
+        if diferidos:
+            r["tornado_diferido_p50_ms"] = round(float(np.median(diferidos)), 1)
+            print(f"        dibujo diferido del tornado (al dejar de editar): p50 {r['tornado_diferido_p50_ms']:6.1f} ms")
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(resumen) + "\n")
+    return 0 if all(r["dentro_presupuesto"] for r in resumen.values()) else 1
+
+
+def cmd_medir_graficos(args):
+    # N recálculos en vivo con las figuras persistentes de la pestaña KPI: la memoria
+    # residente debe quedar plana y el redibujo no debe degradarse con el tiempo
+    import gc
+    from cpd_grafo import GrafoProyecto, NODOS_PROYECTO, NODOS_INCERTIDUMBRE
+    grafo = GrafoProyecto(NODOS_PROYECTO + NODOS_INCERTIDUMBRE, perezosos=[n for n, _, _ in NODOS_INCERTIDUMBRE])
+    lienzos = _LienzosKPI()
+    escenario, extra = dict(ESCENARIO_DEFECTO), {"WCR": WCR_DEFECTO, "CEF": CEF_DEFECTO}
+    grafo.calcular(escenario, **extra)
+    for n in lienzos.graficos: lienzos.redibujar(n, grafo.valor(n))
+
+    ventana = max(1, min(100, args.recalculos // 4))
+    redibujos, rss = [], []
+    for i in range(args.recalculos):
+        _aplicar_edicion(i, escenario, extra)
+        grafo.calcular(escenario, **extra)
+        t = time.perf_counter()
+        for n in lienzos.graficos: lienzos.redibujar(n, grafo.valor(n))
+        redibujos.append((time.perf_counter() - t) * 1000)
+        if i == ventana - 1 or i == args.recalculos - 1:
+            gc.collect()
+            rss.append(_rss_mb())       # tras calentar (cachés de fuentes, memo del grafo) y al final
+
+    import matplotlib.pyplot  # noqa: F401  (sólo para contar figuras vivas de pyplot: deben ser 0)
+    resumen = {
+        "recalculos": args.recalculos,
+        "rss_inicial_mb": round(rss[0], 1), "rss_final_mb": round(rss[-1], 1),
+        "crecimiento_rss_mb": round(rss[-1] - rss[0], 1),
+        "redibujo_p50_inicio_ms": round(float(np.median(redibujos[:ventana])), 2),
+        "redibujo_p50_final_ms": round(float(np.median(redibujos[-ventana:])), 2),
+        "figuras_pyplot": len(matplotlib.pyplot.get_fignums()),
+    }
+    deriva = resumen["redibujo_p50_final_ms"] / max(resumen["redibujo_p50_inicio_ms"], 1e-9)
+    ok = (resumen["crecimiento_rss_mb"] <= args.max_crecimiento_mb and deriva <= args.max_deriva
+          and resumen["figuras_pyplot"] == 0)
+    print(f"{args.recalculos} recálculos: RSS {resumen['rss_inicial_mb']} → {resumen['rss_final_mb']} MB "
+          f"({resumen['crecimiento_rss_mb']:+} MB), redibujo p50 {resumen['redibujo_p50_inicio_ms']} → "
+          f"{resumen['redibujo_p50_final_ms']} ms{'' if ok else '  FUGA O DEGRADACIÓN'}")
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(resumen) + "\n")
+    return 0 if ok else 1
+
+
+def cmd_medir_docx(args):
+    # Tiempo de exportación del proyecto por defecto con la tabla de presupuesto
+    # ampliada a N filas (repitiendo sus partidas); PNG de los gráficos ya en caché
+    import tempfile
+    import pandas as pd
+    from cpd_grafo import GrafoProyecto
+    from cpd_informe import HAS_DOCX, png_grafico_metricas, png_grafico_consumos, crear_documento_proyecto_word
+    if not HAS_DOCX:
+        raise SystemExit("Instala 'python-docx' para exportar.")
+    proyecto = GrafoProyecto().proyecto(dict(ESCENARIO_DEFECTO))
+    dfs, diseno, consumos = proyecto["dfs"], proyecto["diseno"], proyecto["consumos"]
+    metricas = calcular_metricas_sostenibilidad(diseno, WCR_DEFECTO, CEF_DEFECTO)
+    t = time.perf_counter()
+    pngs = png_grafico_consumos(consumos), png_grafico_metricas(metricas)
+    t_png = time.perf_counter() - t
+    resumen = {"png_primera_s": round(t_png, 3), "exportaciones": []}
+    print(f"Gráficos PNG: {t_png:.3f} s la primera vez, después desde caché")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.filas:
+            capex = pd.concat([dfs["capex"]] * (n // len(dfs["capex"]) + 1), ignore_index=True).iloc[:n]
+            ruta = os.path.join(tmp, f"informe_{n}.docx")
+            t = time.perf_counter()
+            crear_documento_proyecto_word(diseno, dfs["elec"], dfs["hvac"], dfs["hidro"], dfs["pci"], consumos,
+                                          capex, dfs["ratios"], *pngs, destino=ruta)
+            s = time.perf_counter() - t
+            r = {"filas": n, "s": round(s, 3), "filas_s": round(n / s), "mb": round(os.path.getsize(ruta) / 2**20, 2)}
+            resumen["exportaciones"].append(r)
+            print(f"{n:>7} filas: {r['s']:6.2f} s  ({r['filas_s']:,} filas/s, {r['mb']} MB)")
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(resumen) + "\n")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="cpd_cli", description="Ingeniería CPD - modo sin GUI")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("calcular", help="Calcula escenarios desde JSON/YAML/CSV")
+    p.add_argument("escenarios", help="Fichero de escenarios (.json, .yaml, .csv)")
+    p.add_argument("--json", help="Resultados detallados (JSON)")
+    p.add_argument("--csv", help="Resumen por escenario (CSV, motor vectorizado)")
+    p.add_argument("--docx", help="Proyecto ejecutivo Word (uno por escenario)")
+    p.add_argument("--traza", help="Tiempo, CPU y memoria por fase como JSON de Chrome trace (chrome://tracing, Perfetto)")
+    p.add_argument("--perfil", action="store_true", help="Con --traza, además cProfile (.prof) y tracemalloc (.memoria.txt)")
+    p.set_defaults(func=cmd_calcular)
+
+    p = sub.add_parser("lote", help="Un proyecto ejecutivo DOCX por escenario, en paralelo, con índice resumen")
+    p.add_argument("escenarios", help="Hoja de escenarios (.csv, .xlsx) o JSON/YAML con una lista")
+    p.add_argument("--salida", default="informes", help="Carpeta de los DOCX y del índice")
+    p.add_argument("--procesos", type=int, help="Procesos del pool (por defecto, todos los núcleos)")
+    p.set_defaults(func=cmd_lote)
+
+    p = sub.add_parser("medir-importacion", help="Comprueba el presupuesto de tiempo de importación del motor")
+    p.set_defaults(func=cmd_medir_importacion)
+
+    p = sub.add_parser("medir-en-vivo", help="Latencia de actualización del modo en vivo (what-if) por pestaña")
+    p.add_argument("--ediciones", type=int, default=50)
+    p.add_argument("--presupuesto-ms", type=float, default=PRESUPUESTO_EN_VIVO_MS)
+    p.add_argument("--json", help="Añadir el resumen como línea JSON")
+    p.set_defaults(func=cmd_medir_en_vivo)
+
+    p = sub.add_parser("medir-graficos", help="Memoria y tiempo de redibujo de las figuras KPI en N recálculos")
+    p.add_argument("--recalculos", type=int, default=1000)
+    p.add_argument("--max-crecimiento-mb", type=float, default=MAX_CRECIMIENTO_RSS_MB)
+    p.add_argument("--max-deriva", type=float, default=MAX_DERIVA_REDIBUJO, help="Máx. cociente p50 final/inicial")
+    p.add_argument("--json", help="Añadir el resumen como línea JSON")
+    p.set_defaults(func=cmd_medir_graficos)
+
+    p = sub.add_parser("medir-docx", help="Tiempo de exportación Word con tablas de N filas")
+    p.add_argument("--filas", type=int, nargs="+", default=[1000, 10000])
+    p.add_argument("--json", help="Añadir el resumen como línea JSON")
+    p.set_defaults(func=cmd_medir_docx)
+
+    p = sub.add_parser("medir-inventario", help="Filas/s del importador de inventarios sobre un export sintético")
+    p.add_argument("--filas", type=int, default=2_000_000)
+    p.add_argument("--bloque", type=int, nargs="+", default=[BLOQUE_FILAS_DEFECTO])
+    p.add_argument("--json", help="Añade el resumen como una línea JSON")
+    p.set_defaults(func=cmd_medir_inventario)
+
+    p = sub.add_parser("medir-precios", help="Valoración de N escenarios contra B libros de precios (matriz) frente a evaluar_lote")
+    p.add_argument("--escenarios", type=int, default=10_000)
+    p.add_argument("--libros", type=int, default=50)
+    p.add_argument("--referencia", type=int, default=3, help="Libros valorados también con evaluar_lote para comparar")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("--json", help="Añadir el resumen (JSON por línea)")
+    p.set_defaults(func=cmd_medir_precios)
+
+    p = sub.add_parser("medir-suite", help="Suite de rendimiento (motor, tablas, gráficos, DOCX, GUI) con historial y umbrales")
+    p.add_argument("--tamanos", nargs="+", default=["pequeno", "mediano", "enorme"], choices=["pequeno", "mediano", "enorme"])
+    p.add_argument("--caso", help="Sólo los casos cuyo nombre (tamaño/caso) contiene este texto")
+    p.add_argument("--sin-gui", action="store_true", help="No medir render_dataframe/render_kpi_tab (necesitan pantalla)")
+    p.add_argument("--historial", help="JSON por línea (por defecto, medidas/historial.jsonl): se compara con sus "
+                                       "ejecuciones de esta máquina y se añade esta")
+    p.add_argument("--umbrales", help="ms máximos por caso (por defecto, medidas/umbrales.json del repositorio)")
+    p.add_argument("--factor", type=float, default=1.5, help="Regresión frente a la mediana del historial")
+    p.add_argument("--sin-comparar", action="store_true", help="Sólo medir (no falla por regresiones)")
+    p.add_argument("--actualizar-umbrales", type=float, metavar="FACTOR",
+                   help="Reescribe los umbrales como FACTOR x la mediana de esta ejecución")
+    p.set_defaults(func=cmd_medir_suite)
+
+    p = sub.add_parser("medir-almacen", help="Alta, aciertos por huella y consultas indexadas del almacén de escenarios")
+    p.add_argument("--filas", type=int, default=300_000)
+    p.add_argument("--repeticiones", type=int, default=20)
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("--json", help="Añadir el resumen (JSON por línea)")
+    p.set_defaults(func=cmd_medir_almacen)
+
+    p = sub.add_parser("almacen", help="Almacén de escenarios calculados: guardar, consultar y mostrar por huella")
+    p.add_argument("accion", choices=["guardar", "consultar", "mostrar"])
+    p.add_argument("objetivo", nargs="?", help="Fichero de escenarios (guardar) o huella o prefijo (mostrar)")
+    p.add_argument("--ruta", help="Fichero SQLite (por defecto $CPD_ALMACEN o ~/.cache/cpd_almacen/escenarios.sqlite)")
+    p.add_argument("--filtro", nargs="*", default=[], help='Condiciones columna-operador-valor, p. ej. "PUE<1.4" redundancia_electrica=2N')
+    p.add_argument("--orden", help="Columna de orden (p. ej. CAPEX_por_kW)")
+    p.add_argument("--descendente", action="store_true")
+    p.add_argument("--limite", type=int, default=30)
+    p.add_argument("--csv", help="Resultado de la consulta (CSV)")
+    p.add_argument("--json", help="Parámetros del escenario mostrado (JSON, reutilizable con calcular)")
+    p.set_defaults(func=cmd_almacen)
+
+    p = sub.add_parser("precios", help="CAPEX de cada escenario con varios libros de precios versionados")
+    p.add_argument("escenarios")
+    p.add_argument("--libros", nargs="+", required=True, help="Ficheros de libros de precios (JSON/YAML/CSV)")
+    p.add_argument("--csv", help="Total y subtotales por categoría, una fila por escenario y libro")
+    p.set_defaults(func=cmd_precios)
+
+    p = sub.add_parser("montecarlo", help="Percentiles P10/P50/P90 del CAPEX por categoría")
+    p.add_argument("escenario", help="Escenario (JSON/YAML/CSV, se usa el primero)")
+    p.add_argument("--sorteos", type=int, default=1_000_000)
+    p.add_argument("--incertidumbre", type=float, default=0.15, help="±fracción triangular de los precios por defecto")
+    p.add_argument("--distribuciones", help="JSON con distribuciones por precio/factor")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("--csv")
+    p.set_defaults(func=cmd_montecarlo)
+
+    p = sub.add_parser("sensibilidad", help="Tornado: variación del CAPEX y la PUE con cada entrada y precio (±delta)")
+    p.add_argument("escenario", nargs="?", help="Escenario (JSON/YAML/CSV, se usa el primero); por defecto, ESCENARIO_DEFECTO")
+    p.add_argument("--delta", type=float, default=0.10, help="±fracción alrededor de cada valor numérico")
+    p.add_argument("--puntos", type=int, default=9, help="Puntos de la rejilla de cada entrada numérica")
+    p.add_argument("--sin-precios", action="store_true", help="Sólo entradas de diseño, sin los precios de PRECIOS_REF")
+    p.add_argument("--top", type=int, default=20, help="Filas mostradas (ordenadas por oscilación)")
+    p.add_argument("--csv", help="Tabla completa (CSV)")
+    p.set_defaults(func=cmd_sensibilidad)
+
+    p = sub.add_parser("anual", help="Simulación horaria anual (8760 h): kWh, PUE/WUE/CUE anuales y coste de energía")
+    p.add_argument("escenarios", help="Fichero de escenarios (.json, .yaml, .csv, .xlsx)")
+    p.add_argument("--clima", "--temperaturas", nargs="+", dest="clima",
+                   help="EPW o CSV horario (seca, y húmeda o HR) por emplazamiento; por defecto, clima sintético")
+    p.add_argument("--sin-cache", action="store_true", help="No leer ni escribir la caché binaria de clima")
+    p.add_argument("--utilizacion", help="CSV horario de utilización IT (0-1 o %%); por defecto, perfil sintético")
+    p.add_argument("--precio", type=float, default=PRECIO_ENERGIA_DEFECTO, help="€/kWh")
+    p.add_argument("--csv", help="Resultados por escenario (CSV)")
+    p.set_defaults(func=cmd_anual)
+
+    p = sub.add_parser("racks", help="Dimensionado por rack y cerramiento de un inventario heterogéneo")
+    origen = p.add_mutually_exclusive_group()
+    origen.add_argument("--escenario", help="Racks idénticos de un escenario (JSON/YAML/CSV, se usa el primero)")
+    origen.add_argument("--sintetico", type=int, help="Campus sintético de N racks (prueba de escala)")
+    origen.add_argument("--inventario", help="Export de activos CSV/Parquet, una fila por servidor (lectura por bloques)")
+    p.add_argument("--bloque", type=int, default=BLOQUE_FILAS_DEFECTO, help="Filas por bloque al leer --inventario")
+    p.add_argument("--columna", action="append", metavar="CLAVE=NOMBRE",
+                   help="Columna del export para rack, cerramiento, planta, P_max, P_idle, captura_dlc, alimentacion o cantidad")
+    p.add_argument("--escenario-equivalente", help="Escribe los parámetros de DisenadorV14 equivalentes (JSON)")
+    p.add_argument("--utilizacion", type=float, default=1.0, help="Carga de operación entre P_idle (0) y P_max (1)")
+    p.add_argument("--csv", help="Resultados por cerramiento (CSV)")
+    p.set_defaults(func=cmd_racks)
+
+    p = sub.add_parser("disponibilidad", help="Disponibilidad, minutos de corte/año y Tier de las topologías N/N+1/2N/2N+1")
+    p.add_argument("escenarios", nargs="?", help="Fichero de escenarios; por defecto, ESCENARIO_DEFECTO")
+    p.add_argument("--comparar", action="store_true",
+                   help="Todas las combinaciones de redundancia eléctrica x HVAC del primer escenario, con su sobrecoste")
+    p.add_argument("--anos", type=int, default=0, help="Años simulados por Monte Carlo (0: sólo Markov)")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("--csv")
+    p.set_defaults(func=cmd_disponibilidad)
+
+    p = sub.add_parser("hidraulica", help="Red hidráulica: pérdidas de carga, altura y potencia de bombeo por circuito")
+    p.add_argument("escenario", nargs="?", help="Escenario (JSON/YAML/CSV, se usa el primero); por defecto, ESCENARIO_DEFECTO")
+    p.add_argument("--cerramientos", type=int, help="Sustituye num_cerramientos (prueba de escala)")
+    p.add_argument("--cerramientos-dlc", type=int, help="Sustituye cerramientos_con_dlc")
+    p.add_argument("--plantas", type=int, help="Sustituye num_plantas")
+    p.add_argument("--csv", help="Caudal, velocidad y altura por tramo (CSV)")
+    p.set_defaults(func=cmd_hidraulica)
+
+    p = sub.add_parser("pareto", help="Frente de Pareto CAPEX / PUE / CUE / huella / indisponibilidad de un barrido")
+    p.add_argument("--base", help="Escenario base (JSON/YAML/CSV, se usa el primero); fija la potencia IT")
+    p.add_argument("--puntos", type=int, default=100_000, help="Escenarios del barrido")
+    p.add_argument("--objetivos", nargs="+", default=["CAPEX", "PUE", "Huella", "Indisponibilidad"],
+                   choices=["CAPEX", "PUE", "CUE", "Huella", "Indisponibilidad"])
+    p.add_argument("--cef", type=float, default=0.35, help="Factor de emisión (kgCO2/kWh) para la CUE")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("--filas", type=int, default=30, help="Filas del frente mostradas (ordenadas por CAPEX)")
+    p.add_argument("--csv", help="Frente completo con variables de diseño (CSV)")
+    p.set_defaults(func=cmd_pareto)
+
+    p = sub.add_parser("optimizar", help="Busca el diseño de mínimo CAPEX con restricciones de PUE/densidad/trafo")
+    p.add_argument("--base", help="Escenario base (JSON/YAML/CSV, se usa el primero)")
+    p.add_argument("--pue-max", type=float)
+    p.add_argument("--densidad-max", type=float, help="kW IT por m² de sala IT")
+    p.add_argument("--trafo-max", type=float, help="kVA máximos por transformador")
+    p.add_argument("--racks-objetivo", type=int, help="Racks a mantener al variar racks/cerramiento (por defecto, los del escenario base; 0: libre)")
+    p.add_argument("--poblacion", type=int, default=2000)
+    p.add_argument("--generaciones", type=int, default=40)
+    p.add_argument("--paciencia", type=int, default=6, help="Generaciones sin mejora antes de parar")
+    p.add_argument("--procesos", type=int, help="Procesos del pool (por defecto, todos los núcleos)")
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("--checkpoint", help="Fichero de estado; si existe se reanuda desde él")
+    p.add_argument("--tiempo-max", type=float, help="Límite de tiempo (s)")
+    p.add_argument("--json", help="Guardar mejor diseño e historial")
+    p.set_defaults(func=cmd_optimizar)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# ==============================================================================
+# DATOS CLIMÁTICOS HORARIOS (EPW / CSV) CON CACHÉ BINARIA
+# ==============================================================================
+# Un fichero de clima se lee una vez: temperatura seca y húmeda (8760 h) se guardan
+# como un .npy float32 en la caché y las siguientes lecturas lo abren mapeado en
+# memoria (np.load mmap_mode="r"), sin volver a interpretar texto. La clave de la
+# caché incluye ruta, tamaño y fecha de modificación: si el fichero cambia, se relee.
+import hashlib
+import os
+
+import numpy as np
+
+from cpd_anual import HORAS_ANO, serie_8760
+
+VERSION_CACHE_CLIMA = 2           # 2: columna seca sin índices horarios y rango comprobado
+HUMEDAD_RELATIVA_DEFECTO = 60.0    # % para estimar la húmeda si el fichero sólo trae la seca
+RANGO_TEMPERATURA = (-60.0, 60.0)  # °C plausibles; fuera de él, la columna no es una temperatura
+
+# Columnas reconocidas en CSV (minúsculas)
+COLUMNAS_SECA = ("t_seca", "t_exterior", "dry_bulb", "temp_air", "temperatura", "temp_c", "temp", "t")
+COLUMNAS_HUMEDA = ("t_humeda", "wet_bulb", "temp_wet")
+COLUMNAS_HR = ("hr", "rh", "relative_humidity", "humedad")
+
+# EPW: 8 líneas de cabecera; columnas 6 (seca, °C) y 8 (HR, %); 99.9 / 999 = sin dato
+_EPW_CABECERA = 8
+_EPW_SECA, _EPW_HR = 6, 8
+
+
+def directorio_cache_clima():
+    return os.environ.get("CPD_CACHE_CLIMA") or os.path.join(os.path.expanduser("~"), ".cache", "cpd_clima")
+
+
+def temperatura_humeda(T_seca, HR):
+    # Stull (2011): bulbo húmedo a partir de seca (°C) y humedad relativa (%), ±0.3 K en 5-99 % HR
+    HR = np.clip(HR, 1.0, 100.0)
+    Tw = (T_seca * np.arctan(0.151977 * np.sqrt(HR + 8.313659)) + np.arctan(T_seca + HR) - np.arctan(HR - 1.676331)
+          + 0.00391838 * HR ** 1.5 * np.arctan(0.023101 * HR) - 4.686035)
+    return np.minimum(Tw, T_seca)
+
+
+def _comprobar_rango(T, origen):
+    bajo, alto = RANGO_TEMPERATURA
+    if T.min() < bajo or T.max() > alto:
+        raise ValueError(f"{origen}: temperaturas fuera de {bajo:g}…{alto:g} °C "
+                         f"(mín {T.min():.1f}, máx {T.max():.1f}); ¿es la columna correcta?")
+    return T
+
+
+def _es_indice(columna):
+    # Hora, día o nº de fila: enteros estrictamente crecientes, no una temperatura
+    v = columna.to_numpy(dtype=float)
+    return len(v) > 1 and bool(np.all(np.diff(v) > 0)) and bool(np.all(v == np.round(v)))
+
+
+def _leer_epw(ruta):
+    import pandas as pd
+    df = pd.read_csv(ruta, skiprows=_EPW_CABECERA, header=None, usecols=[_EPW_SECA, _EPW_HR])
+    seca = df[_EPW_SECA].to_numpy(dtype=float); hr = df[_EPW_HR].to_numpy(dtype=float)
+    seca = _comprobar_rango(serie_8760(np.where(seca >= 99.9, np.nan, seca), f"{ruta} (temperatura seca)"),
+                            f"{ruta} (temperatura seca)")
+    hr = serie_8760(np.where(hr >= 999, np.nan, hr), f"{ruta} (humedad relativa)")
+    return seca, temperatura_humeda(seca, hr)
+
+
+def _leer_csv(ruta):
+    import pandas as pd
+    df = pd.read_csv(ruta)
+    nombres = {str(c).strip().lower(): c for c in df.columns}
+    buscar = lambda opciones: next((nombres[o] for o in opciones if o in nombres), None)
+    col_seca, col_humeda, col_hr = buscar(COLUMNAS_SECA), buscar(COLUMNAS_HUMEDA), buscar(COLUMNAS_HR)
+    if col_seca is None:
+        # Sin nombre reconocido: la última columna numérica que no sea un índice horario
+        # (como cargar_serie_horaria); "hora,temp_c" no debe leer la hora como °C
+        numericas = [c for c in df.select_dtypes("number").columns if not _es_indice(df[c])]
+        if not numericas: raise ValueError(f"{ruta}: no se encuentra la temperatura seca")
+        col_seca = numericas[-1]
+    seca = _comprobar_rango(serie_8760(df[col_seca], f"{ruta} ({col_seca})"), f"{ruta} ({col_seca})")
+    if col_humeda is not None:
+        humeda = _comprobar_rango(serie_8760(df[col_humeda], f"{ruta} ({col_humeda})"), f"{ruta} ({col_humeda})")
+        return seca, np.minimum(humeda, seca)
+    hr = serie_8760(df[col_hr], f"{ruta} ({col_hr})") if col_hr is not None else HUMEDAD_RELATIVA_DEFECTO
+    return seca, temperatura_humeda(seca, hr)
+
+
+def _ruta_cache(ruta, directorio):
+    info = os.stat(ruta)
+    clave = f"{os.path.abspath(ruta)}|{info.st_size}|{info.st_mtime_ns}|{VERSION_CACHE_CLIMA}"
+    return os.path.join(directorio, hashlib.sha1(clave.encode()).hexdigest() + ".npy")
+
+
+def cargar_clima(ruta, cache=True):
+    """Clima horario de un EPW o CSV: {"T_seca", "T_humeda"} (°C, 8760 valores, float32).
+
+    Con cache=True (o un directorio) la primera lectura deja un .npy en la caché y las
+    siguientes lo abren mapeado en memoria.
+    """
+    directorio = (cache if isinstance(cache, str) else directorio_cache_clima()) if cache else None
+    destino = _ruta_cache(ruta, directorio) if directorio else None
+    if destino and os.path.exists(destino):
+        datos = np.load(destino, mmap_mode="r")
+    else:
+        leer = _leer_epw if ruta.lower().endswith(".epw") else _leer_csv
+        datos = np.asarray(leer(ruta), dtype=np.float32)
+        if destino:
+            # Fichero temporal + renombrado: lecturas concurrentes nunca ven un .npy a medias
+            os.makedirs(directorio, exist_ok=True)
+            tmp = f"{destino}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, datos)
+            os.replace(tmp, destino)
+            datos = np.load(destino, mmap_mode="r")
+    if datos.shape != (2, HORAS_ANO):
+        raise ValueError(f"{ruta}: caché de clima con forma inesperada {datos.shape}")
+    return {"T_seca": datos[0], "T_humeda": datos[1]}
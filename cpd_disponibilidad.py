@@ -0,0 +1,323 @@
+# ==============================================================================
+# DISPONIBILIDAD DE LAS TOPOLOGÍAS N / N+1 / 2N / 2N+1 (MARKOV Y MONTE CARLO)
+# ==============================================================================
+# _get_factor_redundancia sólo sobredimensiona; aquí cada diseño se traduce a grupos
+# de componentes (celdas MT, trafos, grupos electrógenos, módulos SAI, CGBT,
+# blindobarras, enfriadoras, CRAH, bombas, CDU) con MTBF/MTTR, y se calcula:
+#   - Markov: cada unidad es un proceso de dos estados (servicio/reparación)
+#     independiente; la disponibilidad en régimen sale de distribuciones binomiales
+#     del nº de unidades en servicio por grupo, y la frecuencia de cortes de la
+#     importancia de Birnbaum de cada grupo.
+#   - Monte Carlo: años simulados con fallos de Poisson y reparaciones exponenciales.
+#     Todos los fallos de un bloque de años se ordenan en una sola línea de tiempo y
+#     una suma acumulada da las unidades caídas por grupo en cada tramo; sin bucles
+#     por año ni por evento.
+# Un corte es cualquier pérdida de carga IT: una CDU sin reserva deja sin refrigeración
+# su cerramiento y cuenta como corte.
+import numpy as np
+
+from cpd_motor import ESCENARIO_DEFECTO, PARAMETROS_DISENO, _columnas_lote, evaluar_lote
+
+HORAS_ANO = 8760.0
+
+# MTBF / MTTR (h), órdenes de magnitud de IEEE 493 (Gold Book)
+COMPONENTES_FIABILIDAD = {
+    "Red eléctrica": (4_380.0, 1.5),
+    "Grupo electrógeno": (20_000.0, 18.0),
+    "Celda MT": (500_000.0, 10.0),
+    "Transformador": (1_000_000.0, 200.0),
+    "Módulo SAI": (100_000.0, 6.0),
+    "CGBT": (400_000.0, 8.0),
+    "Blindobarra": (1_000_000.0, 10.0),
+    "Enfriadora": (20_000.0, 24.0),
+    "CRAH/InRow": (40_000.0, 8.0),
+    "Bomba": (50_000.0, 12.0),
+    "CDU": (50_000.0, 8.0),
+}
+
+POTENCIA_MODULO_SAI_KW = 250.0
+POTENCIA_GRUPO_KVA = 2000.0
+CAPACIDAD_CRAH_KW = 100.0           # como n_equipos_hvac del presupuesto
+# Elementos en serie de cada lado (A/B) de la distribución eléctrica
+INFRA_LADO = (("celda", "Celda MT"), ("trafo", "Transformador"), ("cgbt", "CGBT"), ("blindobarra", "Blindobarra"))
+GRUPOS_FRIO = ("enfriadoras", "crah", "bombas", "cdu")
+
+# Disponibilidad mínima por Tier (Uptime Institute / TIA-942)
+UMBRALES_TIER = ((4, 0.99995), (3, 0.99982), (2, 0.99741), (1, 0.99671))
+
+_ESCALA_ANO = 1.0e6                 # separación (h) entre años en la línea de tiempo del Monte Carlo
+
+
+# --- Topología ---
+def _topologia_lote(c, r):
+    # Grupos {nombre: (componente, instaladas, necesarias)} con arrays por diseño; los grupos de
+    # los lados 0 y 1 siempre están (el lado 1 con 0 unidades si sólo hay un lado).
+    # Lo instalado sigue las cantidades del presupuesto (factor_N sobre la carga); lo necesario, la carga.
+    # Los módulos SAI se reparten entre lados y cuentan juntos (cargas de doble alimentación).
+    ceil = lambda x: np.ceil(np.asarray(x, dtype=float) - 1e-9).astype(np.int64)
+    lados = r["Num_Lados"].astype(np.int64)
+    f_elec, f_hvac = r["factor_N_elec"], r["factor_N_hvac"]
+    k_sai = np.maximum(1, ceil(r["P_total_demandada"] / 1000 / POTENCIA_MODULO_SAI_KW))
+    m_sai = np.maximum(k_sai, ceil(k_sai * f_elec))
+    k_ge = np.maximum(1, ceil(r["S_Total_N_kVA"] / POTENCIA_GRUPO_KVA))
+    unidad = r["Capacidad_Unit"]
+    k_enf = np.maximum(1, ceil(r["Q_Diseno_kW"] / unidad))
+    k_crah = np.maximum(1, ceil(r["Q_Diseno_kW"] / CAPACIDAD_CRAH_KW))
+    m_bombas = r["Bombas_HVAC"].astype(np.int64)
+    n_dlc = np.asarray(c["cerramientos_con_dlc"]).astype(np.int64)
+    uno = np.ones_like(lados)
+    grupos = {"red": ("Red eléctrica", uno, uno),
+              "grupos": ("Grupo electrógeno", np.maximum(k_ge, ceil(k_ge * f_elec)), k_ge)}
+    for p in range(2):
+        presente = (p < lados).astype(np.int64)
+        grupos.update({f"{n}_{p}": (comp, presente, presente) for n, comp in INFRA_LADO})
+        grupos[f"sai_{p}"] = ("Módulo SAI", (m_sai // lados + (p < m_sai % lados)) * presente, k_sai)
+    grupos.update({
+        "enfriadoras": ("Enfriadora", np.maximum(k_enf, ceil(r["Q_Instalada_kW"] / unidad)), k_enf),
+        "crah": ("CRAH/InRow", np.maximum(k_crah, ceil(r["Q_Instalada_kW"] / CAPACIDAD_CRAH_KW)), k_crah),
+        # Las bombas instaladas ya incluyen la reserva de factor_N_hvac
+        "bombas": ("Bomba", m_bombas, np.maximum(1, np.minimum(m_bombas, (m_bombas / f_hvac + 1e-9).astype(np.int64)))),
+        "cdu": ("CDU", n_dlc, n_dlc),
+    })
+    return {"lados": lados, "k_sai": k_sai, "grupos": grupos}
+
+
+def _topologia(c, r, i):
+    # Topología del diseño i de un lote (enteros de Python; sin los grupos de un lado inexistente)
+    t = _topologia_lote(c, r)
+    lados = int(t["lados"][i])
+    grupos = {n: (comp, int(m[i]), int(k[i])) for n, (comp, m, k) in t["grupos"].items()
+              if not (n[-2:] == "_1" and lados < 2)}
+    return {"lados": lados, "k_sai": int(t["k_sai"][i]), "grupos": grupos}
+
+
+def tier_topologia(c, r):
+    # Tier máximo que permite la topología (independiente de la disponibilidad calculada)
+    f_elec, f_hvac = r["factor_N_elec"], r["factor_N_hvac"]
+    return np.select([(r["Num_Lados"] == 2) & (f_elec >= 2) & (f_hvac > 1), (f_elec > 1) & (f_hvac > 1),
+                      (f_elec > 1) | (f_hvac > 1)], [4, 3, 2], 1)
+
+
+def tier_disponibilidad(A):
+    # Tier cuyo umbral alcanza la disponibilidad (0: por debajo de Tier I)
+    A = np.asarray(A, dtype=float)
+    return np.select([A >= u for _, u in UMBRALES_TIER], [t for t, _ in UMBRALES_TIER], 0)
+
+
+# --- Markov (régimen permanente) ---
+def _pmf_en_servicio(m, A, forzada=None):
+    # Distribución del nº de unidades en servicio de m iguales; forzada: una unidad "arriba"/"abajo"
+    n = m - (forzada is not None)
+    j = np.arange(n + 1)
+    log_fact = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, n + 1)))])
+    with np.errstate(divide="ignore"):
+        pmf = np.exp(log_fact[n] - log_fact[j] - log_fact[n - j] + j * np.log(A) + (n - j) * np.log1p(-A))
+    if forzada == "arriba": return np.concatenate([[0.0], pmf])
+    if forzada == "abajo": return np.concatenate([pmf, [0.0]])
+    return pmf
+
+
+def _disponibilidad_sistema(top, pmf):
+    g = top["grupos"]
+    ok = lambda nombre: pmf[nombre][g[nombre][2]:].sum()
+    A = 1 - pmf["red"][0] * (1 - ok("grupos"))
+    # Capacidad SAI: módulos en servicio de los lados con su infraestructura en servicio
+    dist = np.ones(1)
+    for p in range(top["lados"]):
+        infra = np.prod([pmf[f"{n}_{p}"][1] for n, _ in INFRA_LADO])
+        x = pmf[f"sai_{p}"] * infra; x[0] += 1 - infra
+        dist = np.convolve(dist, x)
+    A *= dist[top["k_sai"]:].sum()
+    for nombre in GRUPOS_FRIO:
+        A *= ok(nombre)
+    return A
+
+
+def disponibilidad_markov(top, componentes=None):
+    """Disponibilidad, indisponibilidad (min/año), cortes/año y duración media del corte (h)
+    de una topología, con unidades independientes reparadas en paralelo."""
+    componentes = COMPONENTES_FIABILIDAD if componentes is None else componentes
+    A_unidad = {n: mtbf / (mtbf + mttr) for n, (mtbf, mttr) in componentes.items()}
+    pmf = {n: _pmf_en_servicio(m, A_unidad[comp]) for n, (comp, m, _) in top["grupos"].items()}
+    A = _disponibilidad_sistema(top, pmf)
+    # Frecuencia de fallo del sistema: sum(m x A_u x lambda x Birnbaum) por grupo
+    frecuencia_h = 0.0
+    for nombre, (comp, m, _) in top["grupos"].items():
+        if not m: continue
+        I = (_disponibilidad_sistema(top, {**pmf, nombre: _pmf_en_servicio(m, A_unidad[comp], "arriba")})
+             - _disponibilidad_sistema(top, {**pmf, nombre: _pmf_en_servicio(m, A_unidad[comp], "abajo")}))
+        frecuencia_h += m * A_unidad[comp] / componentes[comp][0] * I
+    U = 1 - A
+    return {"Disponibilidad": A, "Indisponibilidad_min_ano": U * HORAS_ANO * 60, "Cortes_ano": frecuencia_h * HORAS_ANO,
+            "Duracion_corte_h": U / frecuencia_h if frecuencia_h > 0 else 0.0}
+
+
+def _cola_fallos(m, reserva, A, max_fallos=40):
+    # P(fallos <= reserva) con m unidades de disponibilidad A (arrays); reserva < 0 -> 0.
+    # Se suman como mucho max_fallos términos: con q·m << max_fallos el resto es despreciable.
+    m = np.asarray(m, dtype=np.int64); reserva = np.asarray(reserva, dtype=np.int64)
+    f = np.arange(max_fallos + 1)
+    log_fact = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, max(int(m.max(initial=0)), max_fallos) + 1)))])
+    resto = m[:, None] - f
+    logp = (log_fact[m][:, None] - log_fact[f] - log_fact[np.maximum(resto, 0)]
+            + f * np.log1p(-A) + resto * np.log(A))
+    p = np.where((resto >= 0) & (f <= reserva[:, None]), np.exp(logp), 0.0)
+    return np.where(reserva >= 0, p.sum(axis=1), 0.0)
+
+
+def disponibilidad_lote(escenarios, componentes=None, precios=None):
+    """Disponibilidad de Markov vectorizada para un lote (sin frecuencia ni Monte Carlo).
+
+    Igual que disponibilidad_markov diseño a diseño; para barridos grandes (p. ej. el
+    frente de Pareto). Devuelve {"Disponibilidad", "Indisponibilidad_min_ano"} (arrays).
+    """
+    componentes = COMPONENTES_FIABILIDAD if componentes is None else componentes
+    c = _columnas_lote(escenarios)
+    r = evaluar_lote(c, precios=precios, estricto=False)
+    return _disponibilidad_vectorizada(c, r, componentes)
+
+
+def _disponibilidad_vectorizada(c, r, componentes=None):
+    componentes = COMPONENTES_FIABILIDAD if componentes is None else componentes
+    t = _topologia_lote(c, r)
+    g = t["grupos"]
+    A_u = lambda comp: componentes[comp][0] / (componentes[comp][0] + componentes[comp][1])
+    ok = lambda n: _cola_fallos(g[n][1], g[n][1] - g[n][2], A_u(g[n][0]))
+    A = 1 - (1 - A_u("Red eléctrica")) * (1 - ok("grupos"))
+    # SAI: con los dos lados en servicio los módulos se suman (misma A: binomial conjunta)
+    infra = [np.prod([np.where(g[f"{n}_{p}"][1] > 0, A_u(comp), 0.0) for n, comp in INFRA_LADO], axis=0) for p in range(2)]
+    m0, m1, k = g["sai_0"][1], g["sai_1"][1], t["k_sai"]
+    A_sai = A_u("Módulo SAI")
+    A *= (infra[0] * infra[1] * _cola_fallos(m0 + m1, m0 + m1 - k, A_sai)
+          + infra[0] * (1 - infra[1]) * _cola_fallos(m0, m0 - k, A_sai)
+          + (1 - infra[0]) * infra[1] * _cola_fallos(m1, m1 - k, A_sai))
+    for n in GRUPOS_FRIO:
+        A *= ok(n)
+    return {"Disponibilidad": A, "Indisponibilidad_min_ano": (1 - A) * HORAS_ANO * 60}
+
+
+# --- Monte Carlo ---
+def _en_servicio_ok(top, en_servicio):
+    # en_servicio: {grupo: array de unidades en servicio por tramo} -> tramos con la carga servida
+    g = top["grupos"]
+    ok = lambda nombre: en_servicio.get(nombre, 0) >= g[nombre][2]      # grupos sin unidades: no simulados
+    servido = (en_servicio["red"] >= 1) | ok("grupos")
+    capacidad = 0
+    for p in range(top["lados"]):
+        infra = np.logical_and.reduce([en_servicio[f"{n}_{p}"] >= 1 for n, _ in INFRA_LADO])
+        capacidad = capacidad + np.where(infra, en_servicio[f"sai_{p}"], 0)
+    servido &= capacidad >= top["k_sai"]
+    for nombre in GRUPOS_FRIO:
+        servido &= ok(nombre)
+    return servido
+
+
+def simular_disponibilidad(top, anos=1_000_000, semilla=0, componentes=None, bloque=100_000):
+    """Monte Carlo de `anos` años: fallos de Poisson (tasa 1/MTBF por unidad), inicio
+    uniforme en el año y reparación exponencial (MTTR). Devuelve indisponibilidad (min)
+    y nº de cortes por año simulado, como arrays."""
+    componentes = COMPONENTES_FIABILIDAD if componentes is None else componentes
+    rng = np.random.default_rng(semilla)
+    nombres = [n for n, (_, m, _) in top["grupos"].items() if m]
+    G = len(nombres)
+    m = np.array([top["grupos"][n][1] for n in nombres])
+    tasa = np.array([top["grupos"][n][1] * HORAS_ANO / componentes[top["grupos"][n][0]][0] for n in nombres])
+    mttr = np.array([componentes[top["grupos"][n][0]][1] for n in nombres])
+    # Grupos cuyo fallo de una sola unidad (con el resto en servicio) corta la carga
+    completo = {n: np.array([top["grupos"][n][1]]) for n in nombres}
+    critico = np.array([not _en_servicio_ok(top, {**completo, n: completo[n] - 1})[0] for n in nombres], dtype=bool)
+    primera_unidad = np.concatenate([[0], np.cumsum(m)[:-1]])
+    caida_h = np.zeros(anos); cortes = np.zeros(anos, dtype=np.int64)
+    for ini in range(0, anos, bloque):
+        b = min(bloque, anos - ini)
+        n_fallos = rng.poisson(tasa, size=(b, G))
+        celda = np.repeat(np.arange(b * G), n_fallos.ravel())
+        ano, grupo = celda // G, celda % G
+        inicio = ano * _ESCALA_ANO + rng.uniform(0.0, HORAS_ANO, len(celda))
+        fin = inicio + rng.exponential(mttr[grupo])
+        # Sólo importan los fallos solapados con otros o de grupos críticos: agrupación por
+        # solape (inicio posterior a todos los finales previos = nueva agrupación)
+        orden = np.argsort(inicio, kind="stable")
+        inicio, fin, grupo = inicio[orden], fin[orden], grupo[orden]
+        fin_previo = np.concatenate([[-np.inf], np.maximum.accumulate(fin)[:-1]])
+        agrupacion = np.cumsum(inicio > fin_previo)
+        solapado = np.bincount(agrupacion)[agrupacion] > 1
+        util = solapado | critico[grupo]
+        inicio, fin, grupo = inicio[util], fin[util], grupo[util]
+        # Cada fallo cae en una unidad del grupo; una unidad en reparación no vuelve a fallar
+        unidad = primera_unidad[grupo] + (rng.random(len(inicio)) * m[grupo]).astype(np.int64)
+        orden = np.lexsort((inicio, unidad))
+        en_reparacion = np.zeros(len(inicio), dtype=bool)
+        en_reparacion[orden[1:]] = (unidad[orden[1:]] == unidad[orden[:-1]]) & (inicio[orden[1:]] < fin[orden[:-1]])
+        inicio, fin, grupo = inicio[~en_reparacion], fin[~en_reparacion], grupo[~en_reparacion]
+        # Línea de tiempo: +1 unidad caída al fallar, -1 al reparar; tras el último evento de un
+        # año todas las unidades vuelven a servicio, así que la suma acumulada no cruza de año
+        t = np.concatenate([inicio, fin])
+        orden = np.argsort(t, kind="stable")
+        t = t[orden]
+        g = np.concatenate([grupo, grupo])[orden]
+        paso = np.zeros((len(t), G), dtype=np.int16)
+        paso[np.arange(len(t)), g] = np.where(orden < len(inicio), 1, -1)
+        caidas = np.cumsum(paso, axis=0, dtype=np.int16)
+        servido = _en_servicio_ok(top, {n: np.maximum(m[j] - caidas[:, j], 0) for j, n in enumerate(nombres)})
+        duracion = np.diff(t, append=t[-1] if len(t) else 0.0)
+        ano_t = (t // _ESCALA_ANO).astype(np.int64)
+        caida_h[ini:ini + b] += np.bincount(ano_t, weights=np.where(servido, 0.0, duracion), minlength=b)
+        corte = ~servido & np.concatenate([[True], servido[:-1]])
+        cortes[ini:ini + b] += np.bincount(ano_t[corte], minlength=b)
+    return {"Indisponibilidad_min": caida_h * 60, "Cortes": cortes}
+
+
+# --- Lotes de diseños ---
+def evaluar_disponibilidad(escenarios, anos=0, semilla=0, componentes=None, precios=None):
+    """Disponibilidad de un lote de escenarios (DataFrame o dict de columnas, como evaluar_lote).
+
+    Devuelve un dict de arrays: Markov siempre y, con anos > 0, Monte Carlo (media y P90
+    de minutos de corte por año, fracción de años con algún corte), Tier por
+    disponibilidad y por topología (el menor de ambos) y el CAPEX_Total del lote.
+    """
+    r = evaluar_lote(escenarios, precios=precios)
+    c = _columnas_lote(escenarios)
+    S = r["P_IT_demandada"].shape[0]
+    claves = ("Disponibilidad", "Indisponibilidad_min_ano", "Cortes_ano", "Duracion_corte_h")
+    res = {k: np.zeros(S) for k in claves}
+    if anos:
+        res.update({k: np.zeros(S) for k in ("Indisponibilidad_MC_min_ano", "P90_MC_min_ano", "Cortes_MC_ano", "Anos_con_corte")})
+    for i in range(S):
+        top = _topologia(c, r, i)
+        for k, v in disponibilidad_markov(top, componentes).items():
+            res[k][i] = v
+        if anos:
+            mc = simular_disponibilidad(top, anos, semilla, componentes)
+            res["Indisponibilidad_MC_min_ano"][i] = mc["Indisponibilidad_min"].mean()
+            res["P90_MC_min_ano"][i] = np.percentile(mc["Indisponibilidad_min"], 90)
+            res["Cortes_MC_ano"][i] = mc["Cortes"].mean()
+            res["Anos_con_corte"][i] = (mc["Cortes"] > 0).mean()
+    res["Tier_disponibilidad"] = tier_disponibilidad(res["Disponibilidad"])
+    res["Tier_topologia"] = tier_topologia(c, r)
+    res["Tier"] = np.minimum(res["Tier_disponibilidad"], res["Tier_topologia"])
+    res["CAPEX_Total"] = r["CAPEX_Total"]
+    return res
+
+
+def comparar_redundancias(escenario, redundancias_elec=("N", "N+1", "2N", "2N+1"), redundancias_hvac=("N", "N+1", "2N"),
+                          anos=0, semilla=0, componentes=None):
+    """Coste de cada combinación de redundancias frente a la disponibilidad que aporta.
+
+    DataFrame con CAPEX, disponibilidad, minutos de corte/año y Tier por combinación;
+    el sobrecoste y los minutos evitados se miden contra la combinación más barata.
+    """
+    import pandas as pd
+    e = {**ESCENARIO_DEFECTO, **{k: v for k, v in escenario.items() if k in PARAMETROS_DISENO}}
+    combinaciones = [(a, b) for a in redundancias_elec for b in redundancias_hvac]
+    lote = {k: [e[k]] * len(combinaciones) for k in PARAMETROS_DISENO}
+    lote["redundancia_electrica"] = [a for a, _ in combinaciones]
+    lote["redundancia_hvac"] = [b for _, b in combinaciones]
+    res = evaluar_disponibilidad(lote, anos, semilla, componentes)
+    df = pd.DataFrame({"Eléctrica": lote["redundancia_electrica"], "HVAC": lote["redundancia_hvac"], **res})
+    base = df["CAPEX_Total"].idxmin()
+    df["Sobrecoste"] = df["CAPEX_Total"] - df.loc[base, "CAPEX_Total"]
+    df["Minutos_evitados_ano"] = df.loc[base, "Indisponibilidad_min_ano"] - df["Indisponibilidad_min_ano"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df["Coste_por_minuto_evitado"] = np.where(df["Minutos_evitados_ano"] > 0, df["Sobrecoste"] / df["Minutos_evitados_ano"], np.nan)
+    return df.sort_values("CAPEX_Total", ignore_index=True)
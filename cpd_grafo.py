@@ -0,0 +1,204 @@
+# ==============================================================================
+# GRAFO DE CÁLCULO INCREMENTAL (NODOS MEMORIZADOS)
+# ==============================================================================
+# El proyecto completo (cargas -> eléctrico -> HVAC -> DLC -> CAPEX -> KPIs ->
+# tablas -> datos de los gráficos) se modela como nodos en orden topológico. Cada
+# nodo declara su clave: los valores que realmente lee (atributos del diseño,
+# parámetros y claves de los nodos de los que depende). Si la clave no cambia, se
+# reutiliza el resultado memorizado; así, cambiar p.ej. WCR sólo recalcula las
+# métricas del gráfico de KPIs. Las figuras no se memorizan: la GUI conserva las
+# suyas y las actualiza con "metricas" y "consumos".
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+from cpd_motor import (ESCENARIO_DEFECTO, PARAMETROS_DISENO, DisenadorV14, generar_tabla_ratios, generar_tabla_electrico,
+                       generar_tabla_hvac_limpia, generar_tabla_hidraulica_unificada, generar_tabla_pci,
+                       generar_tabla_control, calcular_metricas_sostenibilidad)
+from cpd_trazas import categoria_nodo
+
+TAMANO_CACHE_NODO = 16
+
+# Atributos de DisenadorV14 que lee cada método (mantener sincronizado con cpd_motor)
+_ATTRS_TUBERIAS = ("area_por_planta", "altura_planta", "num_plantas", "modelo_hidraulico")
+_ATTRS_ELEC = ("P_total_demandada", "Suministro_AB", "factor_N_elec", "servidores_por_rack", "P_max_servidor")
+_ATTRS_HVAC = ("P_IT_demandada", "cerramientos_con_dlc", "num_cerramientos", "Eficiencia_Captura_DLC",
+               "tipo_cerramiento", "factor_N_hvac") + _ATTRS_TUBERIAS
+_ATTRS_DLC = ("P_IT_demandada", "cerramientos_con_dlc", "num_cerramientos", "Eficiencia_Captura_DLC",
+              "factor_N_hvac") + _ATTRS_TUBERIAS
+_ATTRS_CONSUMOS = ("P_IT_demandada", "P_HVAC_demandada", "P_DLC_demandada", "P_iluminacion", "P_Control_calc",
+                   "P_otras_fuerza", "P_PCI_calc")
+_ATTRS_KPIS = ("area_sala_it", "area_total_construida", "P_IT_demandada", "num_racks_total")
+_ATTRS_CAPEX = ("area_por_planta", "num_plantas", "altura_planta", "area_total_construida", "area_sala_it",
+                "num_cerramientos", "num_racks_total", "factor_N_elec", "P_total_demandada", "cerramientos_con_dlc",
+                "racks_por_cerramiento", "tecnologia_pci", "N_servidores_total", "cctv_unidades", "control_accesos_pax",
+                "modelo_hidraulico")
+_ATTRS_TABLA_ELEC = ("num_cerramientos", "Distribucion_IT_tipo", "N_servidores_total", "servidores_por_rack", "P_IT_demandada")
+_ATTRS_TABLA_HVAC = ("prodfrio_tec", "intcalor_tec", "distribfrio_tec", "R_hvac")
+_ATTRS_TABLA_PCI = ("centralitas_incendios", "P_PCI_calc", "tecnologia_pci", "grupos_bombeo_pci", "cctv_unidades",
+                    "P_Control_calc", "control_accesos_pax")
+_ATTRS_METRICAS = ("P_IT_demandada", "P_total_demandada", "P_HVAC_demandada")
+
+
+def _attrs(ctx, nombres):
+    d = ctx["diseno"]
+    return tuple(getattr(d, n) for n in nombres)
+
+
+def _tabla_pci(ctx):
+    import pandas as pd
+    return pd.concat([generar_tabla_pci(ctx["diseno"]), generar_tabla_control(ctx["diseno"])])
+
+
+def _incertidumbre_capex(ctx):
+    from cpd_montecarlo import simular_capex
+    return simular_capex(ctx["escenario"], n=ctx.get("sorteos_mc", 20_000))
+
+
+# (nombre, clave(ctx, claves), cálculo(ctx)); `claves` son las claves ya resueltas de los nodos previos
+NODOS_PROYECTO = [
+    ("diseno", lambda ctx, k: tuple(ctx["escenario"][p] for p in PARAMETROS_DISENO),
+     lambda ctx: DisenadorV14(**ctx["escenario"])),
+    ("res_elec", lambda ctx, k: _attrs(ctx, _ATTRS_ELEC),
+     lambda ctx: ctx["diseno"].dimensionar_sistema_electrico()),
+    ("res_hvac", lambda ctx, k: _attrs(ctx, _ATTRS_HVAC),
+     lambda ctx: ctx["diseno"].dimensionar_sistema_hvac_completo()),
+    ("res_dlc", lambda ctx, k: _attrs(ctx, _ATTRS_DLC),
+     lambda ctx: ctx["diseno"].dimensionar_dlc_hidraulica()),
+    ("consumos", lambda ctx, k: _attrs(ctx, _ATTRS_CONSUMOS),
+     lambda ctx: ctx["diseno"].calcular_consumos_desglosados()),
+    ("capex", lambda ctx, k: (_attrs(ctx, _ATTRS_CAPEX), k["res_elec"], k["res_hvac"], k["res_dlc"]),
+     lambda ctx: ctx["diseno"].calcular_presupuesto_detallado(ctx["res_elec"], ctx["res_hvac"], ctx["res_dlc"])),
+    ("kpis", lambda ctx, k: (_attrs(ctx, _ATTRS_KPIS), k["res_hvac"], k["res_elec"]),
+     lambda ctx: ctx["diseno"].calcular_kpis_densidad(ctx["res_hvac"]['Q_Instalada_kW'], ctx["res_elec"]['S_Total_N_kVA'])),
+    ("tabla_elec", lambda ctx, k: (_attrs(ctx, _ATTRS_TABLA_ELEC), k["res_elec"]),
+     lambda ctx: generar_tabla_electrico(ctx["diseno"], ctx["res_elec"])),
+    ("tabla_hvac", lambda ctx, k: (_attrs(ctx, _ATTRS_TABLA_HVAC), k["res_hvac"]),
+     lambda ctx: generar_tabla_hvac_limpia(ctx["diseno"], ctx["res_hvac"])),
+    ("tabla_hidro", lambda ctx, k: (ctx["diseno"].cerramientos_con_dlc, k["res_hvac"], k["res_dlc"]),
+     lambda ctx: generar_tabla_hidraulica_unificada(ctx["diseno"], ctx["res_hvac"], ctx["res_dlc"])),
+    ("tabla_pci", lambda ctx, k: _attrs(ctx, _ATTRS_TABLA_PCI), _tabla_pci),
+    ("tabla_ratios", lambda ctx, k: k["kpis"], lambda ctx: generar_tabla_ratios(ctx["kpis"])),
+    ("metricas", lambda ctx, k: (_attrs(ctx, _ATTRS_METRICAS), ctx["WCR"], ctx["CEF"]),
+     lambda ctx: calcular_metricas_sostenibilidad(ctx["diseno"], ctx["WCR"], ctx["CEF"])),
+]
+
+def _sensibilidad(ctx):
+    from cpd_sensibilidad import analizar_sensibilidad
+    return analizar_sensibilidad(ctx["escenario"])
+
+
+# Nodos opcionales (Monte Carlo y sensibilidad): sólo si se piden
+NODOS_INCERTIDUMBRE = [
+    ("incertidumbre_capex", lambda ctx, k: (k["capex"], ctx.get("sorteos_mc", 20_000)), _incertidumbre_capex),
+    ("sensibilidad", lambda ctx, k: k["diseno"], _sensibilidad),
+]
+
+# Nodos que muestra cada pestaña de resultados de la GUI
+NODOS_POR_PESTANA = {
+    "kpi": {"kpis", "consumos", "tabla_ratios", "metricas", "sensibilidad"},
+    "capex": {"capex", "incertidumbre_capex"},
+    "elec": {"tabla_elec"},
+    "hvac": {"tabla_hvac", "tabla_hidro"},
+    "aux": {"tabla_pci"},
+}
+
+
+class GrafoProyecto:
+    """Calcula el proyecto reutilizando los nodos cuyas entradas no han cambiado.
+
+    Los nodos `perezosos` (gráficos, Monte Carlo) sólo resuelven su clave en
+    calcular(); su valor se obtiene con valor(nombre) cuando hace falta.
+    `aciertos`/`fallos` cuentan por nodo los resultados reutilizados/recalculados;
+    `cambiados` son los nodos cuya clave difiere de la del cálculo anterior.
+    Con un `trazador` (cpd_trazas.Trazador) cada nodo recalculado deja un span.
+    """
+
+    def __init__(self, nodos=None, perezosos=(), tamano_cache=TAMANO_CACHE_NODO, trazador=None):
+        self.nodos = list(NODOS_PROYECTO if nodos is None else nodos)
+        self.perezosos = set(perezosos)
+        self.tamano_cache = tamano_cache
+        self.memo = {nombre: OrderedDict() for nombre, _, _ in self.nodos}
+        self.aciertos = Counter()
+        self.fallos = Counter()
+        self.claves = {}
+        self.cambiados = set()
+        self.ctx = None
+        self.trazador = trazador
+
+    def _resolver(self, nombre, clave, calculo_fn):
+        memo = self.memo[nombre]
+        if clave in memo:
+            memo.move_to_end(clave)
+            self.aciertos[nombre] += 1
+        else:
+            if self.trazador is None:
+                memo[clave] = calculo_fn(self.ctx)
+            else:
+                with self.trazador.span(nombre, categoria_nodo(nombre)):
+                    memo[clave] = calculo_fn(self.ctx)
+            if len(memo) > self.tamano_cache: memo.popitem(last=False)
+            self.fallos[nombre] += 1
+        self.ctx[nombre] = memo[clave]
+        return memo[clave]
+
+    def calcular(self, escenario, WCR=0.5, CEF=0.35, progreso=None, **extra):
+        # progreso(fracción, nodo) se llama antes de cada nodo; si lanza una excepción
+        # (p.ej. cancelación) el grafo vuelve al último cálculo completo
+        ctx_previo, previas = self.ctx, self.claves
+        self.ctx = {"escenario": {**ESCENARIO_DEFECTO, **escenario}, "WCR": WCR, "CEF": CEF, **extra}
+        self.claves = {}
+        try:
+            for i, (nombre, clave_fn, calculo_fn) in enumerate(self.nodos):
+                if progreso: progreso(i / len(self.nodos), nombre)
+                clave = self.claves[nombre] = clave_fn(self.ctx, self.claves)
+                if nombre not in self.perezosos:
+                    self._resolver(nombre, clave, calculo_fn)
+        except Exception:
+            # Un escenario inválido no deja el grafo a medias: se conserva el último cálculo válido
+            self.ctx, self.claves = ctx_previo, previas
+            raise
+        self.cambiados = {n for n, c in self.claves.items() if previas.get(n, self) != c}
+        return self.ctx
+
+    def valor(self, nombre):
+        if nombre not in self.ctx:
+            _, _, calculo_fn = next(nodo for nodo in self.nodos if nodo[0] == nombre)
+            self._resolver(nombre, self.claves[nombre], calculo_fn)
+        return self.ctx[nombre]
+
+    def proyecto(self, escenario, **kw):
+        # Mismo formato que cpd_motor.calcular_proyecto
+        ctx = self.calcular(escenario, **kw)
+        dfs = {"capex": ctx["capex"], "elec": ctx["tabla_elec"], "hvac": ctx["tabla_hvac"],
+               "hidro": ctx["tabla_hidro"], "pci": ctx["tabla_pci"], "ratios": ctx["tabla_ratios"]}
+        return {"diseno": ctx["diseno"], "res_elec": ctx["res_elec"], "res_hvac": ctx["res_hvac"], "res_dlc": ctx["res_dlc"],
+                "consumos": ctx["consumos"], "kpis": ctx["kpis"], "dfs": dfs}
+
+    def estadisticas(self):
+        return {nombre: {"aciertos": self.aciertos[nombre], "fallos": self.fallos[nombre]} for nombre, _, _ in self.nodos}
+
+    def vaciar(self):
+        for memo in self.memo.values(): memo.clear()
+        self.aciertos.clear(); self.fallos.clear()
+        self.claves = {}; self.cambiados = set(); self.ctx = None
+
+
+# ==============================================================================
+# MODO EN VIVO (WHAT-IF): PRESUPUESTO DE LATENCIA
+# ==============================================================================
+# Una edición en vivo (recálculo incremental + redibujo de la pestaña visible)
+# debe quedar por debajo de este tiempo; el retardo anti-rebote no cuenta.
+PRESUPUESTO_EN_VIVO_MS = 100.0
+
+# Ediciones de prueba sobre el escenario por defecto: (parámetro, valor base, paso)
+EDICIONES_EN_VIVO = (("cctv_unidades", 20, 1), ("P_max", 500.0, 5.0), ("cop_hvac_aire", 3.5, 0.05),
+                     ("P_iluminacion", 2000.0, 50.0), ("WCR", 0.5, 0.01))
+
+
+def resumen_latencias(latencias_ms, presupuesto_ms=PRESUPUESTO_EN_VIVO_MS):
+    lat = np.asarray(latencias_ms, dtype=float)
+    p50, p95 = np.percentile(lat, (50, 95)) if lat.size else (np.nan, np.nan)
+    return {"n": int(lat.size), "p50_ms": float(p50), "p95_ms": float(p95),
+            "max_ms": float(lat.max()) if lat.size else np.nan, "presupuesto_ms": presupuesto_ms,
+            "dentro_presupuesto": bool(p95 <= presupuesto_ms)}
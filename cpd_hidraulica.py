@@ -0,0 +1,308 @@
+# ==============================================================================
+# RED HIDRÁULICA: PÉRDIDAS DE CARGA, REPARTO DE CAUDALES Y BOMBEO
+# ==============================================================================
+# Cada circuito (HVAC/DLC, primario/secundario) se modela como una red de tramos:
+# sala de máquinas -> montante con una derivación por planta -> colector de planta
+# (en anillo en el secundario HVAC) -> un ramal por cerramiento hasta su terminal
+# (CRAH/InRow o CDU). Los tramos se dimensionan con el catálogo DN del motor y la
+# red se resuelve con Darcy-Weisbach/Colebrook: caudales del árbol por continuidad y
+# correcciones de malla (anillos) por Newton simultáneo (Hardy-Cross); todo con
+# arrays por tramo y nivel del árbol, así que escala a miles de ramales. La altura
+# de la bomba sale del circuito más desfavorable (ida + retorno simétrico +
+# terminal + planta).
+from functools import lru_cache
+
+import numpy as np
+
+from cpd_motor import (CP_AGUA, RHO_AGUA, MAX_CIRCUITOS, TABLA_DN_MM, TABLA_DN_MATERIAL, VELOCIDAD_MAX_MS,
+                       ErrorDimensionado, _circuitos_minimos, _indice_dn)
+
+GRAVEDAD = 9.81
+VISCOSIDAD_AGUA_M2S = 1.0e-6        # cinemática a ~20 °C
+RUGOSIDAD_MM = {"Acero Carb.": 0.045, "PPR/Cobre": 0.007}
+FACTOR_SINGULARES = 0.3             # codos, tes y válvulas como fracción de la pérdida por fricción
+RENDIMIENTO_BOMBA = 0.7             # hidráulico x motor
+LONGITUD_RAMAL_M = 6.0              # del colector de planta al terminal del cerramiento
+
+# Pérdida en el terminal del circuito más desfavorable y en la planta (kPa)
+DP_TERMINAL_KPA = {"HVAC_Prim": 50.0, "HVAC_Sec": 40.0, "DLC_Prim": 50.0, "DLC_Sec": 60.0}
+DP_PLANTA_KPA = 50.0
+
+
+def factor_friccion(Re, rugosidad_relativa, iteraciones=3):
+    # Laminar (64/Re) por debajo de Re 2000, Colebrook por encima de 4000 (punto fijo desde
+    # Swamee-Jain) e interpolación lineal en la transición
+    Re = np.maximum(np.asarray(Re, dtype=float), 1e-9)
+    Re_t = np.maximum(Re, 4000.0)
+    f = 0.25 / np.log10(rugosidad_relativa / 3.7 + 5.74 / Re_t ** 0.9) ** 2
+    for _ in range(iteraciones):
+        f = (-2.0 * np.log10(rugosidad_relativa / 3.7 + 2.51 / (Re_t * np.sqrt(f)))) ** -2
+    laminar = 64.0 / Re
+    transicion = 64.0 / 2000.0 + (f - 64.0 / 2000.0) * (Re - 2000.0) / 2000.0
+    return np.where(Re < 2000.0, laminar, np.where(Re < 4000.0, transicion, f))
+
+
+def perdida_tramos(Q, red):
+    """Pérdida de carga (m) de cada tramo con caudal Q (m3/s, repartido entre sus circuitos paralelos)
+    y su derivada dh/dQ con el factor de fricción congelado (mínimo: la pendiente laminar)."""
+    D, L, n = red["D_m"], red["longitud_m"], red["paralelos"]
+    area = np.pi * D ** 2 / 4
+    v = Q / (n * area)
+    f = factor_friccion(np.abs(v) * D / VISCOSIDAD_AGUA_M2S, red["rugosidad_m"] / D)
+    k = (1 + FACTOR_SINGULARES) * f * L / (D * 2 * GRAVEDAD)
+    h = k * v * np.abs(v)
+    pendiente_laminar = (1 + FACTOR_SINGULARES) * 32 * VISCOSIDAD_AGUA_M2S * L / (GRAVEDAD * D ** 2 * n * area)
+    return h, np.maximum(2 * k * np.abs(v) / (n * area), pendiente_laminar)
+
+
+def _arbol(origen, destino, n_nodos, raiz):
+    # Árbol de expansión por niveles (BFS) desde la raíz: nivel de cada nodo y tramo que lo une a su
+    # padre (-1 en la raíz). Los tramos que no entran en el árbol cierran las mallas.
+    extremos = np.r_[origen, destino]; vecinos = np.r_[destino, origen]; tramo = np.tile(np.arange(len(origen)), 2)
+    orden = np.argsort(extremos, kind="stable")
+    vecinos, tramo = vecinos[orden], tramo[orden]
+    inicio = np.searchsorted(extremos[orden], np.arange(n_nodos + 1))
+    nivel = np.full(n_nodos, -1); nivel[raiz] = 0
+    padre_tramo = np.full(n_nodos, -1)
+    frontera = np.array([raiz]); k = 0
+    while len(frontera):
+        grados = inicio[frontera + 1] - inicio[frontera]
+        pos = np.repeat(inicio[frontera] - np.r_[0, np.cumsum(grados)[:-1]], grados) + np.arange(grados.sum())
+        v, t = vecinos[pos], tramo[pos]
+        nuevos = nivel[v] < 0
+        v, t = v[nuevos], t[nuevos]
+        v, primero = np.unique(v, return_index=True)
+        k += 1; nivel[v] = k; padre_tramo[v] = t[primero]
+        frontera = v
+    if (nivel < 0).any():
+        raise ValueError(f"Red con {(nivel < 0).sum()} nodos sin conexión con la sala de máquinas")
+    return nivel, padre_tramo
+
+
+def _bloques_acoplados(filas, col_local, signos, k):
+    # Componentes conexas de mallas que comparten algún tramo (unión-búsqueda). Devuelve, para
+    # cada componente de más de una malla, (mallas, tramos locales, incidencia densa del bloque)
+    raiz = np.arange(k)
+    def buscar(x):
+        while raiz[x] != x:
+            raiz[x] = raiz[raiz[x]]; x = raiz[x]
+        return x
+    primera = {}
+    for l, c in zip(filas.tolist(), col_local.tolist()):
+        otra = primera.setdefault(c, l)
+        if otra != l:
+            a, b = buscar(l), buscar(otra)
+            if a != b: raiz[a] = b
+    componente = np.array([buscar(l) for l in range(k)])
+    tamano = np.bincount(componente, minlength=k)
+    bloques = []
+    for r in np.flatnonzero(tamano > 1):
+        mallas = np.flatnonzero(componente == r)
+        entradas = np.flatnonzero(componente[filas] == r)
+        tramos_b, local = np.unique(col_local[entradas], return_inverse=True)
+        fila_b = np.searchsorted(mallas, filas[entradas])
+        M = np.zeros((len(mallas), len(tramos_b))); np.add.at(M, (fila_b, local), signos[entradas])
+        bloques.append((mallas, tramos_b, M))
+    return bloques
+
+
+def resolver_red(red, tol=1e-6, max_iter=50):
+    """Caudales (m3/s por tramo) y alturas piezométricas (m por nodo) de una red con sus consumos.
+
+    red: dict de arrays "origen", "destino" (nodos de cada tramo), "longitud_m", "D_m",
+    "rugosidad_m", "paralelos", "demanda_m3s" (por nodo, > 0 = consumo) y "fuente" (nodo de
+    altura 0 que aporta el caudal). Los caudales del árbol de expansión cumplen la
+    continuidad; cada tramo fuera del árbol cierra una malla y las correcciones de caudal de
+    todas las mallas se calculan a la vez por Newton (Hardy-Cross simultáneo) hasta que la
+    suma de pérdidas en cada malla es < tol (m). El jacobiano es diagonal por bloques: sólo
+    se acoplan las mallas que comparten tramos, y cada bloque se resuelve aparte. Con mallas
+    independientes (los anillos de planta de construir_red) el coste por iteración es lineal
+    en el nº de tramos; un bloque de m mallas acopladas cuesta O(m³).
+    Devuelve {"Q", "H", "iteraciones", "residuo"}.
+    """
+    o, d = red["origen"], red["destino"]
+    n_nodos, n_tramos = len(red["demanda_m3s"]), len(o)
+    nivel, padre_tramo = _arbol(o, d, n_nodos, red["fuente"])
+    nodos = np.flatnonzero(padre_tramo >= 0)
+    t_arbol = padre_tramo[nodos]
+    padre = np.where(o[t_arbol] == nodos, d[t_arbol], o[t_arbol])
+    sentido = np.where(d[t_arbol] == nodos, 1.0, -1.0)       # +1: el tramo va del padre al nodo
+    por_nivel = [np.flatnonzero(nivel[nodos] == k) for k in range(nivel.max() + 1)]
+
+    # --- Caudales iniciales: árbol por continuidad (cada nodo recibe la demanda de su subárbol) ---
+    subarbol = red["demanda_m3s"].astype(float).copy()
+    for i in reversed(por_nivel[1:]):
+        subarbol += np.bincount(padre[i], weights=subarbol[nodos[i]], minlength=n_nodos)
+    Q = np.zeros(n_tramos); Q[t_arbol] = sentido * subarbol[nodos]
+
+    # --- Mallas: cada cuerda + el camino por el árbol entre sus extremos (signo = sentido de la malla) ---
+    en_arbol = np.zeros(n_tramos, dtype=bool); en_arbol[t_arbol] = True
+    cuerdas = np.flatnonzero(~en_arbol)
+    sube = dict(zip(nodos.tolist(), zip(padre.tolist(), t_arbol.tolist(), sentido.tolist())))
+    filas, cols, signos = [], [], []
+    for l, c in enumerate(cuerdas):
+        filas.append(l); cols.append(c); signos.append(1.0)
+        a, b = int(d[c]), int(o[c])             # la malla sigue la cuerda o->d y vuelve de d a o por el árbol
+        camino_a, camino_b = [], []
+        while nivel[a] > nivel[b]: p, t, s = sube[a]; camino_a.append((t, -s)); a = p
+        while nivel[b] > nivel[a]: p, t, s = sube[b]; camino_b.append((t, s)); b = p
+        while a != b:
+            p, t, s = sube[a]; camino_a.append((t, -s)); a = p
+            p, t, s = sube[b]; camino_b.append((t, s)); b = p
+        for t, s in camino_a + camino_b:
+            filas.append(l); cols.append(t); signos.append(s)
+    filas, cols, signos = np.array(filas, dtype=int), np.array(cols, dtype=int), np.array(signos)
+    k = len(cuerdas)
+
+    residuo, it = 0.0, 0
+    if k:
+        # Sólo intervienen los tramos de alguna malla; la incidencia malla x tramo se guarda
+        # dispersa (filas, col_local, signos) y los productos son bincount sobre sus entradas
+        tramos_malla, col_local = np.unique(cols, return_inverse=True)
+        n_malla = len(tramos_malla)
+        bloques = _bloques_acoplados(filas, col_local, signos, k)
+        for it in range(1, max_iter + 1):
+            h, g = perdida_tramos(Q[tramos_malla], {c: v[tramos_malla] for c, v in red.items()
+                                                   if c in ("D_m", "longitud_m", "paralelos", "rugosidad_m")})
+            R = np.bincount(filas, weights=signos * h[col_local], minlength=k)
+            residuo = float(np.abs(R).max())
+            if residuo < tol:
+                break
+            # Mallas sin tramos compartidos: J diagonal (signo² = 1); los bloques acoplados, densos
+            dq = -R / np.bincount(filas, weights=g[col_local], minlength=k)
+            for mallas, tramos_b, M in bloques:
+                dq[mallas] = np.linalg.solve((M * g[tramos_b]) @ M.T, -R[mallas])
+            Q[tramos_malla] += np.bincount(col_local, weights=signos * dq[filas], minlength=n_malla)
+
+    # --- Alturas: desde la fuente (H = 0) bajando por el árbol ---
+    h, _ = perdida_tramos(Q, red)
+    H = np.zeros(n_nodos)
+    for i in por_nivel[1:]:
+        H[nodos[i]] = H[padre[i]] - sentido[i] * h[t_arbol[i]]
+    return {"Q": Q, "H": H, "iteraciones": it, "residuo": residuo}
+
+
+def construir_red(cargas_por_planta, delta_T, area_por_planta, altura_planta=4.5, anillo=False):
+    """Red de ida de un circuito: nodo 0 = sala de máquinas, montante por plantas, colector por
+    planta con un ramal por terminal y, con `anillo`, el colector cerrado sobre el montante.
+
+    cargas_por_planta: una secuencia de cargas de terminal (kW) por planta. Cada tramo se
+    dimensiona (DN y circuitos paralelos) con el caudal que le llega en árbol.
+    """
+    plantas = [np.asarray(c, dtype=float) for c in cargas_por_planta]
+    ocupadas = [p for p, c in enumerate(plantas) if len(c)]
+    if not ocupadas:
+        raise ValueError("Red sin terminales")
+    lado = np.sqrt(area_por_planta)
+    q = [c / (CP_AGUA * delta_T) / RHO_AGUA for c in plantas]
+    caudal_planta = np.array([c.sum() for c in q])
+    ultima = ocupadas[-1]
+
+    origen, destino, longitud, caudal, tipo = [], [], [], [], []
+    def tramos(o, d, L, Q, t):
+        origen.append(np.atleast_1d(o)); destino.append(np.atleast_1d(d))
+        longitud.append(np.broadcast_to(L, np.shape(np.atleast_1d(o))).astype(float))
+        caudal.append(np.atleast_1d(Q).astype(float)); tipo.append(np.full(len(np.atleast_1d(o)), t))
+
+    # Montante: nodo p+1 = derivación de la planta p; el primer tramo sale de la sala de máquinas
+    acumulado = np.cumsum(caudal_planta[::-1])[::-1]
+    montante = np.arange(1, ultima + 2)
+    tramos(np.r_[0, montante[:-1]], montante, np.r_[lado * 0.5, np.full(ultima, altura_planta)],
+           acumulado[:ultima + 1], 0)
+    demanda = [np.zeros(ultima + 2)]
+    siguiente = ultima + 2
+    terminales = []
+    for p in ocupadas:
+        m = len(q[p]); L_col = lado * 1.5 / m
+        colector = np.arange(siguiente, siguiente + m); terminal = colector + m
+        siguiente += 2 * m
+        # En anillo el colector se alimenta por los dos extremos: todo él se dimensiona con la mitad del caudal
+        en_anillo = anillo and m > 1
+        tramos(np.r_[montante[p], colector[:-1]], colector, L_col,
+               np.full(m, q[p].sum() / 2) if en_anillo else np.cumsum(q[p][::-1])[::-1], 1)
+        tramos(colector, terminal, LONGITUD_RAMAL_M, q[p], 2)
+        if en_anillo:
+            tramos(colector[-1], montante[p], L_col, q[p].sum() / 2, 1)
+        demanda += [np.zeros(m), q[p]]
+        terminales.append(terminal)
+
+    Q_diseno = np.concatenate(caudal)
+    paralelos = np.maximum(_circuitos_minimos(Q_diseno), 1)
+    if (paralelos > MAX_CIRCUITOS).any():
+        i = int(np.argmax(paralelos))
+        raise ErrorDimensionado(f"Tramo con {Q_diseno[i] * 3600:.1f} m3/h requiere {paralelos[i]} circuitos "
+                                f"DN{TABLA_DN_MM[-1]} a <= {VELOCIDAD_MAX_MS} m/s (máximo {MAX_CIRCUITOS})")
+    idx = _indice_dn(Q_diseno / paralelos)
+    material = TABLA_DN_MATERIAL[idx]
+    return {
+        "origen": np.concatenate(origen), "destino": np.concatenate(destino), "longitud_m": np.concatenate(longitud),
+        "tipo": np.concatenate(tipo),     # 0 montante, 1 colector, 2 ramal
+        "DN_mm": TABLA_DN_MM[idx], "D_m": TABLA_DN_MM[idx] / 1000.0, "material": material,
+        "rugosidad_m": np.array([RUGOSIDAD_MM[m] for m in material]) / 1000.0,
+        "paralelos": paralelos, "Q_diseno_m3s": Q_diseno,
+        "demanda_m3s": np.concatenate(demanda), "fuente": 0, "terminales": np.concatenate(terminales),
+    }
+
+
+def _bombas(caudal_m3s, altura_m, paralelos_principal, factor_N_hvac):
+    # Bombas en servicio: una por circuito paralelo del tramo principal; reserva según la redundancia
+    servicio = int(paralelos_principal)
+    reserva = int(np.ceil(servicio * (factor_N_hvac - 1) - 1e-9))
+    P_W = RHO_AGUA * GRAVEDAD * caudal_m3s * altura_m / RENDIMIENTO_BOMBA
+    return servicio + reserva, P_W
+
+
+def calcular_circuito(nombre, cargas_por_planta, delta_T, area_por_planta, factor_N_hvac,
+                      altura_planta=4.5, anillo=False):
+    """Dimensiona y resuelve un circuito. Devuelve las claves de _calcular_tuberia_colector
+    (DN y circuitos del tramo principal, velocidad máxima, longitud de ida y retorno) más
+    pérdida de carga, altura y potencia de bombeo, nº de bombas, tramos e iteraciones."""
+    red = construir_red(cargas_por_planta, delta_T, area_por_planta, altura_planta, anillo)
+    sol = resolver_red(red)
+    Q, H = sol["Q"], sol["H"]
+    v = np.abs(Q) / (red["paralelos"] * np.pi * red["D_m"] ** 2 / 4)
+    dp_red_m = 2 * float((H[0] - H[red["terminales"]]).max())          # ida + retorno simétrico
+    altura_m = dp_red_m + (DP_TERMINAL_KPA[nombre] + DP_PLANTA_KPA) * 1000 / (RHO_AGUA * GRAVEDAD)
+    caudal = float(red["demanda_m3s"].sum())
+    bombas, P_W = _bombas(caudal, altura_m, red["paralelos"][0], factor_N_hvac)
+    return {
+        "Caudal_Total_m3h": caudal * 3600, "DN_mm": int(red["DN_mm"][0]), "Velocidad_ms": float(v.max()),
+        "Material": red["material"][0], "Num_Circuitos": int(red["paralelos"][0]),
+        "Longitud_Estimada_m": 2 * float((red["longitud_m"] * red["paralelos"]).sum()),
+        "Perdida_Red_kPa": dp_red_m * RHO_AGUA * GRAVEDAD / 1000, "Altura_Bomba_m": altura_m,
+        "P_Bomba_kW": P_W / 1000, "Bombas": bombas, "Tramos": len(Q), "Iteraciones": sol["iteraciones"],
+        "Red": {**red, "Q_m3s": Q, "H_m": H, "v_ms": v},
+    }
+
+
+def _repartir(n, plantas):
+    # n terminales repartidos por plantas (los primeros, en las plantas bajas)
+    base, resto = divmod(int(n), int(plantas))
+    return [base + (p < resto) for p in range(int(plantas))]
+
+
+@lru_cache(maxsize=256)
+def redes_diseno(Q_Instalada_kW, Q_DLC_kW, num_cerramientos, cerramientos_con_dlc, num_plantas, area_por_planta,
+                 factor_N_hvac, altura_planta=4.5):
+    """Los cuatro circuitos de CIRCUITOS_HIDRAULICOS como redes. Primarios: sala de máquinas ->
+    generación en la última planta; secundarios: un terminal por cerramiento (CDU en los que
+    llevan DLC) y el secundario HVAC en anillo. Devuelve {prefijo: circuito} y P_bombas_*_W /
+    Bombas_* por sistema (memorizado: variantes de un lote con la misma hidráulica lo comparten)."""
+    plantas = max(int(num_plantas), 1)
+    solo_arriba = lambda Q: [[]] * (plantas - 1) + [[Q]]
+    por_cerramiento = lambda Q, n: [[Q / n] * k for k in _repartir(n, plantas)]
+    res = {}
+    for prefijo, Q, delta_T, cargas, anillo in (
+            ("HVAC_Prim", Q_Instalada_kW, 5.0, solo_arriba, False), ("HVAC_Sec", Q_Instalada_kW, 6.0, por_cerramiento, True),
+            ("DLC_Prim", Q_DLC_kW, 5.0, solo_arriba, False), ("DLC_Sec", Q_DLC_kW, 8.0, por_cerramiento, False)):
+        n = num_cerramientos if prefijo == "HVAC_Sec" else cerramientos_con_dlc
+        if Q <= 0.1 or (cargas is por_cerramiento and n <= 0):
+            res[prefijo] = None; continue
+        args = (Q, n) if cargas is por_cerramiento else (Q,)
+        res[prefijo] = calcular_circuito(prefijo, cargas(*args), delta_T, area_por_planta, factor_N_hvac,
+                                         altura_planta, anillo)
+    for sistema in ("HVAC", "DLC"):
+        circuitos = [c for k, c in res.items() if k.startswith(sistema) and c]
+        res[f"P_bombas_{sistema}_W"] = sum(c["P_Bomba_kW"] for c in circuitos) * 1000
+        res[f"Bombas_{sistema}"] = sum(c["Bombas"] for c in circuitos)
+    return res
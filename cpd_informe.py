@@ -0,0 +1,451 @@
+# ==============================================================================
+# INFORMES: GRÁFICOS (MATPLOTLIB) Y MEMORIA WORD (PYTHON-DOCX)
+# ==============================================================================
+# matplotlib y python-docx se importan en la primera llamada que los necesita
+# (el arranque de la GUI no los paga). Los gráficos usan Figure directamente, sin
+# pyplot: no dependen del backend, no quedan registrados en pyplot y se pueden
+# generar desde un hilo de trabajo.
+from collections import OrderedDict
+from io import BytesIO
+from xml.sax.saxutils import escape
+import datetime
+import importlib.util
+import math
+import re
+
+import numpy as np
+
+from cpd_motor import calcular_metricas_sostenibilidad
+
+# python-docx es opcional: sólo comprobamos que está instalado, sin importarlo
+HAS_DOCX = importlib.util.find_spec("docx") is not None
+
+# ==============================================================================
+# GRÁFICOS (RESTAURADOS)
+# ==============================================================================
+# Los gráficos se construyen una vez y se actualizan sobre los mismos artistas
+# (alturas de barra, ángulos de sector, etiquetas): la pestaña de KPIs conserva
+# figura y lienzo entre cálculos. generar_grafico_* crean una figura nueva (DOCX).
+class _GraficoEnVivo:
+    # En la pestaña KPI: tras actualizar(), `visible_cambiado` dice si la imagen cambia respecto a
+    # lo último dibujado (si no, no se redibuja) y blit() repinta sólo lo que se mueve sobre el
+    # fondo guardado en el último dibujo completo (False: hace falta un draw completo)
+    visible_cambiado = True
+
+    def blit(self):
+        return False
+
+
+class GraficoMetricas(_GraficoEnVivo):
+    NOMBRES = ['PUE (Ratio)', f'CUE (kgCO2/kWh)', f'WUE (L/kWh)']
+    COLORES = ['#FF6F61', '#6B5B95', '#88B04B']
+    PASO_TECHO = 0.25   # el eje Y sube de 0.25 en 0.25: ediciones pequeñas no lo mueven
+
+    def __init__(self):
+        from matplotlib.figure import Figure
+        self.fig = Figure(figsize=(6, 4)); ax = self.ax = self.fig.subplots()
+        self.barras = ax.bar(self.NOMBRES, [0.0] * 3, color=self.COLORES)
+        self.referencia = ax.axhline(y=1.0, color='gray', linestyle='--', alpha=0.7)
+        ax.set_title('KPIs de Eficiencia y Sostenibilidad')
+        ax.set_ylabel('Valor')
+        self.etiquetas = [ax.annotate('', xy=(bar.get_x() + bar.get_width() / 2, 0.0), xytext=(0, 3),
+                                      textcoords="offset points", ha='center', va='bottom') for bar in self.barras]
+        self.fondo = None; self.dibujadas = None
+        # Lo que se repinta con blit, en orden de zorder (referencia y bordes van sobre las barras)
+        self.animados = sorted([*self.barras, self.referencia, *ax.spines.values(), *self.etiquetas], key=lambda a: a.get_zorder())
+
+    def activar_blit(self):
+        # Barras, referencia y etiquetas pasan a ser animadas: el dibujo completo pinta el fondo
+        # (ejes, ticks, título), lo guarda y añade encima esos artistas; blit() sólo repinta éstos
+        for artista in self.animados: artista.set_animated(True)
+        self.fig.canvas.mpl_connect("draw_event", self._guardar_fondo)
+
+    def _guardar_fondo(self, evento):
+        # Con un margen: los bordes del eje pisan el límite de ax.bbox
+        self.fondo = (evento.canvas.copy_from_bbox(self.ax.bbox.padded(2)), self.ax.get_ylim())
+        for artista in self.animados: artista.draw(evento.renderer)
+
+    def blit(self):
+        if self.fondo is None or self.fondo[1] != self.ax.get_ylim(): return False
+        lienzo = self.fig.canvas
+        lienzo.restore_region(self.fondo[0])
+        for artista in self.animados: self.ax.draw_artist(artista)
+        lienzo.blit(self.ax.bbox.padded(2))
+        return True
+
+    def actualizar(self, metricas):
+        # metricas: dict de calcular_metricas_sostenibilidad
+        alturas = [metricas["PUE"], metricas["CUE"], metricas["WUE"]]
+        for bar, etiqueta, height in zip(self.barras, self.etiquetas, alturas):
+            bar.set_height(height)
+            etiqueta.xy = (bar.get_x() + bar.get_width() / 2, height)
+            etiqueta.set_text(f'{height:.2f}')
+        # Techo redondeado con margen para las etiquetas (incluye la referencia PUE = 1)
+        techo = self.PASO_TECHO * math.ceil(1.15 * max(1.0, np.nanmax(alturas)) / self.PASO_TECHO)
+        self.ax.set_ylim(0.0, techo)
+        self.visible_cambiado = alturas != self.dibujadas
+        self.dibujadas = alturas
+        return self.fig
+
+
+class GraficoConsumos(_GraficoEnVivo):
+    COLORES = ['#4CAF50', '#2196F3', '#FFC107', '#9E9E9E', '#607D8B', '#FF5722']
+    INICIO_GRADOS = 90; DIST_ETIQUETA = 1.1; DIST_PORCENTAJE = 0.85
+
+    def __init__(self):
+        from matplotlib.figure import Figure
+        self.fig = Figure(figsize=(6, 6)); self.ax = self.fig.subplots()
+        self.claves = None
+        self.dibujadas = None   # fracciones del último dibujo
+
+    def _construir(self, consumos):
+        from matplotlib.artist import setp
+        from matplotlib.patches import Circle
+        ax = self.ax
+        ax.clear()
+        self.claves = list(consumos)
+        sizes = list(consumos.values())
+        self.sectores, self.textos, self.porcentajes = ax.pie(
+            sizes, labels=self.claves, autopct='%1.1f%%', startangle=self.INICIO_GRADOS,
+            colors=self.COLORES[:len(sizes)], pctdistance=self.DIST_PORCENTAJE, wedgeprops=dict(width=0.4))
+        setp(self.textos, size=10)
+        setp(self.porcentajes, size=10, weight="bold", color="white")
+        ax.set_title("Desglose de Consumo Energético")
+        centre_circle = Circle((0,0),0.70,fc='white')
+        ax.add_artist(centre_circle)
+        ax.axis('equal')
+
+    def actualizar(self, consumos):
+        # Mismos sectores: se mueven ángulos y etiquetas; si cambian (p.ej. aparece DLC), se reconstruye
+        if not consumos: return None
+        x = np.asarray(list(consumos.values()), dtype=float)
+        fracs = x / x.sum() if x.sum() > 1 else x
+        if list(consumos) != self.claves:
+            self._construir(consumos)
+            self.visible_cambiado, self.dibujadas = True, fracs
+            return self.fig
+        # Sin redibujo mientras ningún porcentaje (0.1 %) ni sector (~1 px) cambie en pantalla
+        self.visible_cambiado = (np.round(1000 * fracs) != np.round(1000 * self.dibujadas)).any() \
+            or np.abs(fracs - self.dibujadas).max() >= 1e-3
+        if self.visible_cambiado: self.dibujadas = fracs
+        theta1 = self.INICIO_GRADOS / 360
+        for sector, texto, porcentaje, frac in zip(self.sectores, self.textos, self.porcentajes, fracs):
+            theta2 = theta1 + frac
+            sector.set_theta1(360. * theta1); sector.set_theta2(360. * theta2)
+            thetam = 2 * np.pi * 0.5 * (sector.theta1 + sector.theta2) / 360
+            xt, yt = self.DIST_ETIQUETA * math.cos(thetam), self.DIST_ETIQUETA * math.sin(thetam)
+            texto.set_position((xt, yt)); texto.set_horizontalalignment('left' if xt > 0 else 'right')
+            porcentaje.set_position((self.DIST_PORCENTAJE * math.cos(thetam), self.DIST_PORCENTAJE * math.sin(thetam)))
+            porcentaje.set_text('%1.1f%%' % (100. * frac))
+            theta1 = theta2
+        self.ax.relim(); self.ax.autoscale_view()
+        return self.fig
+
+
+class GraficoPareto:
+    # Nube del barrido (submuestreada), frente con todos los objetivos y frente en los
+    # dos ejes mostrados; los puntos de ambos frentes se pueden elegir (pick_event)
+    MAX_NUBE = 20_000
+
+    def __init__(self):
+        from matplotlib.figure import Figure
+        self.fig = Figure(figsize=(7, 5)); ax = self.ax = self.fig.subplots()
+        self.nube = ax.scatter([], [], s=4, color='#B0BEC5', alpha=0.4, label='Barrido')
+        self.frente = ax.scatter([], [], s=16, color='#6B5B95', picker=True, label='Frente (todos los objetivos)')
+        self.frente_ejes, = ax.plot([], [], 'o-', color='#FF6F61', ms=5, picker=5, label='Frente en estos ejes')
+        self.seleccion, = ax.plot([], [], 's', ms=12, mfc='none', mec='black')
+        ax.set_title('Frente de Pareto')
+        ax.legend(loc='upper right', fontsize=8)
+        self.indices = {}
+
+    def actualizar(self, x, y, frente, frente_ejes, etiquetas):
+        # x, y: objetivos de todos los escenarios (NaN = no válido); frente, frente_ejes: máscaras
+        validos = np.flatnonzero(~(np.isnan(x) | np.isnan(y)))
+        nube = validos[::max(1, len(validos) // self.MAX_NUBE)]
+        self.nube.set_offsets(np.column_stack([x[nube], y[nube]]))
+        idx = np.flatnonzero(frente)
+        self.frente.set_offsets(np.column_stack([x[idx], y[idx]]))
+        idx_ejes = np.flatnonzero(frente_ejes)
+        idx_ejes = idx_ejes[np.argsort(x[idx_ejes], kind="stable")]
+        self.frente_ejes.set_data(x[idx_ejes], y[idx_ejes])
+        self.seleccion.set_data([], [])
+        self.indices = {self.frente: idx, self.frente_ejes: idx_ejes}
+        self.ax.set_xlabel(etiquetas[0]); self.ax.set_ylabel(etiquetas[1])
+        # Las colecciones no entran en relim: límites a partir de los datos
+        if validos.size:
+            for v, fijar in ((x[validos], self.ax.set_xlim), (y[validos], self.ax.set_ylim)):
+                margen = 0.05 * (v.max() - v.min()) or 0.05 * abs(v.max()) or 1.0
+                fijar(v.min() - margen, v.max() + margen)
+        return self.fig
+
+    def punto(self, event):
+        # Índice del escenario elegido en un pick_event (None si no es de un frente)
+        idx = self.indices.get(event.artist)
+        return None if idx is None or not len(event.ind) else int(idx[event.ind[0]])
+
+    def marcar(self, x, y):
+        self.seleccion.set_data([x], [y])
+
+
+class GraficoTornado:
+    # Variación (%) del CAPEX y de la PUE con cada entrada en su extremo bajo y alto (o la
+    # mejor/peor alternativa); '*' marca las que cruzan un escalón de catálogo y [±x%] los enteros
+    # cuyo paso mínimo supera ±delta (ordenados a ±delta, barra con su recorrido real). Las barras y
+    # las etiquetas son fijas (ENTRADAS por eje): cada cálculo cambia anchos y textos
+    COLORES = ('#6B5B95', '#FF6F61')
+    ENTRADAS = 10
+
+    def __init__(self, figsize=(11, 3.6)):
+        from matplotlib.figure import Figure
+        self.fig = Figure(figsize=figsize)
+        self.fig.subplots_adjust(left=0.2, right=0.98, wspace=0.75, top=0.88, bottom=0.2)
+        self.nota = self.fig.text(0.01, 0.015, '', fontsize=7, color='dimgray')
+        self.ejes = dict(zip(("CAPEX_Total", "PUE"), self.fig.subplots(1, 2)))
+        y = np.arange(self.ENTRADAS)[::-1]
+        self.barras, self.etiquetas = {}, {}
+        for metrica, ax in self.ejes.items():
+            self.barras[metrica] = [ax.barh(y, np.zeros(self.ENTRADAS), color=color, label=texto)
+                                    for color, texto in zip(self.COLORES, ('Entrada baja / mín.', 'Entrada alta / máx.'))]
+            self.etiquetas[metrica] = [ax.text(-0.02, yi, '', transform=ax.get_yaxis_transform(), ha='right', va='center',
+                                               fontsize=7) for yi in y]
+            ax.set_yticks([]); ax.set_ylim(-0.6, self.ENTRADAS - 0.4)
+            ax.axvline(0, color='gray', linewidth=0.8)
+            ax.set_xlabel('Variación (%)', fontsize=8)
+            ax.tick_params(axis='x', labelsize=7)
+        self.ejes["CAPEX_Total"].legend(loc='lower right', fontsize=7)
+
+    def actualizar(self, sens):
+        from cpd_sensibilidad import filas_tornado
+        for metrica, ax in self.ejes.items():
+            etiquetas, bajo, alto = filas_tornado(sens, metrica, self.ENTRADAS)
+            n = len(etiquetas)
+            for barras, valores in zip(self.barras[metrica], (bajo, alto)):
+                for i, barra in enumerate(barras):
+                    barra.set_width(valores[i] if i < n else 0.0)
+            for i, texto in enumerate(self.etiquetas[metrica]):
+                texto.set_text(etiquetas[i] if i < n else '')
+            extremo = max(np.abs(np.concatenate([bajo, alto])).max(initial=0.0) * 1.1, 0.1)
+            ax.set_xlim(-extremo, extremo)
+            ax.set_title(f"Sensibilidad {'CAPEX' if metrica == 'CAPEX_Total' else 'PUE'} "
+                         f"(±{sens.get('delta', 0.1):.0%})", fontsize=9)
+        self.nota.set_text(f"* cruza un escalón de catálogo.  [±x%] entero cuyo paso mínimo supera "
+                           f"±{sens.get('delta', 0.1):.0%}: barra con su recorrido real, ordenada a ±{sens.get('delta', 0.1):.0%}.")
+        return self.fig
+
+
+def generar_grafico_metricas(diseno, WCR, CEF):
+    return GraficoMetricas().actualizar(calcular_metricas_sostenibilidad(diseno, WCR, CEF))
+
+def generar_grafico_consumos(consumos):
+    if not consumos: return None
+    return GraficoConsumos().actualizar(consumos)
+
+# ==============================================================================
+# IMÁGENES Y TABLAS DEL INFORME (ESCRITURA EN BLOQUE)
+# ==============================================================================
+# Los PNG de los gráficos se memorizan por sus datos: exportar otra vez el mismo
+# cálculo no vuelve a rasterizar. Las tablas no se rellenan celda a celda
+# (add_row().cells y .text son varias operaciones lxml por celda): los textos se
+# formatean por columna y todas las filas se añaden como un único fragmento XML,
+# idéntico al que escribiría cell.text.
+TAMANO_CACHE_PNG = 8
+_CACHE_PNG = OrderedDict()
+
+_NS_W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_ESPECIALES = re.compile(r"([\t\n\r])")
+_A_TEXTO = np.frompyfunc(str, 1, 1)
+_FORMATO_MILES = np.frompyfunc("{:,.2f}".format, 1, 1)
+
+
+def imagen_png(fig):
+    memfile = BytesIO()
+    fig.savefig(memfile, format='png', bbox_inches='tight')
+    return memfile.getvalue()
+
+
+def _png_memorizado(clave, generar):
+    if clave in _CACHE_PNG:
+        _CACHE_PNG.move_to_end(clave)
+        return _CACHE_PNG[clave]
+    fig = generar()
+    png = _CACHE_PNG[clave] = imagen_png(fig) if fig is not None else None
+    if len(_CACHE_PNG) > TAMANO_CACHE_PNG: _CACHE_PNG.popitem(last=False)
+    return png
+
+
+def png_grafico_metricas(metricas):
+    return _png_memorizado(("metricas",) + tuple(metricas.items()), lambda: GraficoMetricas().actualizar(metricas))
+
+def png_grafico_consumos(consumos):
+    return _png_memorizado(("consumos",) + tuple(consumos.items()), lambda: generar_grafico_consumos(consumos))
+
+def png_grafico_tornado(sens):
+    clave = ("tornado", sens.get("delta"), tuple(sens["entrada"]), tuple(sens["escalones"])) + tuple(
+        sens[f"{m}_{k}"].astype(float).round(9).tobytes() for m in ("CAPEX_Total", "PUE") for k in ("bajo", "alto"))
+    return _png_memorizado(clave, lambda: GraficoTornado(figsize=(10, 4)).actualizar(sens))
+
+
+def _anadir_imagen(doc, imagen, ancho):
+    # imagen: PNG (bytes) o figura de matplotlib
+    doc.add_picture(BytesIO(imagen if isinstance(imagen, bytes) else imagen_png(imagen)), width=ancho)
+
+
+def _xml_run(texto):
+    # <w:r> como lo escribe python-docx: \t -> <w:tab/>, \n y \r -> <w:br/>
+    partes = []
+    for trozo in _ESPECIALES.split(texto) if _ESPECIALES.search(texto) else (texto,):
+        if trozo == "\t": partes.append("<w:tab/>")
+        elif trozo in ("\n", "\r"): partes.append("<w:br/>")
+        elif trozo:
+            partes.append(f'<w:t xml:space="preserve">{escape(trozo)}</w:t>' if trozo.strip() != trozo
+                          else f"<w:t>{escape(trozo)}</w:t>")
+    return "<w:r>" + "".join(partes) + "</w:r>" if partes else "<w:r/>"
+
+
+def _textos_columna(valores, miles):
+    texto = _A_TEXTO(valores)
+    if miles:
+        es_float = np.fromiter((isinstance(v, float) for v in valores), bool, len(valores))
+        if es_float.any(): texto[es_float] = _FORMATO_MILES(valores[es_float])
+    return texto
+
+
+def anadir_tabla(doc, df, cabecera=None, miles=False):
+    """Tabla 'Table Grid' con la cabecera y las filas de df (str(valor); miles=True: floats con 1,234.56)."""
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import qn
+    t = doc.add_table(rows=1, cols=len(df.columns))
+    t.style = 'Table Grid'
+    for celda, col in zip(t.rows[0].cells, cabecera or df.columns): celda.text = col
+    if len(df) == 0: return t
+
+    valores = df.to_numpy()      # como iterrows: mismos tipos por celda
+    textos = [_textos_columna(valores[:, j], miles) for j in range(valores.shape[1])]
+    celdas = [f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{g.get(qn("w:w"))}"/></w:tcPr><w:p>'
+              for g in t._tbl.tblGrid.gridCol_lst]
+    filas = "".join("<w:tr>" + "".join(c + _xml_run(x) + "</w:p></w:tc>" for c, x in zip(celdas, fila)) + "</w:tr>"
+                    for fila in zip(*textos))
+    t._tbl.extend(list(parse_xml(f'<w:tbl xmlns:w="{_NS_W}">{filas}</w:tbl>')))
+    return t
+
+
+# ==============================================================================
+# GENERACIÓN DE REPORTE WORD (RESTAURADA EXACTA)
+# ==============================================================================
+def crear_documento_proyecto_word(diseno, df_elec, df_hvac, df_hidro, df_pci, consumos, df_capex, df_ratios, fig_consumos, fig_metricas,
+                                  destino=None, fig_tornado=None, df_sensibilidad=None):
+    # fig_*: PNG (bytes) o figura. destino: ruta o fichero donde se guarda directamente;
+    # sin destino se devuelve un BytesIO como antes. Con df_sensibilidad (tabla_sensibilidad
+    # de cpd_sensibilidad) se añade el análisis de sensibilidad tras el presupuesto
+    if not HAS_DOCX: return None
+    from docx import Document
+    from docx.shared import Inches
+
+    doc = Document()
+    
+    # --- PORTADA ---
+    doc.add_heading('PROYECTO EJECUTIVO DE DATA CENTER', 0)
+    doc.add_paragraph(f'Fecha de Generación: {datetime.date.today().strftime("%d/%m/%Y")}')
+    doc.add_paragraph('Este documento contiene la memoria técnica descriptiva, los cálculos justificativos y el presupuesto estimado para la infraestructura del CPD.')
+    doc.add_page_break()
+    
+    # --- 1. INTRODUCCIÓN ---
+    doc.add_heading('1. Introducción y Objeto', level=1)
+    p = doc.add_paragraph()
+    p.add_run(f'El objeto del presente proyecto es definir las instalaciones de un Centro de Procesamiento de Datos (CPD) con una superficie total construida de {diseno.area_total_construida:.0f} m² distribuidos en {diseno.num_plantas} plantas. ')
+    p.add_run(f'La infraestructura dará servicio a una carga IT crítica de {diseno.P_IT_demandada/1000:.2f} kW, alojada en {diseno.num_racks_total} racks de servidores.')
+    
+    # --- 2. RATIOS Y MÉTRICAS ---
+    doc.add_heading('2. Ratios de Diseño y Eficiencia', level=1)
+    doc.add_paragraph('A continuación se detallan los indicadores clave de rendimiento (KPIs) calculados para el diseño propuesto:')
+    
+    if fig_metricas:
+        _anadir_imagen(doc, fig_metricas, Inches(5))
+    
+    anadir_tabla(doc, df_ratios[["Ratio/KPI", "Valor"]], cabecera=["Indicador", "Valor"])
+        
+    doc.add_page_break()
+
+    # --- 3. INSTALACIÓN ELÉCTRICA ---
+    doc.add_heading('3. Instalación Eléctrica', level=1)
+    
+    desc_elec = (f"El sistema eléctrico se ha diseñado bajo una topología de redundancia {diseno.R_elec}, con un esquema de suministro "
+                 f"tipo {diseno.Suministro_AB}. La distribución de potencia hacia la sala IT se realizará mediante {diseno.Distribucion_IT_tipo}. "
+                 f"Se contempla la instalación de {df_elec.iloc[2]['nº de unidades']} transformadores de {df_elec.iloc[2]['Potencia unitaria']} "
+                 f"y un sistema de respaldo mediante grupos electrógenos y sistemas de alimentación ininterrumpida (UPS) de doble conversión.")
+    doc.add_paragraph(desc_elec)
+    
+    doc.add_heading('3.1. Equipos Eléctricos Principales', level=2)
+    anadir_tabla(doc, df_elec)
+
+    # --- 4. CLIMATIZACIÓN ---
+    doc.add_heading('4. Sistema HVAC', level=1)
+    
+    desc_hvac = (f"La disipación térmica se gestionará mediante un sistema de producción de frío basado en tecnología {diseno.prodfrio_tec} "
+                 f"con redundancia {diseno.R_hvac}. La distribución de aire en sala se realizará mediante unidades {diseno.distribfrio_tec} "
+                 f"configuradas para un cerramiento de {diseno.tipo_cerramiento}. ")
+    
+    if diseno.cerramientos_con_dlc > 0:
+        desc_hvac += (f"Adicionalmente, se implementa un sistema de Refrigeración Líquida Directa (DLC) de alta densidad para {diseno.cerramientos_con_dlc} cerramientos, "
+                      f"utilizando {diseno.tipo_dist_frio_dlc} y generación mediante {diseno.tipo_gen_frio_dlc}.")
+    
+    doc.add_paragraph(desc_hvac)
+    
+    doc.add_heading('4.1. Equipos de Climatización', level=2)
+    anadir_tabla(doc, df_hvac)
+
+    # --- 5. HIDRÁULICA ---
+    doc.add_heading('5. Red Hidráulica', level=1)
+    doc.add_paragraph("A continuación se detallan las características de los circuitos hidráulicos calculados (diámetros, materiales y caudales) para garantizar el transporte de energía térmica:")
+    
+    anadir_tabla(doc, df_hidro)
+
+    # --- 6. PCI Y SEGURIDAD ---
+    doc.add_heading('6. Protección Contra Incendios y Seguridad', level=1)
+    doc.add_paragraph(f"El sistema de extinción seleccionado para las salas críticas es {diseno.tecnologia_pci}, complementado por un sistema de detección temprana VESDA. La seguridad física se gestiona mediante un sistema integrado de CCTV y control de accesos.")
+    
+    anadir_tabla(doc, df_pci)
+
+    doc.add_page_break()
+
+    # --- 7. ANÁLISIS DE CONSUMOS ---
+    doc.add_heading('7. Análisis Energético', level=1)
+    doc.add_paragraph("Desglose estimado de la potencia demandada por subsistema:")
+    
+    if fig_consumos:
+        _anadir_imagen(doc, fig_consumos, Inches(5))
+        
+    doc.add_paragraph("Detalle de Potencias (W):")
+    for k, v in consumos.items():
+        doc.add_paragraph(f"- {k}: {v:.0f} W", style='List Bullet')
+
+    # --- 8. PRESUPUESTO ---
+    doc.add_heading('8. Presupuesto Estimado (CAPEX)', level=1)
+    doc.add_paragraph("Estimación de costes de ejecución material (PEM) basada en precios de mercado de referencia:")
+    
+    anadir_tabla(doc, df_capex, miles=True)
+    
+    total_capex = df_capex['Total (€)'].sum()
+    doc.add_paragraph(f"\nTOTAL ESTIMADO: {total_capex:,.2f} €", style='Heading 2')
+
+    # --- 9. SENSIBILIDAD ---
+    if df_sensibilidad is not None:
+        doc.add_heading('9. Análisis de Sensibilidad', level=1)
+        doc.add_paragraph("Variación del CAPEX y de la PUE al mover cada parámetro de diseño y cada precio unitario "
+                          "de referencia en su rango (parámetros de texto: las alternativas del formulario). Los enteros "
+                          "pequeños no admiten pasos tan finos: se recorren con su paso mínimo (±1, columna Paso) y se "
+                          "ordenan por su variación escalada al rango común. La elasticidad es la "
+                          "pendiente media en el rango: donde un catálogo (transformadores, blindobarras, diámetros de "
+                          "tubería, nº de equipos) salta de escalón, la variación no es proporcional y se indica el escalón.")
+        if fig_tornado:
+            _anadir_imagen(doc, fig_tornado, Inches(6.5))
+        anadir_tabla(doc, df_sensibilidad.drop(columns=["Base", "Rango"]))
+
+    if destino is not None:
+        doc.save(destino)
+        return destino
+    buffer = BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    return buffer
+
@@ -0,0 +1,236 @@
+# ==============================================================================
+# IMPORTACIÓN EN STREAMING DE INVENTARIOS DE ACTIVOS (CSV / PARQUET)
+# ==============================================================================
+# Un export de DCIM trae una fila por servidor (millones). Se lee por bloques
+# (pandas chunksize o record batches de Arrow) y cada bloque se agrega por rack
+# al momento: sólo quedan en memoria el bloque en curso y un acumulador por rack
+# (servidores, potencias, captura DLC, alimentación, cerramiento y planta). El
+# resultado es un InventarioRacks para dimensionar_racks o, con
+# escenario_equivalente, los parámetros de DisenadorV14.
+import time
+
+import numpy as np
+
+from cpd_racks import ALIMENTACIONES, InventarioRacks
+
+BLOQUE_FILAS_DEFECTO = 200_000
+
+# Columnas reconocidas (minúsculas); columnas={"rack": "Mi columna", ...} fuerza otras
+COLUMNAS = {
+    "rack": ("rack", "rack_id", "id_rack", "rack_name", "ubicacion_rack"),
+    "cerramiento": ("cerramiento", "pasillo", "pod", "enclosure", "fila", "row"),
+    "planta": ("planta", "sala", "floor", "room"),
+    "P_max": ("p_max", "potencia_max", "potencia_w", "nameplate_w", "max_power_w", "power_w"),
+    "P_idle": ("p_idle", "potencia_idle", "idle_w", "idle_power_w"),
+    "captura_dlc": ("captura_dlc", "dlc", "liquid_fraction"),
+    "alimentacion": ("alimentacion", "feed", "psu_feed", "lado"),
+    "cantidad": ("cantidad", "unidades", "qty", "quantity"),
+}
+OBLIGATORIAS = ("rack", "cerramiento", "P_max")
+ETIQUETAS = ("rack", "cerramiento", "planta")
+
+# Alimentación como máscara de lados: A=1, B=2, A+B=3 (índice en ALIMENTACIONES = máscara - 1)
+_MASCARA_LADOS = {"A": 1, "B": 2, "AB": 3, "BA": 3, "2N": 3, "DUAL": 3}
+
+
+def _mascara_alimentacion(texto):
+    # "A+B", "a/b", "A y B"... -> 3; desconocido -> 3 (ambos lados: lo conservador)
+    clave = "".join(ch for ch in str(texto).upper() if ch.isalnum()).replace("Y", "")
+    return _MASCARA_LADOS.get(clave, 3)
+
+
+def _resolver_columnas(disponibles, columnas, ruta):
+    nombres = {str(c).strip().lower(): c for c in disponibles}
+    resueltas = {}
+    for clave, opciones in COLUMNAS.items():
+        if columnas and clave in columnas:
+            if columnas[clave] not in disponibles:
+                raise ValueError(f"{ruta}: no existe la columna '{columnas[clave]}' ({clave})")
+            resueltas[clave] = columnas[clave]
+        else:
+            encontrada = next((nombres[o] for o in opciones if o in nombres), None)
+            if encontrada is not None: resueltas[clave] = encontrada
+    faltan = [c for c in OBLIGATORIAS if c not in resueltas]
+    if faltan:
+        raise ValueError(f"{ruta}: faltan columnas {faltan}; nombres reconocidos: "
+                         + "; ".join(f"{c}: {', '.join(COLUMNAS[c])}" for c in faltan))
+    return resueltas
+
+
+def _bloques(ruta, columnas, bloque):
+    # (columnas resueltas, iterador de DataFrames con sólo esas columnas)
+    import pandas as pd
+    if ruta.lower().endswith((".parquet", ".pq")):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Instala 'pyarrow' para leer inventarios Parquet.")
+        fichero = pq.ParquetFile(ruta)
+        resueltas = _resolver_columnas(fichero.schema_arrow.names, columnas, ruta)
+        lotes = fichero.iter_batches(batch_size=bloque, columns=list(resueltas.values()))
+        return resueltas, (lote.to_pandas() for lote in lotes)
+    resueltas = _resolver_columnas(list(pd.read_csv(ruta, nrows=0).columns), columnas, ruta)
+    texto = {resueltas[c]: str for c in ETIQUETAS + ("alimentacion",) if c in resueltas}
+    return resueltas, pd.read_csv(ruta, usecols=list(resueltas.values()), dtype=texto, chunksize=bloque)
+
+
+class _Etiquetas:
+    # Etiqueta -> índice global estable entre bloques (orden de primera aparición)
+    def __init__(self):
+        self.indice = {}
+
+    def codificar(self, serie):
+        # (código local por fila, índice global de cada código local)
+        import pandas as pd
+        codigos, unicos = pd.factorize(serie)
+        ids = np.fromiter((self.indice.setdefault(u, len(self.indice)) for u in unicos), dtype=np.int64, count=len(unicos))
+        return codigos, ids
+
+    def array(self):
+        return np.array(list(self.indice), dtype=object)
+
+
+class _AcumuladorRacks:
+    # Columnas por rack que crecen por duplicación (amortizado O(1) por rack nuevo)
+    CAMPOS = {"servidores": np.float64, "P_max": np.float64, "P_idle": np.float64, "P_dlc": np.float64,
+              "lados": np.uint8, "cerramiento": np.int64, "planta": np.int64}
+
+    def __init__(self):
+        self.n = 0
+        self.col = {k: np.zeros(1024, dtype=t) for k, t in self.CAMPOS.items()}
+        self.col["cerramiento"][:] = -1; self.col["planta"][:] = -1
+
+    def asegurar(self, n):
+        if n > len(self.col["servidores"]):
+            capacidad = max(n, 2 * len(self.col["servidores"]))
+            for k, v in self.col.items():
+                nuevo = np.full(capacidad, -1 if k in ("cerramiento", "planta") else 0, dtype=v.dtype)
+                nuevo[:len(v)] = v; self.col[k] = nuevo
+        self.n = max(self.n, n)
+
+
+def _primera_aparicion(codigos):
+    # Posición de la primera fila de cada código de pd.factorize (los códigos nuevos aparecen en orden)
+    maximo = np.maximum.accumulate(codigos)
+    return np.flatnonzero(np.r_[True, maximo[1:] > maximo[:-1]])
+
+
+def importar_inventario(ruta, bloque=BLOQUE_FILAS_DEFECTO, columnas=None, progreso=None):
+    """Lee un inventario de servidores (CSV o Parquet, una fila por servidor) por bloques.
+
+    Cada fila aporta `cantidad` servidores (1 si no hay columna) a su rack; P_max y P_idle
+    en W por servidor, captura_dlc en fracción o %. Un rack con servidores en A y en B se
+    trata como A+B. Filas sin rack, cerramiento o P_max se descartan; las que no traen planta
+    se cuentan como incompletas y un rack sin planta en ninguna fila queda con planta "".
+    progreso(filas, s) se llama tras cada bloque. Devuelve {"inventario", "planta" (etiqueta
+    por rack o None sin columna de planta), "estadisticas"}.
+    """
+    import pandas as pd
+    t0 = time.perf_counter()
+    resueltas, bloques = _bloques(ruta, columnas, bloque)
+    racks, cerramientos, plantas = _Etiquetas(), _Etiquetas(), _Etiquetas()
+    acc = _AcumuladorRacks()
+    est = {"filas": 0, "filas_descartadas": 0, "filas_incoherentes": 0, "filas_sin_planta": 0, "bloques": 0}
+
+    for df in bloques:
+        n = len(df)
+        est["filas"] += n; est["bloques"] += 1
+        numero = lambda c, defecto: (np.array(pd.to_numeric(df[resueltas[c]], errors="coerce"), dtype=float)
+                                     if c in resueltas else np.full(n, defecto))
+        P_max, cantidad = numero("P_max", np.nan), numero("cantidad", 1.0)
+        valida = ~np.isnan(P_max) & ~np.isnan(cantidad)
+        for c in ETIQUETAS[:2]:
+            valida &= np.asarray(df[resueltas[c]].notna())
+        if not valida.all():
+            est["filas_descartadas"] += int(n - valida.sum())
+            df, P_max, cantidad = df[valida], P_max[valida], cantidad[valida]
+            n = len(df)
+        if not n:
+            continue
+        P_idle, dlc = np.nan_to_num(numero("P_idle", 0.0)), np.nan_to_num(numero("captura_dlc", 0.0))
+        dlc = np.where(dlc > 1, dlc / 100, dlc)
+
+        # --- Sumas por rack del bloque, volcadas a su posición global ---
+        codigos, ids = racks.codificar(df[resueltas["rack"]])
+        acc.asegurar(len(racks.indice))
+        suma = lambda w: np.bincount(codigos, weights=w, minlength=len(ids))
+        col = acc.col
+        col["servidores"][ids] += suma(cantidad)
+        col["P_max"][ids] += suma(cantidad * P_max)
+        col["P_idle"][ids] += suma(cantidad * P_idle)
+        col["P_dlc"][ids] += suma(cantidad * P_max * dlc)
+        if "alimentacion" in resueltas:
+            cod_a, unicos_a = pd.factorize(df[resueltas["alimentacion"]])
+            lados = np.append([_mascara_alimentacion(u) for u in unicos_a], 3).astype(np.uint8)[cod_a]   # -1 (vacía) -> A+B
+            col["lados"][ids] |= ((suma(lados & 1) > 0) * 1 + (suma(lados & 2) > 0) * 2).astype(np.uint8)
+        else:
+            col["lados"][ids] = 3
+
+        # --- Cerramiento y planta: los de la primera fila del rack; se cuentan las filas que discrepan ---
+        primero = _primera_aparicion(codigos)
+        for clave, etiquetas in (("cerramiento", cerramientos), ("planta", plantas)):
+            if clave not in resueltas:
+                continue
+            cod_e, ids_e = etiquetas.codificar(df[resueltas[clave]])
+            por_fila = np.where(cod_e >= 0, ids_e[cod_e] if len(ids_e) else -1, -1)
+            if clave == "planta": est["filas_sin_planta"] += int((cod_e < 0).sum())
+            nuevos = col[clave][ids] < 0
+            col[clave][ids[nuevos]] = por_fila[primero][nuevos]
+            est["filas_incoherentes"] += int((col[clave][ids][codigos] != por_fila).sum())
+
+        if progreso: progreso(est["filas"], time.perf_counter() - t0)
+
+    n = acc.n
+    col = {k: v[:n] for k, v in acc.col.items()}
+    if not n:
+        raise ValueError(f"{ruta}: ninguna fila válida")
+    por_servidor = lambda v: np.divide(v, col["servidores"], out=np.zeros(n), where=col["servidores"] > 0)
+    inv = InventarioRacks(cerramientos.array()[col["cerramiento"]], np.rint(col["servidores"]).astype(np.int32),
+                          por_servidor(col["P_max"]), por_servidor(col["P_idle"]),
+                          np.divide(col["P_dlc"], col["P_max"], out=np.zeros(n), where=col["P_max"] > 0),
+                          np.array(ALIMENTACIONES)[col["lados"].astype(np.int64) - 1], nombres=racks.array())
+    planta = None
+    if "planta" in resueltas:
+        # -1 = rack sin planta en ninguna fila: "" explícito (indexar con -1 daría la última etiqueta)
+        etiquetas = np.append(plantas.array(), "")
+        planta = etiquetas[np.where(col["planta"] >= 0, col["planta"], len(etiquetas) - 1)]
+        est["racks_sin_planta"] = int((col["planta"] < 0).sum())
+    est["segundos"] = time.perf_counter() - t0
+    est.update(racks=n, cerramientos=len(inv.cerramientos), filas_por_segundo=est["filas"] / max(est["segundos"], 1e-9),
+               columnas=resueltas)
+    return {"inventario": inv, "planta": planta, "estadisticas": est}
+
+
+def resumen_plantas(importacion, res):
+    # Totales por planta/sala (DataFrame) a partir del resultado de dimensionar_racks
+    import pandas as pd
+    planta = importacion["planta"]
+    if planta is None:
+        return None
+    codigos, nombres = pd.factorize(planta, sort=True)
+    suma = lambda w=None: np.bincount(codigos, weights=w, minlength=len(nombres))
+    inv = importacion["inventario"]
+    return pd.DataFrame({"planta": nombres, "racks": suma().astype(int),
+                         "cerramientos": [len(np.unique(inv.cerramiento[codigos == i])) for i in range(len(nombres))],
+                         "servidores": suma(inv.servidores).astype(int), "P_IT (kW)": suma(res["rack"]["P_operacion_kW"]),
+                         "P_IT máx. (kW)": suma(res["rack"]["P_kW"]), "Q DLC (kW)": suma(res["rack"]["Q_DLC_kW"])})
+
+
+def inventario_sintetico(ruta, n_filas, servidores_por_rack=20, racks_por_cerramiento=24, semilla=0):
+    """Export de prueba (CSV) con n_filas servidores: planta, cerramiento, rack, modelo, potencias y alimentación."""
+    import pandas as pd
+    rng = np.random.default_rng(semilla)
+    escritos = 0
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        while escritos < n_filas:
+            i = np.arange(escritos, min(n_filas, escritos + BLOQUE_FILAS_DEFECTO))
+            rack = i // servidores_por_rack; cerr = rack // racks_por_cerramiento
+            P_max = rng.choice([250.0, 400.0, 500.0, 700.0, 1000.0], len(i))
+            pd.DataFrame({"planta": "P" + (cerr // 50).astype(str), "cerramiento": "C" + cerr.astype(str),
+                          "rack": "R" + rack.astype(str), "servidor": "S" + i.astype(str), "P_max": P_max,
+                          "P_idle": np.round(P_max * rng.uniform(0.2, 0.35, len(i))),
+                          "captura_dlc": np.where(cerr % 5 == 0, 0.8, 0.0),
+                          "alimentacion": rng.choice(["A+B", "A+B", "A+B", "A", "B"], len(i))}
+                         ).to_csv(f, index=False, header=escritos == 0)
+            escritos += len(i)
+    return ruta
@@ -0,0 +1,103 @@
+# ==============================================================================
+# GENERACIÓN DE INFORMES POR LOTES (UN DOCX POR ESCENARIO)
+# ==============================================================================
+# Cada escenario (fila de una hoja de variantes) se calcula y se exporta a Word en
+# un proceso del pool: motor, tablas, gráficos y crear_documento_proyecto_word.
+# Un fallo (dimensionado imposible, dato inválido...) sólo marca su escenario; el
+# resto del lote sigue. Al terminar se escribe un índice con el estado de cada uno.
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+INDICE_LOTE = "indice.csv"
+
+# Grafo por proceso: variantes de un mismo diseño comparten los nodos no afectados
+_GRAFO = None
+
+
+def _nombre_fichero(nombre, usados):
+    base = re.sub(r"[^\w.-]+", "_", nombre).strip("._") or "escenario"
+    nombre, n = base, 1
+    while nombre.lower() in usados:
+        n += 1; nombre = f"{base}_{n}"
+    usados.add(nombre.lower())
+    return nombre + ".docx"
+
+
+def informe_escenario(escenario, extra, ruta):
+    """Calcula un escenario y escribe su proyecto ejecutivo en `ruta`. Devuelve la fila del índice."""
+    global _GRAFO
+    from cpd_grafo import GrafoProyecto
+    from cpd_motor import calcular_metricas_sostenibilidad
+    from cpd_informe import png_grafico_metricas, png_grafico_consumos, png_grafico_tornado, crear_documento_proyecto_word
+    from cpd_sensibilidad import analizar_sensibilidad, tabla_sensibilidad
+    t = time.perf_counter()
+    if _GRAFO is None: _GRAFO = GrafoProyecto()
+    proyecto = _GRAFO.proyecto(escenario)
+    diseno, dfs, consumos = proyecto["diseno"], proyecto["dfs"], proyecto["consumos"]
+    metricas = calcular_metricas_sostenibilidad(diseno, extra["WCR"], extra["CEF"])
+    sens = analizar_sensibilidad(escenario)
+    # Fichero temporal + renombrado: un fallo a mitad no deja un .docx corrupto
+    crear_documento_proyecto_word(diseno, dfs["elec"], dfs["hvac"], dfs["hidro"], dfs["pci"], consumos, dfs["capex"],
+                                  dfs["ratios"], png_grafico_consumos(consumos), png_grafico_metricas(metricas),
+                                  destino=ruta + ".tmp", fig_tornado=png_grafico_tornado(sens),
+                                  df_sensibilidad=tabla_sensibilidad(sens, 15))
+    os.replace(ruta + ".tmp", ruta)
+    return {"PUE": metricas["PUE"], "P_IT (kW)": diseno.P_IT_demandada / 1000,
+            "CAPEX total (€)": float(dfs["capex"]["Total (€)"].sum()), "segundos": time.perf_counter() - t}
+
+
+def _informe_aislado(args):
+    # Se ejecuta en el pool: cualquier excepción queda en la fila de su escenario
+    escenario, extra, ruta = args
+    try:
+        return {"estado": "ok", "error": "", **informe_escenario(escenario, extra, ruta)}
+    except Exception as e:
+        if os.path.exists(ruta + ".tmp"): os.remove(ruta + ".tmp")
+        return {"estado": "error", "error": f"{type(e).__name__}: {e}"}
+
+
+def generar_lote(escenarios, carpeta, procesos=None, progreso=None):
+    """Un DOCX por escenario en `carpeta` e índice INDICE_LOTE con el resultado de cada uno.
+
+    escenarios: lista de (parámetros de DisenadorV14, extra con nombre/WCR/CEF).
+    progreso(hechos, total, fila) se llama al terminar cada escenario. Devuelve el índice (DataFrame).
+    """
+    import pandas as pd
+    os.makedirs(carpeta, exist_ok=True)
+    procesos = min(procesos or os.cpu_count() or 1, max(1, len(escenarios)))
+    usados = set()
+    tareas = [(esc, extra, os.path.join(carpeta, _nombre_fichero(extra["nombre"], usados))) for esc, extra in escenarios]
+    filas = [None] * len(tareas)
+
+    def anotar(i, res):
+        filas[i] = {"nombre": tareas[i][1]["nombre"], "fichero": os.path.basename(tareas[i][2]) if res["estado"] == "ok" else "",
+                    **res}
+        if progreso: progreso(sum(f is not None for f in filas), len(filas), filas[i])
+
+    if procesos == 1:
+        for i, tarea in enumerate(tareas): anotar(i, _informe_aislado(tarea))
+    else:
+        rotas = []
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            futuros = {pool.submit(_informe_aislado, tarea): i for i, tarea in enumerate(tareas)}
+            for futuro in as_completed(futuros):
+                try:
+                    anotar(futuros[futuro], futuro.result())
+                except BrokenProcessPool:
+                    rotas.append(futuros[futuro])
+        # Si un proceso murió (memoria, señal) el pool arrastra todas sus tareas pendientes:
+        # se repiten una a una en un proceso propio para que sólo falle la culpable
+        for i in sorted(rotas):
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                try:
+                    res = pool.submit(_informe_aislado, tareas[i]).result()
+                except BrokenProcessPool as e:
+                    res = {"estado": "error", "error": f"BrokenProcessPool: {e}"}
+            anotar(i, res)
+
+    indice = pd.DataFrame(filas, columns=["nombre", "estado", "fichero", "PUE", "P_IT (kW)", "CAPEX total (€)", "segundos", "error"])
+    indice.to_csv(os.path.join(carpeta, INDICE_LOTE), index=False)
+    return indice
@@ -0,0 +1,222 @@
+# ==============================================================================
+# SUITE DE MEDIDAS DE RENDIMIENTO CON HISTORIAL Y UMBRALES DE REGRESIÓN
+# ==============================================================================
+# Cronometra, sobre escenarios pequeño / mediano / enorme, cada fase que ve el
+# usuario: construcción de DisenadorV14 y sus dimensionar_*, presupuesto, tablas
+# generar_tabla_*, los dos gráficos (hasta el PNG), el DOCX y, en un proceso
+# aparte con pantalla (virtual en CI: xvfb-run), render_dataframe/render_kpi_tab.
+# Cada ejecución se añade como una línea JSON al historial y se compara con los
+# umbrales absolutos del repositorio y con las últimas ejecuciones de la misma
+# máquina: una ralentización hace fallar la ejecución.
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from cpd_motor import ESCENARIO_DEFECTO
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+RUTA_UMBRALES = os.path.join(DIRECTORIO, "medidas", "umbrales.json")
+RUTA_HISTORIAL = os.path.join(DIRECTORIO, "medidas", "historial.jsonl")
+
+# Cambios sobre ESCENARIO_DEFECTO (40 kW / 240 kW / 24 MW IT con red hidráulica)
+ESCENARIOS_MEDIDA = {
+    "pequeno": {"num_cerramientos": 1, "racks_por_cerramiento": 8, "num_plantas": 1, "area_por_planta": 150.0,
+                "area_sala_it": 100.0, "cctv_unidades": 4, "control_accesos_pax": 2},
+    "mediano": {},
+    "enorme": {"num_cerramientos": 120, "racks_por_cerramiento": 20, "servidores_por_rack": 20,
+               "cerramientos_con_dlc": 60, "num_plantas": 8, "area_por_planta": 6000.0, "area_sala_it": 30000.0,
+               "modelo_hidraulico": "Red hidráulica", "cctv_unidades": 400, "control_accesos_pax": 200},
+}
+WCR_MEDIDA, CEF_MEDIDA = 0.5, 0.35
+CASOS_GUI = ("gui.render_dataframe", "gui.render_kpi_tab")
+
+TIEMPO_MIN_S = 0.3         # repeticiones de un caso hasta sumar este tiempo...
+REPETICIONES_MIN = 5       # ...con este mínimo...
+REPETICIONES_MAX = 200     # ...y este máximo
+FACTOR_HISTORIAL = 1.5     # regresión: mediana > factor x mediana de las últimas ejecuciones...
+MARGEN_HISTORIAL_MS = 0.5  # ...y además más de este margen (ruido en casos de microsegundos)
+VENTANA_HISTORIAL = 5      # ejecuciones previas de la misma máquina que hacen de referencia
+FACTOR_UMBRALES = 3.0      # --actualizar-umbrales: umbral = factor x mediana medida
+
+
+def escenario_medida(tamano):
+    return {**ESCENARIO_DEFECTO, **ESCENARIOS_MEDIDA[tamano]}
+
+
+def maquina():
+    # Clave para comparar sólo con ejecuciones comparables del historial
+    return f"{platform.system()}-{platform.machine()}-{os.cpu_count()}cpu-py{platform.python_version()}"
+
+
+def cronometrar(funcion, tiempo_min=TIEMPO_MIN_S):
+    """Mediana y mínimo (ms) de repetir funcion() hasta tiempo_min (entre REPETICIONES_MIN y _MAX).
+
+    La primera llamada (caché fría, figuras nuevas) se mide aparte y no entra en la mediana.
+    """
+    gc.collect()
+    t = time.perf_counter(); funcion(); primera = time.perf_counter() - t
+    tiempos, total = [], 0.0
+    while len(tiempos) < REPETICIONES_MIN or (total < tiempo_min and len(tiempos) < REPETICIONES_MAX):
+        t = time.perf_counter(); funcion(); dt = time.perf_counter() - t
+        tiempos.append(dt); total += dt
+    return {"mediana_ms": round(float(np.median(tiempos)) * 1000, 4), "min_ms": round(min(tiempos) * 1000, 4),
+            "primera_ms": round(primera * 1000, 4), "repeticiones": len(tiempos)}
+
+
+# --- Casos ---
+def casos_motor(escenario):
+    """[(nombre, función sin argumentos)] de motor, tablas, gráficos y DOCX para un escenario.
+
+    Cada caso reutiliza los resultados de las fases anteriores, calculados una vez aquí.
+    La red hidráulica (redes_diseno, memorizada con lru_cache) se resuelve en frío en cada
+    repetición: con la caché, sólo la primera llamada mediría el solver.
+    """
+    from cpd_hidraulica import redes_diseno
+    from cpd_motor import (MODELO_RED, DisenadorV14, generar_tabla_electrico, generar_tabla_hvac_limpia,
+                           generar_tabla_hidraulica_unificada, generar_tabla_pci, generar_tabla_control,
+                           generar_tabla_ratios)
+    from cpd_informe import HAS_DOCX, crear_documento_proyecto_word, generar_grafico_consumos, generar_grafico_metricas, imagen_png
+    d = DisenadorV14(**escenario)
+    res_elec, res_hvac, res_dlc = d.dimensionar_sistema_electrico(), d.dimensionar_sistema_hvac_completo(), d.dimensionar_dlc_hidraulica()
+    kpis = d.calcular_kpis_densidad(res_hvac["Q_Instalada_kW"], res_elec["S_Total_N_kVA"])
+    consumos = d.calcular_consumos_desglosados()
+    tablas = {"capex": d.calcular_presupuesto_detallado(res_elec, res_hvac, res_dlc),
+              "elec": generar_tabla_electrico(d, res_elec), "hvac": generar_tabla_hvac_limpia(d, res_hvac),
+              "hidro": generar_tabla_hidraulica_unificada(d, res_hvac, res_dlc), "pci": generar_tabla_pci(d),
+              "ratios": generar_tabla_ratios(kpis)}
+    casos = [
+        ("motor.DisenadorV14", lambda: (redes_diseno.cache_clear(), DisenadorV14(**escenario))),
+        ("motor.dimensionar_sistema_electrico", d.dimensionar_sistema_electrico),
+        ("motor.dimensionar_sistema_hvac_completo", d.dimensionar_sistema_hvac_completo),
+        ("motor.dimensionar_dlc_hidraulica", d.dimensionar_dlc_hidraulica),
+        ("motor.calcular_presupuesto_detallado", lambda: d.calcular_presupuesto_detallado(res_elec, res_hvac, res_dlc)),
+        ("tablas.generar_tabla_electrico", lambda: generar_tabla_electrico(d, res_elec)),
+        ("tablas.generar_tabla_hvac_limpia", lambda: generar_tabla_hvac_limpia(d, res_hvac)),
+        ("tablas.generar_tabla_hidraulica_unificada", lambda: generar_tabla_hidraulica_unificada(d, res_hvac, res_dlc)),
+        ("tablas.generar_tabla_pci", lambda: generar_tabla_pci(d)),
+        ("tablas.generar_tabla_control", lambda: generar_tabla_control(d)),
+        ("tablas.generar_tabla_ratios", lambda: generar_tabla_ratios(kpis)),
+        # Figura nueva y rasterizada a PNG, como en la exportación sin caché
+        ("graficos.generar_grafico_metricas", lambda: imagen_png(generar_grafico_metricas(d, WCR_MEDIDA, CEF_MEDIDA))),
+        ("graficos.generar_grafico_consumos", lambda: imagen_png(generar_grafico_consumos(consumos))),
+    ]
+    if d.modelo_hidraulico == MODELO_RED:
+        # Sólo el solver de la red: las cargas de refrigeración con la caché vacía
+        casos.insert(1, ("motor.redes_diseno", lambda: (redes_diseno.cache_clear(),
+                                                        d._calcular_cargas_electricas_refrigeracion())))
+    if HAS_DOCX:
+        from io import BytesIO
+        import pandas as pd
+        pngs = imagen_png(generar_grafico_consumos(consumos)), imagen_png(generar_grafico_metricas(d, WCR_MEDIDA, CEF_MEDIDA))
+        pci = pd.concat([tablas["pci"], generar_tabla_control(d)])
+        casos.append(("docx.crear_documento_proyecto_word", lambda: crear_documento_proyecto_word(
+            d, tablas["elec"], tablas["hvac"], tablas["hidro"], pci, consumos, tablas["capex"], tablas["ratios"], *pngs,
+            destino=BytesIO())))
+    return casos
+
+
+def medir_gui(tamanos, tiempo_limite=600):
+    # render_dataframe / render_kpi_tab en la ventana real (cpd_desktop.py --medir-render) en un
+    # proceso aparte: este módulo y la CLI no importan tkinter. Devuelve (casos, motivo si se omite)
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "render.json")
+        try:
+            p = subprocess.run([sys.executable, os.path.join(DIRECTORIO, "cpd_desktop.py"), "--medir-render", ruta,
+                                ",".join(tamanos)], capture_output=True, text=True, timeout=tiempo_limite)
+        except subprocess.TimeoutExpired:
+            return {}, f"la GUI no terminó en {tiempo_limite} s"
+        if p.returncode != 0 or not os.path.exists(ruta):
+            ultima = (p.stderr.strip().splitlines() or ["sin salida"])[-1]
+            return {}, f"la GUI no arrancó ({ultima})"
+        with open(ruta, encoding="utf-8") as f:
+            return json.load(f), None
+
+
+def ejecutar_suite(tamanos=tuple(ESCENARIOS_MEDIDA), gui=True, filtro=None, progreso=None):
+    """Mide todos los casos en cada tamaño. Devuelve el registro del historial:
+    {"fecha", "commit", "maquina", "casos": {"tamaño/caso": cronometrar(...)}, "omitidos": {...}}."""
+    casos, omitidos = {}, {}
+    for tamano in tamanos:
+        for nombre, funcion in casos_motor(escenario_medida(tamano)):
+            clave = f"{tamano}/{nombre}"
+            if filtro and filtro not in clave: continue
+            casos[clave] = cronometrar(funcion)
+            if progreso: progreso(clave, casos[clave])
+    if gui and (not filtro or any(filtro in f"{t}/{c}" for t in tamanos for c in CASOS_GUI)):
+        medidos, motivo = medir_gui(tamanos)
+        if motivo:
+            omitidos["gui"] = motivo
+        for clave, m in medidos.items():
+            if filtro and filtro not in clave: continue
+            casos[clave] = m
+            if progreso: progreso(clave, m)
+    return {"fecha": datetime.datetime.now().isoformat(timespec="seconds"), "commit": _commit(), "maquina": maquina(),
+            "casos": casos, "omitidos": omitidos}
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=DIRECTORIO, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# --- Historial y umbrales ---
+def cargar_historial(ruta=RUTA_HISTORIAL):
+    if not os.path.exists(ruta): return []
+    with open(ruta, encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def anadir_historial(resultado, ruta=RUTA_HISTORIAL):
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+
+
+def cargar_umbrales(ruta=RUTA_UMBRALES):
+    # {"tamaño/caso": ms máximos de la mediana}
+    if not os.path.exists(ruta): return {}
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)["casos"]
+
+
+def guardar_umbrales(resultado, ruta=RUTA_UMBRALES, factor=FACTOR_UMBRALES):
+    # Umbrales = factor x mediana de esta ejecución (al menos 1 ms), para casos nuevos o tras un cambio aceptado
+    casos = {c: round(max(1.0, factor * m["mediana_ms"]), 1) for c, m in sorted(resultado["casos"].items())}
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump({"generado": {"fecha": resultado["fecha"], "commit": resultado["commit"], "maquina": resultado["maquina"],
+                                "factor": factor}, "casos": casos}, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def comparar(resultado, umbrales=None, historial=(), factor=FACTOR_HISTORIAL, ventana=VENTANA_HISTORIAL):
+    """Regresiones de un resultado: [{"caso", "mediana_ms", "limite_ms", "motivo"}].
+
+    "umbral": la mediana supera el umbral absoluto del caso. "historial": supera factor x la
+    mediana de las últimas `ventana` ejecuciones de la misma máquina (y MARGEN_HISTORIAL_MS).
+    """
+    previos = [h for h in historial if h.get("maquina") == resultado["maquina"]][-ventana:]
+    fallos = []
+    for caso, m in resultado["casos"].items():
+        limite = (umbrales or {}).get(caso)
+        if limite is not None and m["mediana_ms"] > limite:
+            fallos.append({"caso": caso, "mediana_ms": m["mediana_ms"], "limite_ms": limite, "motivo": "umbral"})
+        referencia = [h["casos"][caso]["mediana_ms"] for h in previos if caso in h["casos"]]
+        if referencia:
+            base = float(np.median(referencia))
+            limite = max(factor * base, base + MARGEN_HISTORIAL_MS)
+            if m["mediana_ms"] > limite:
+                fallos.append({"caso": caso, "mediana_ms": m["mediana_ms"], "limite_ms": round(limite, 4),
+                               "motivo": f"historial ({len(referencia)} ejecuciones)"})
+    return fallos
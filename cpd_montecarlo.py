@@ -0,0 +1,74 @@
+# ==============================================================================
+# MONTE CARLO DE INCERTIDUMBRE DEL CAPEX
+# ==============================================================================
+# El presupuesto se trata como cantidades x precios: descomponer_capex da, para
+# un escenario, la matriz Q (categoría, grupo de factor, precio) y cada sorteo es
+# una fila de la matriz de precios muestreados. Un bloque de sorteos se evalúa con
+# un único producto matricial; no se construye ningún DataFrame por sorteo.
+import numpy as np
+
+from cpd_motor import PRECIOS_REF, CATEGORIAS_CAPEX, FACTORES_CANTIDAD, descomponer_capex
+
+# Distribución: número fijo | ("triangular", min, moda, max) | ("uniforme", min, max)
+#               | ("normal", media, desviación) | ("lognormal", mediana, sigma)
+PERCENTILES_DEFECTO = (10, 50, 90)
+
+
+def distribuciones_por_defecto(incertidumbre_precios=0.15):
+    d = {k: ("triangular", p * (1 - incertidumbre_precios), p, p * (1 + incertidumbre_precios))
+         for k, p in PRECIOS_REF.items()}
+    d.update({"factor_longitud_cableado": ("triangular", 0.9, 1.0, 1.3),
+              "factor_longitud_tuberia": ("triangular", 0.9, 1.0, 1.3),
+              "factor_longitud_comms": ("triangular", 0.9, 1.0, 1.2)})
+    return d
+
+
+def muestrear_distribucion(spec, n, rng):
+    if np.isscalar(spec):
+        return np.full(n, float(spec))
+    tipo, *p = spec
+    if tipo == "triangular": return rng.triangular(p[0], p[1], p[2], n)
+    if tipo == "uniforme": return rng.uniform(p[0], p[1], n)
+    if tipo == "normal": return rng.normal(p[0], p[1], n)
+    if tipo == "lognormal": return p[0] * rng.lognormal(0.0, p[1], n)
+    raise ValueError(f"Distribución desconocida: {tipo}")
+
+
+def simular_capex(escenario, distribuciones=None, n=1_000_000, semilla=0, bloque=250_000,
+                  percentiles=PERCENTILES_DEFECTO, devolver_muestras=False):
+    """Monte Carlo del CAPEX de un escenario (dict de parámetros de DisenadorV14).
+
+    Precios de PRECIOS_REF y factores de FACTORES_CANTIDAD sin distribución quedan
+    fijos en su valor de referencia. Devuelve un DataFrame con una fila por
+    categoría (más "Total") y columnas P10/P50/P90, media y valor determinista.
+    """
+    import pandas as pd
+    distribuciones = distribuciones_por_defecto() if distribuciones is None else distribuciones
+    rng = np.random.default_rng(semilla)
+
+    claves, Q = descomponer_capex(escenario)
+    Q = Q[:, :, 0, :]                                   # (categoría, grupo, precio)
+    usados = np.flatnonzero(Q.any(axis=(0, 1)))        # sólo se muestrean los precios que intervienen
+    Q = Q[:, :, usados]
+    claves = [claves[k] for k in usados]
+    C, G, K = Q.shape
+    Q_plano = Q.reshape(C * G, K).T                    # (precio, categoría*grupo)
+
+    totales = np.empty((n, C))
+    for ini in range(0, n, bloque):
+        b = min(bloque, n - ini)
+        P = np.column_stack([muestrear_distribucion(distribuciones.get(k, PRECIOS_REF[k]), b, rng) for k in claves])
+        F = np.column_stack([np.ones(b)] + [muestrear_distribucion(distribuciones.get(f, 1.0), b, rng) for f in FACTORES_CANTIDAD])
+        totales[ini:ini + b] = ((P @ Q_plano).reshape(b, C, G) * F[:, None, :]).sum(axis=2)
+
+    p_ref = np.array([PRECIOS_REF[k] for k in claves])
+    determinista = Q.sum(axis=1) @ p_ref
+    filas = list(CATEGORIAS_CAPEX) + ["Total"]
+    todas = np.column_stack([totales, totales.sum(axis=1)])
+    cuantiles = np.percentile(todas, percentiles, axis=0)
+    df = pd.DataFrame({"Categoría": filas})
+    for p, valores in zip(percentiles, cuantiles):
+        df[f"P{p} (€)"] = valores
+    df["Media (€)"] = todas.mean(axis=0)
+    df["Determinista (€)"] = np.append(determinista, determinista.sum())
+    return (df, todas) if devolver_muestras else df
@@ -0,0 +1,927 @@
+# ==============================================================================
+# MOTOR DE CÁLCULO CPD (SIN GUI)
+# ==============================================================================
+# Módulo ligero: sólo importa NumPy al cargarse. pandas se importa en las
+# funciones que construyen DataFrames, de modo que scripts, workers y la CLI
+# (cpd_cli.py) pueden usar el motor sin arrastrar tkinter, matplotlib ni docx.
+import bisect
+import math
+
+import numpy as np
+
+# ==============================================================================
+# 1. BASE DE PRECIOS UNITARIOS (ORIGINAL)
+# ==============================================================================
+PRECIOS_REF = {
+    # --- OBRA CIVIL / GENERAL ---
+    "Adecuación Sala/Obra Civil (m2)": 850.0,
+    "Refuerzo Estructural (m2)": 150.0,
+    "Suelo Técnico (m2)": 120.0,
+    "Cerramiento/Contención (ud)": 3500.0,
+    
+    # --- ELÉCTRICO ---
+    "Celda MT (ud)": 18000.0,
+    "Trafo 1000-2500kVA (ud)": 45000.0,
+    "Generador Diesel (kVA)": 200.0, 
+    "UPS Modular (kW)": 250.0, 
+    "CGBT (ud)": 25000.0,
+    "Cuadro Distribución IT (ud)": 8000.0,
+    "Blindobarra (m)": 450.0,
+    "Cableado Potencia Grueso (m)": 60.0, 
+    "Cableado Potencia Medio (m)": 25.0,  
+    "Cableado Rack (ud)": 50.0, 
+    "Bandeja Eléctrica (m)": 45.0,
+    
+    # --- CLIMA ---
+    "Chiller (kW)": 150.0, 
+    "CRAH/InRow (ud)": 18000.0,
+    "Tubería Acero DN100-200 (m)": 180.0, 
+    "Tubería Cobre/PPR Pequeña (m)": 45.0,
+    "Válvulas y Accesorios (% Tubería)": 0.30, 
+    "Bomba Circuladora (ud)": 4500.0,
+    
+    # --- DLC ---
+    "CDU (ud)": 35000.0,
+    "Manifold Rack (ud)": 2000.0,
+    "Latiguillos DLC (ud)": 150.0,
+    
+    # --- PCI & SEGURIDAD ---
+    "Centralita Incendios (ud)": 2500.0,
+    "Detector/Sensor (ud)": 150.0,
+    "Cilindro NOVEC 1230 (Kg)": 60.0, 
+    "Cilindro ARGONITE (m3)": 40.0,
+    "Grupo Bombeo Nebulizada (ud)": 40000.0, 
+    "Boquilla Nebulizada (ud)": 200.0,
+    "Cámara CCTV (ud)": 400.0,
+    "Control Acceso (punto)": 1200.0,
+    
+    # --- COMUNICACIONES & BMS ---
+    "Rack 42U (ud)": 1200.0,
+    "Fibra Óptica OM4/OS2 (m)": 8.0,
+    "Cable Cobre Cat6A (m)": 3.0, 
+    "Bandeja Rejilla/Fibra (m)": 40.0,
+    "Punto BMS/Integración (ud)": 350.0
+}
+
+# ==============================================================================
+# MOTOR HIDRÁULICO: TABLA DN PRECALCULADA Y DIMENSIONADO EN FORMA CERRADA
+# ==============================================================================
+CATALOGO_DN = [(50,"PPR/Cobre"),(65,"Acero Carb."),(80,"Acero Carb."),(100,"Acero Carb."),(125,"Acero Carb."),(150,"Acero Carb."),(200,"Acero Carb."),(250,"Acero Carb."),(300,"Acero Carb.")]
+VELOCIDAD_MAX_MS = 2.5
+MAX_CIRCUITOS = 50
+RHO_AGUA = 1000; CP_AGUA = 4.18
+
+# Modelo hidráulico: colector estimado (DN por velocidad, 4 bombas fijas) o red resuelta en
+# cpd_hidraulica (pérdidas de carga, potencia y nº de bombas por circuito)
+MODELO_COLECTOR = "Colector estimado"; MODELO_RED = "Red hidráulica"
+MODELOS_HIDRAULICOS = (MODELO_COLECTOR, MODELO_RED)
+BOMBAS_COLECTOR_ESTIMADO = 4
+
+# Tabla DN -> sección (m2) y caudal máximo por circuito (m3/s) a VELOCIDAD_MAX_MS
+TABLA_DN_MM = np.array([dn for dn, _ in CATALOGO_DN])
+TABLA_DN_MATERIAL = np.array([mat for _, mat in CATALOGO_DN], dtype=object)
+TABLA_DN_AREA_M2 = np.array([np.pi * ((dn/1000.0)**2) / 4.0 for dn, _ in CATALOGO_DN])
+TABLA_DN_CAUDAL_MAX_M3S = TABLA_DN_AREA_M2 * VELOCIDAD_MAX_MS
+_AREA_DN_MAYOR = float(TABLA_DN_AREA_M2[-1])
+_AREAS_DN = TABLA_DN_AREA_M2.tolist(); _CAUDALES_MAX_DN = TABLA_DN_CAUDAL_MAX_M3S.tolist()
+
+
+class ErrorDimensionado(ValueError):
+    # Caudal que no cabe en MAX_CIRCUITOS circuitos del mayor DN del catálogo
+    def __init__(self, mensaje, indices=()):
+        super().__init__(mensaje)
+        self.indices = indices
+
+
+def _circuitos_minimos(V_m3s):
+    # n mínimo con (V/n)/A_DNmayor <= v_max. La estimación por ceil() se corrige
+    # con la misma comparación que el bucle original para no diferir por redondeo.
+    V_m3s = np.asarray(V_m3s, dtype=float)
+    n = np.maximum(np.ceil(V_m3s / (_AREA_DN_MAYOR * VELOCIDAD_MAX_MS)), 1)
+    n = np.where((V_m3s / n) / _AREA_DN_MAYOR > VELOCIDAD_MAX_MS, n + 1, n)
+    n = np.where((n > 1) & ((V_m3s / np.maximum(n - 1, 1)) / _AREA_DN_MAYOR <= VELOCIDAD_MAX_MS), n - 1, n)
+    return n.astype(int)
+
+
+def _indice_dn(caudal_circuito):
+    # Primer DN con caudal/area <= v_max (búsqueda binaria sobre el caudal máximo + ajuste exacto)
+    q = np.asarray(caudal_circuito, dtype=float)
+    ultimo = len(TABLA_DN_MM) - 1
+    idx = np.minimum(np.searchsorted(TABLA_DN_CAUDAL_MAX_M3S, q, side="left"), ultimo)
+    idx = np.where((q / TABLA_DN_AREA_M2[idx] > VELOCIDAD_MAX_MS) & (idx < ultimo), idx + 1, idx)
+    anterior = np.maximum(idx - 1, 0)
+    return np.where((idx > 0) & (q / TABLA_DN_AREA_M2[anterior] <= VELOCIDAD_MAX_MS), anterior, idx)
+
+
+def _circuitos_y_dn(V_m3s):
+    # Versión escalar en Python puro de _circuitos_minimos + _indice_dn (evita la
+    # sobrecarga de NumPy en el cálculo de un único diseño)
+    n = max(math.ceil(V_m3s / (_AREA_DN_MAYOR * VELOCIDAD_MAX_MS)), 1)
+    if (V_m3s / n) / _AREA_DN_MAYOR > VELOCIDAD_MAX_MS: n += 1
+    if n > 1 and (V_m3s / (n - 1)) / _AREA_DN_MAYOR <= VELOCIDAD_MAX_MS: n -= 1
+    q = V_m3s / n
+    ultimo = len(_AREAS_DN) - 1
+    i = min(bisect.bisect_left(_CAUDALES_MAX_DN, q), ultimo)
+    if q / _AREAS_DN[i] > VELOCIDAD_MAX_MS and i < ultimo: i += 1
+    if i > 0 and q / _AREAS_DN[i - 1] <= VELOCIDAD_MAX_MS: i -= 1
+    return n, i
+
+
+def dimensionar_tuberias(Q_kW, delta_T, area_por_planta, num_plantas, altura_planta=4.5, estricto=True):
+    """Dimensiona colectores para arrays de cargas térmicas (kW) y saltos térmicos (K).
+
+    Devuelve un dict de arrays con las mismas claves que _calcular_tuberia_colector.
+    Con `estricto` lanza ErrorDimensionado si algún caudal necesita más de
+    MAX_CIRCUITOS circuitos; si no, esas posiciones quedan a cero y se marcan en "Valido".
+    """
+    Q_kW, delta_T, area_por_planta, num_plantas = np.broadcast_arrays(
+        np.asarray(Q_kW, dtype=float), delta_T, area_por_planta, num_plantas)
+    V_m3s = (Q_kW / (CP_AGUA * delta_T)) / RHO_AGUA
+    longitud_total = (np.sqrt(area_por_planta) * 1.5 + altura_planta * num_plantas) * 2
+
+    con_carga = Q_kW > 0.1
+    n = np.where(con_carga, _circuitos_minimos(np.where(con_carga, V_m3s, 0.0)), 0)
+    excedidos = n > MAX_CIRCUITOS
+    if estricto and excedidos.any():
+        i = np.flatnonzero(excedidos)
+        raise ErrorDimensionado(
+            f"Caudal de {V_m3s.flat[i[0]] * 3600:.1f} m3/h (Q={Q_kW.flat[i[0]]:.0f} kW, ΔT={np.asarray(delta_T).flat[i[0]]} K) "
+            f"requiere {n.flat[i[0]]} circuitos DN{TABLA_DN_MM[-1]} a <= {VELOCIDAD_MAX_MS} m/s (máximo {MAX_CIRCUITOS})"
+            + (f"; {len(i)} casos en total" if len(i) > 1 else ""), indices=i)
+
+    valido = con_carga & ~excedidos
+    n_seguro = np.where(valido, n, 1)
+    caudal_circuito = V_m3s / n_seguro
+    idx = _indice_dn(np.where(valido, caudal_circuito, 0.0))
+    return {
+        "Caudal_Total_m3h": np.where(valido, V_m3s * 3600, 0.0),
+        "DN_mm": np.where(valido, TABLA_DN_MM[idx], 0),
+        "Velocidad_ms": np.where(valido, caudal_circuito / TABLA_DN_AREA_M2[idx], 0.0),
+        "Material": np.where(valido, TABLA_DN_MATERIAL[idx], "-"),
+        "Num_Circuitos": np.where(valido, n, 0),
+        "Longitud_Estimada_m": np.where(valido, longitud_total * n_seguro, 0.0),
+        "Valido": valido | ~con_carga,
+    }
+
+# ==============================================================================
+# 2. CLASE PRINCIPAL: MOTOR DE CÁLCULO (TU CÓDIGO EXACTO)
+# ==============================================================================
+
+class DisenadorV14:
+    def __init__(self, redundancia_electrica, redundancia_hvac, suministro_AB, distribucion_IT_tipo,  
+                 # Carga y Diseño
+                 num_cerramientos, racks_por_cerramiento, servidores_por_rack, tipo_cerramiento, 
+                 P_idle, P_max, 
+                 # Parámetros HVAC/DLC
+                 P_iluminacion, P_otras_fuerza, 
+                 cop_hvac_aire, T_entrada_aire, T_salida_aire, 
+                 prodfrio_tec, intcalor_tec, distribfrio_tec, n_intercambiadores, 
+                 # Parámetros DLC Detallados 
+                 cerramientos_con_dlc, tipo_gen_frio_dlc, cop_dlc_gen, 
+                 tipo_dist_frio_dlc, pot_aux_dlc_dist, eficiencia_captura_dlc, 
+                 # Parámetros Auxiliares
+                 centralitas_incendios, vesda_unidades, grupos_bombeo_pci, cctv_unidades, control_accesos_pax,
+                 # Parámetros V13
+                 tecnologia_pci,
+                 # NUEVOS PARÁMETROS V14 (DIMENSIONALES)
+                 num_plantas, area_por_planta, area_sala_it,
+                 modelo_hidraulico=MODELO_COLECTOR):
+        
+        # --- Datos Dimensionales ---
+        self.num_plantas = num_plantas
+        self.area_por_planta = area_por_planta
+        self.area_sala_it = area_sala_it
+        self.area_total_construida = num_plantas * area_por_planta
+        self.altura_planta = 4.5 
+        
+        # --- Datos de Entrada Previos ---
+        self.tecnologia_pci = tecnologia_pci 
+        self.centralitas_incendios = centralitas_incendios
+        self.vesda_unidades = vesda_unidades
+        self.grupos_bombeo_pci = grupos_bombeo_pci
+        self.cctv_unidades = cctv_unidades
+        self.control_accesos_pax = control_accesos_pax
+        self.P_iluminacion = P_iluminacion
+        self.P_otras_fuerza = P_otras_fuerza
+        
+        # Maquinaria
+        self.prodfrio_tec = prodfrio_tec
+        self.intcalor_tec = intcalor_tec
+        self.distribfrio_tec = distribfrio_tec
+        self.n_intercambiadores = n_intercambiadores
+        self.T_entrada_aire = T_entrada_aire
+        self.T_salida_aire = T_salida_aire
+        self.modelo_hidraulico = modelo_hidraulico
+        self.red_hidraulica = None
+
+        # Carga
+        self.servidores_por_rack = servidores_por_rack
+        self.P_max_servidor = P_max
+        self.N_servidores_total = num_cerramientos * racks_por_cerramiento * servidores_por_rack
+        self.P_IT_demandada = self.N_servidores_total * P_max 
+        self.num_cerramientos = num_cerramientos
+        self.racks_por_cerramiento = racks_por_cerramiento
+        self.num_racks_total = num_cerramientos * racks_por_cerramiento
+        self.tipo_cerramiento = tipo_cerramiento
+        self.P_IT_por_rack = servidores_por_rack * P_max 
+
+        # Redundancia
+        self.R_elec = redundancia_electrica
+        self.R_hvac = redundancia_hvac
+        self.factor_N_elec = self._get_factor_redundancia(self.R_elec)
+        self.factor_N_hvac = self._get_factor_redundancia(self.R_hvac)
+        
+        # Eléctrico / HVAC / DLC
+        self.Suministro_AB = suministro_AB
+        self.Distribucion_IT_tipo = distribucion_IT_tipo
+        self.COP_HVAC = cop_hvac_aire
+        self.COP_DLC_GEN = cop_dlc_gen
+        self.P_DLC_dist_por_cerr = pot_aux_dlc_dist
+        self.Eficiencia_Captura_DLC = eficiencia_captura_dlc
+        self.cerramientos_con_dlc = cerramientos_con_dlc
+        self.tipo_gen_frio_dlc = tipo_gen_frio_dlc
+        self.tipo_dist_frio_dlc = tipo_dist_frio_dlc
+        
+        # Cálculos Potencia
+        self.P_PCI_calc = (grupos_bombeo_pci * 20000) + (centralitas_incendios * 500)
+        self.P_Control_calc = (cctv_unidades * 100) + (control_accesos_pax * 50) + (vesda_unidades * 150)
+        self.P_HVAC_demandada, self.P_DLC_demandada = self._calcular_cargas_electricas_refrigeracion()
+        self.P_Aux_total = self.P_iluminacion + self.P_otras_fuerza + self.P_PCI_calc + self.P_Control_calc
+        self.P_total_demandada = self.P_IT_demandada + self.P_HVAC_demandada + self.P_DLC_demandada + self.P_Aux_total
+
+    def _get_factor_redundancia(self, r):
+        if r == "N": return 1.0
+        if r == "N+1": return 1.25 
+        if r == "2N": return 2.0
+        if r == "2N+1": return 2.25
+        return 1.0
+    
+    def _calcular_cargas_electricas_refrigeracion(self):
+        Q_DLC_capturada = self.P_IT_demandada * (self.cerramientos_con_dlc / self.num_cerramientos) * self.Eficiencia_Captura_DLC
+        P_DLC_gen = Q_DLC_capturada / self.COP_DLC_GEN if self.COP_DLC_GEN > 0 else 0
+        P_DLC_dist = self.cerramientos_con_dlc * self.P_DLC_dist_por_cerr
+        P_DLC_demandada = P_DLC_gen + P_DLC_dist
+
+        Q_Remanente = self.P_IT_demandada - Q_DLC_capturada
+        factor_eficiencia_aire = 1.05 if self.tipo_cerramiento == "Pasillo Frío" else 1.25
+        Q_HVAC_aire_requerida = Q_Remanente * factor_eficiencia_aire
+        P_HVAC_demandada = Q_HVAC_aire_requerida / self.COP_HVAC if self.COP_HVAC > 0 else 0
+
+        if self.modelo_hidraulico == MODELO_RED:
+            # Bombeo de los circuitos resueltos como red (mismas cargas que dimensionar_*)
+            from cpd_hidraulica import redes_diseno
+            Q_DLC_kW = (self.P_IT_demandada * (self.cerramientos_con_dlc / self.num_cerramientos) * self.Eficiencia_Captura_DLC) / 1000
+            Q_Instalada_kW = (self.P_IT_demandada / 1000 - Q_DLC_kW) * factor_eficiencia_aire * self.factor_N_hvac
+            self.red_hidraulica = redes_diseno(Q_Instalada_kW, Q_DLC_kW, self.num_cerramientos, self.cerramientos_con_dlc,
+                                               self.num_plantas, self.area_por_planta, self.factor_N_hvac, self.altura_planta)
+            P_HVAC_demandada += self.red_hidraulica["P_bombas_HVAC_W"]
+            P_DLC_demandada += self.red_hidraulica["P_bombas_DLC_W"]
+        
+        return P_HVAC_demandada, P_DLC_demandada
+
+    def _circuito_red(self, prefijo):
+        # Resultado de un circuito de la red con las claves de _calcular_tuberia_colector (sin los arrays de tramos)
+        c = self.red_hidraulica[prefijo]
+        if c is None:
+            return {"Caudal_Total_m3h": 0, "DN_mm": 0, "Velocidad_ms": 0, "Material": "-", "Num_Circuitos": 0, "Longitud_Estimada_m": 0,
+                    "Perdida_Red_kPa": 0, "Altura_Bomba_m": 0, "P_Bomba_kW": 0, "Bombas": 0, "Tramos": 0, "Iteraciones": 0}
+        return {k: v for k, v in c.items() if k != "Red"}
+
+    # --- MOTOR HIDRÁULICO ---
+    def _calcular_tuberia_colector(self, Q_kW, delta_T):
+        if Q_kW <= 0.1:
+            return {"Caudal_Total_m3h": 0, "DN_mm": 0, "Velocidad_ms": 0, "Material": "-", "Num_Circuitos": 0, "Longitud_Estimada_m": 0}
+
+        V_m3s = (Q_kW / (CP_AGUA * delta_T)) / RHO_AGUA
+        V_m3h = V_m3s * 3600
+        
+        dist_horizontal = math.sqrt(self.area_por_planta) * 1.5 
+        dist_vertical = self.altura_planta * self.num_plantas
+        longitud_total = (dist_horizontal + dist_vertical) * 2 
+        
+        # Nº mínimo de circuitos y DN en forma cerrada (ver dimensionar_tuberias)
+        num_circuitos, i = _circuitos_y_dn(V_m3s)
+        if num_circuitos > MAX_CIRCUITOS:
+            raise ErrorDimensionado(f"Caudal de {V_m3h:.1f} m3/h (Q={Q_kW:.0f} kW, ΔT={delta_T} K) requiere {num_circuitos} "
+                                    f"circuitos DN{TABLA_DN_MM[-1]} a <= {VELOCIDAD_MAX_MS} m/s (máximo {MAX_CIRCUITOS})")
+        caudal_por_circuito = V_m3s / num_circuitos
+        return {
+            "Caudal_Total_m3h": V_m3h, "DN_mm": CATALOGO_DN[i][0], "Velocidad_ms": caudal_por_circuito / _AREAS_DN[i], 
+            "Material": CATALOGO_DN[i][1], "Num_Circuitos": num_circuitos,
+            "Longitud_Estimada_m": longitud_total * num_circuitos
+        }
+
+    # --- RATIOS ---
+    def calcular_kpis_densidad(self, Q_inst_hvac, S_inst_elec_kVA):
+        if self.area_sala_it <= 0 or self.area_total_construida <= 0: return {}
+        
+        densidad_it = (self.P_IT_demandada / 1000) / self.area_sala_it
+        densidad_elec_instalada = S_inst_elec_kVA / self.area_total_construida
+        densidad_termica_it = Q_inst_hvac / self.area_sala_it
+        racks_m2 = self.num_racks_total / self.area_sala_it
+        
+        return {
+            "Densidad Potencia IT (kW/m² IT)": densidad_it,
+            "Densidad Potencia Elec. Instalada (kVA/m² Const.)": densidad_elec_instalada,
+            "Densidad Térmica Refrigeración (kWth/m² IT)": densidad_termica_it,
+            "Densidad Física (Racks/m² IT)": racks_m2
+        }
+
+    # --- CAPEX ESTIMATION ---
+    def calcular_presupuesto_detallado(self, res_elec, res_hvac, res_dlc, precios=None):
+        # precios: libro de precios unitarios (por defecto PRECIOS_REF), mismas claves
+        import pandas as pd
+        precios = PRECIOS_REF if precios is None else precios
+        items = []
+        
+        lado_planta = math.sqrt(self.area_por_planta)
+        altura_total = self.num_plantas * self.altura_planta
+        
+        # 1. OBRA CIVIL
+        items.append({"Cat": "Civil", "Item": "Adecuación Arquitectónica (Suelo/Pintura)", "Ud": "m2", "Cant": self.area_total_construida, "PU": precios["Adecuación Sala/Obra Civil (m2)"]})
+        items.append({"Cat": "Civil", "Item": "Suelo Técnico Elevado", "Ud": "m2", "Cant": self.area_sala_it, "PU": precios["Suelo Técnico (m2)"]})
+        items.append({"Cat": "Civil", "Item": "Contención Pasillos/Cerramientos", "Ud": "ud", "Cant": self.num_cerramientos, "PU": precios["Cerramiento/Contención (ud)"]})
+        items.append({"Cat": "Civil", "Item": "Racks Servidores", "Ud": "ud", "Cant": self.num_racks_total, "PU": precios["Rack 42U (ud)"]})
+
+        # 2. ELÉCTRICO
+        lados = res_elec['Num_Lados']
+        items.append({"Cat": "Eléctrico", "Item": "Celdas Media Tensión", "Ud": "ud", "Cant": res_elec['Num_Celdas_MT'], "PU": precios["Celda MT (ud)"]})
+        items.append({"Cat": "Eléctrico", "Item": "Transformadores", "Ud": "ud", "Cant": lados, "PU": precios["Trafo 1000-2500kVA (ud)"]})
+        pot_gen = res_elec['S_Total_N_kVA'] * self.factor_N_elec 
+        items.append({"Cat": "Eléctrico", "Item": "Grupos Electrógenos", "Ud": "kVA", "Cant": pot_gen, "PU": precios["Generador Diesel (kVA)"]})
+        items.append({"Cat": "Eléctrico", "Item": "SAI / UPS", "Ud": "kW", "Cant": self.P_total_demandada/1000 * self.factor_N_elec, "PU": precios["UPS Modular (kW)"]})
+        items.append({"Cat": "Eléctrico", "Item": "Cuadros CGBT", "Ud": "ud", "Cant": lados, "PU": precios["CGBT (ud)"]})
+        
+        dist_mt = (altura_total + 50) * lados 
+        dist_bt_principal = 20 * lados 
+        dist_promedio_sala = (altura_total / 2) + (lado_planta / 2) 
+        dist_lineas_sala = dist_promedio_sala * self.num_cerramientos * lados
+        
+        items.append({"Cat": "Eléctrico", "Item": "Cableado MT/BT Acometida", "Ud": "m", "Cant": dist_mt + dist_bt_principal, "PU": precios["Cableado Potencia Grueso (m)"]}) 
+        items.append({"Cat": "Eléctrico", "Item": "Blindobarras / Líneas Sala", "Ud": "m", "Cant": dist_lineas_sala + (self.num_racks_total * 2), "PU": precios["Blindobarra (m)"]})
+        items.append({"Cat": "Eléctrico", "Item": "Bandejas Portacables Elec.", "Ud": "m", "Cant": dist_lineas_sala, "PU": precios["Bandeja Eléctrica (m)"]})
+        items.append({"Cat": "Eléctrico", "Item": "Cableado Última Milla (Rack)", "Ud": "ud", "Cant": self.num_racks_total * 2, "PU": precios["Cableado Rack (ud)"]})
+
+        # 3. CLIMATIZACIÓN (HVAC)
+        q_hvac = res_hvac['Q_Instalada_kW']
+        items.append({"Cat": "HVAC", "Item": "Equipos Producción (Chillers/Torres)", "Ud": "kW_frío", "Cant": q_hvac, "PU": precios["Chiller (kW)"]})
+        
+        n_equipos_hvac = np.ceil(q_hvac / 100) 
+        items.append({"Cat": "HVAC", "Item": "Equipos Sala (CRAH/InRow)", "Ud": "ud", "Cant": n_equipos_hvac, "PU": precios["CRAH/InRow (ud)"]})
+        
+        len_hvac = res_hvac["Hidro_Prim"]["Longitud_Estimada_m"] + res_hvac["Hidro_Sec"]["Longitud_Estimada_m"]
+        coste_tubo_hvac = len_hvac * precios["Tubería Acero DN100-200 (m)"]
+        items.append({"Cat": "HVAC", "Item": "Tuberías Acero (Aisladas)", "Ud": "m", "Cant": len_hvac, "PU": precios["Tubería Acero DN100-200 (m)"]})
+        bombas_hvac = self.red_hidraulica["Bombas_HVAC"] if self.red_hidraulica else BOMBAS_COLECTOR_ESTIMADO
+        items.append({"Cat": "HVAC", "Item": "Válvulas, Bombas y Accesorios", "Ud": "Global", "Cant": 1, "PU": coste_tubo_hvac * 0.4 + (precios["Bomba Circuladora (ud)"]*bombas_hvac)})
+
+        # 4. DLC 
+        if self.cerramientos_con_dlc > 0:
+            q_dlc = res_dlc['Q_DLC_kW']
+            items.append({"Cat": "DLC", "Item": "CDUs (Coolant Distribution Units)", "Ud": "ud", "Cant": self.cerramientos_con_dlc, "PU": precios["CDU (ud)"]})
+            len_dlc = res_dlc["Hidro_Prim"]["Longitud_Estimada_m"] + res_dlc["Hidro_Sec"]["Longitud_Estimada_m"]
+            items.append({"Cat": "DLC", "Item": "Red Hidráulica DLC", "Ud": "m", "Cant": len_dlc, "PU": precios["Tubería Cobre/PPR Pequeña (m)"]})
+            items.append({"Cat": "DLC", "Item": "Manifolds & Latiguillos Rack", "Ud": "ud", "Cant": self.cerramientos_con_dlc * self.racks_por_cerramiento, "PU": precios["Manifold Rack (ud)"]})
+            if self.red_hidraulica:
+                items.append({"Cat": "DLC", "Item": "Bombas Circuladoras DLC", "Ud": "ud", "Cant": self.red_hidraulica["Bombas_DLC"], "PU": precios["Bomba Circuladora (ud)"]})
+
+        # 5. PCI 
+        volumen_total_construido = self.area_total_construida * self.altura_planta
+        volumen_sala_it = self.area_sala_it * self.altura_planta
+        
+        items.append({"Cat": "PCI", "Item": "Sistema Detección (Central+Sensores)", "Ud": "ud", "Cant": 1, "PU": precios["Centralita Incendios (ud)"] + (self.num_racks_total * precios["Detector/Sensor (ud)"])})
+        
+        if self.tecnologia_pci == "Agua Nebulizada":
+            items.append({"Cat": "PCI", "Item": "Grupo Bombeo Nebulizada", "Ud": "ud", "Cant": 1, "PU": precios["Grupo Bombeo Nebulizada (ud)"]})
+            metros_tubo_pci = math.sqrt(self.area_total_construida) * self.num_plantas * 2 
+            items.append({"Cat": "PCI", "Item": "Red Tubería Inox + Boquillas", "Ud": "ud", "Cant": int(self.area_total_construida/20), "PU": precios["Boquilla Nebulizada (ud)"] * 3}) 
+        elif self.tecnologia_pci == "NOVEC 1230":
+            kg_novec = volumen_sala_it * 0.75 
+            items.append({"Cat": "PCI", "Item": "Gas NOVEC 1230 (Sala IT)", "Ud": "Kg", "Cant": kg_novec, "PU": precios["Cilindro NOVEC 1230 (Kg)"]})
+        else: 
+            m3_gas = volumen_sala_it * 0.5 
+            items.append({"Cat": "PCI", "Item": "Cilindros Gas Inerte (Sala IT)", "Ud": "m3", "Cant": m3_gas, "PU": precios["Cilindro ARGONITE (m3)"]})
+
+        # 6. COMUNICACIONES 
+        n_servers = self.N_servidores_total
+        backbone_fibra = altura_total * 4 
+        horizontal_fibra = (math.sqrt(self.area_sala_it) + 10) * self.num_racks_total 
+        total_fibra = backbone_fibra + horizontal_fibra
+        total_cobre = self.num_racks_total * 24 * 10 
+        
+        items.append({"Cat": "Comms", "Item": "Cableado Cobre Cat6A", "Ud": "m", "Cant": total_cobre, "PU": precios["Cable Cobre Cat6A (m)"]}) 
+        items.append({"Cat": "Comms", "Item": "Fibra Óptica (MM/SM)", "Ud": "m", "Cant": total_fibra, "PU": precios["Fibra Óptica OM4/OS2 (m)"]})
+        items.append({"Cat": "Comms", "Item": "Bandejas Fibra/Datos", "Ud": "m", "Cant": dist_lineas_sala, "PU": precios["Bandeja Rejilla/Fibra (m)"]})
+        
+        puntos_bms = (n_equipos_hvac * 10) + (lados * 20) + (self.num_racks_total * 2) 
+        items.append({"Cat": "BMS", "Item": "Integración BMS/DCIM", "Ud": "Puntos", "Cant": puntos_bms, "PU": precios["Punto BMS/Integración (ud)"]})
+        items.append({"Cat": "Seguridad", "Item": "CCTV & Accesos", "Ud": "Global", "Cant": 1, "PU": (self.cctv_unidades * precios["Cámara CCTV (ud)"]) + (self.control_accesos_pax * precios["Control Acceso (punto)"])})
+
+        df = pd.DataFrame(items)
+        df["Total (€)"] = df["Cant"] * df["PU"]
+        return df
+
+    # --- MÉTODOS DE CÁLCULO PREVIOS ---
+    def dimensionar_sistema_hvac_completo(self):
+        Q_DLC_capturada_kW = (self.P_IT_demandada * (self.cerramientos_con_dlc / self.num_cerramientos) * self.Eficiencia_Captura_DLC) / 1000
+        Q_Total_IT_kW = self.P_IT_demandada / 1000
+        Q_Remanente_Aire_kW = Q_Total_IT_kW - Q_DLC_capturada_kW
+        factor_ineficiencia = 1.05 if self.tipo_cerramiento == "Pasillo Frío" else 1.25
+        Q_HVAC_Diseno_kW = Q_Remanente_Aire_kW * factor_ineficiencia
+        Q_Instalada_kW = Q_HVAC_Diseno_kW * self.factor_N_hvac
+        capacidad_unitaria = 100.0
+        if Q_Instalada_kW > 1000: capacidad_unitaria = 500.0
+        
+        if self.red_hidraulica:
+            hidro_prim, hidro_sec = self._circuito_red("HVAC_Prim"), self._circuito_red("HVAC_Sec")
+        else:
+            hidro_prim = self._calcular_tuberia_colector(Q_Instalada_kW, 5.0)
+            hidro_sec = self._calcular_tuberia_colector(Q_Instalada_kW, 6.0)
+
+        return {"Q_Diseno_kW": Q_HVAC_Diseno_kW, "Q_Instalada_kW": Q_Instalada_kW, "Hidro_Prim": hidro_prim, "Hidro_Sec": hidro_sec, "Capacidad_Unit": capacidad_unitaria}
+
+    def dimensionar_dlc_hidraulica(self):
+        Q_DLC_kW = (self.P_IT_demandada * (self.cerramientos_con_dlc / self.num_cerramientos) * self.Eficiencia_Captura_DLC) / 1000
+        if self.red_hidraulica:
+            hidro_prim, hidro_sec = self._circuito_red("DLC_Prim"), self._circuito_red("DLC_Sec")
+        else:
+            hidro_prim = self._calcular_tuberia_colector(Q_DLC_kW, 5.0)
+            hidro_sec = self._calcular_tuberia_colector(Q_DLC_kW, 8.0)
+        return {"Q_DLC_kW": Q_DLC_kW, "Hidro_Prim": hidro_prim, "Hidro_Sec": hidro_sec}
+
+    def dimensionar_sistema_electrico(self):
+        P_Total_N_Watts = self.P_total_demandada 
+        S_Total_N_kVA = P_Total_N_Watts / (0.9 * 1000)
+        if self.Suministro_AB == "2 Lados (A y B)":
+            num_lados = 2; S_Requerida_Por_Lado_kVA = S_Total_N_kVA
+        else:
+            num_lados = 1; S_Requerida_Por_Lado_kVA = S_Total_N_kVA * self.factor_N_elec
+
+        S_nominal_kVA = [630, 800, 1000, 1250, 1600, 2000, 2500, 3150, 4000]
+        T_capacidad = next((s for s in S_nominal_kVA if s >= S_Requerida_Por_Lado_kVA), S_Requerida_Por_Lado_kVA)
+        num_celdas_mt = 2 + num_lados
+        I_cuadro_IT_A = (T_capacidad * 1000) / (400 * np.sqrt(3))
+        P_rack_W = self.servidores_por_rack * self.P_max_servidor
+        I_rack_A = (P_rack_W / 400) / np.sqrt(3)
+        I_circuito_rack_A = next((i for i in [16, 32, 63, 125] if i >= I_rack_A * 1.25), 32) 
+        I_blindobarra_A = next((i for i in [250, 400, 630, 800, 1000, 1250, 1600, 2500, 4000] if i >= I_cuadro_IT_A), I_cuadro_IT_A)
+        
+        return {"T_capacidad": T_capacidad, "S_Total_N_kVA": S_Total_N_kVA, "I_cuadro_IT": I_cuadro_IT_A, "I_blindobarra": I_blindobarra_A, "I_rack_distribucion": I_circuito_rack_A, "Num_Trafos": num_lados, "Num_Celdas_MT": num_celdas_mt, "Num_Lados": num_lados}
+
+    def calcular_consumos_desglosados(self):
+        labels = ['IT', 'HVAC', 'DLC', 'Ilum', 'Control', 'Aux']; sizes = [self.P_IT_demandada, self.P_HVAC_demandada, self.P_DLC_demandada, self.P_iluminacion, self.P_Control_calc, self.P_otras_fuerza + self.P_PCI_calc]
+        data = [(labels[i], sizes[i]) for i in range(len(sizes)) if sizes[i] > 1e-3]
+        return dict(zip(*zip(*data))) if data else {}
+
+# ==============================================================================
+# MOTOR VECTORIZADO POR LOTES (BARRIDOS DE ESCENARIOS)
+# ==============================================================================
+# Reproduce DisenadorV14 + dimensionar_* + calcular_presupuesto_detallado sobre
+# columnas NumPy (una fila por escenario), con el mismo orden de operaciones
+# para que los resultados coincidan bit a bit con el cálculo escalar.
+
+PARAMETROS_DISENO = (
+    "redundancia_electrica", "redundancia_hvac", "suministro_AB", "distribucion_IT_tipo",
+    "num_cerramientos", "racks_por_cerramiento", "servidores_por_rack", "tipo_cerramiento",
+    "P_idle", "P_max",
+    "P_iluminacion", "P_otras_fuerza",
+    "cop_hvac_aire", "T_entrada_aire", "T_salida_aire",
+    "prodfrio_tec", "intcalor_tec", "distribfrio_tec", "n_intercambiadores",
+    "cerramientos_con_dlc", "tipo_gen_frio_dlc", "cop_dlc_gen",
+    "tipo_dist_frio_dlc", "pot_aux_dlc_dist", "eficiencia_captura_dlc",
+    "centralitas_incendios", "vesda_unidades", "grupos_bombeo_pci", "cctv_unidades", "control_accesos_pax",
+    "tecnologia_pci",
+    "num_plantas", "area_por_planta", "area_sala_it",
+    "modelo_hidraulico",
+)
+
+# Escenario por defecto (mismos valores que el formulario de DesktopCPDApp)
+ESCENARIO_DEFECTO = {
+    "redundancia_electrica": "2N", "redundancia_hvac": "N+1", "suministro_AB": "2 Lados (A y B)", "distribucion_IT_tipo": "Blindobarra",
+    "num_cerramientos": 4, "racks_por_cerramiento": 12, "servidores_por_rack": 10, "tipo_cerramiento": "Pasillo Frío",
+    "P_idle": 100.0, "P_max": 500.0,
+    "P_iluminacion": 2000.0, "P_otras_fuerza": 3000,
+    "cop_hvac_aire": 3.5, "T_entrada_aire": 22.0, "T_salida_aire": 34.0,
+    "prodfrio_tec": "Chiller A/W", "intcalor_tec": "Placas Soldadas", "distribfrio_tec": "CRAH", "n_intercambiadores": 2,
+    "cerramientos_con_dlc": 0, "tipo_gen_frio_dlc": "Dry cooler adiabático", "cop_dlc_gen": 10.0,
+    "tipo_dist_frio_dlc": "CDU in-rack", "pot_aux_dlc_dist": 500.0, "eficiencia_captura_dlc": 0.8,
+    "centralitas_incendios": 2, "vesda_unidades": 4, "grupos_bombeo_pci": 1, "cctv_unidades": 20, "control_accesos_pax": 10,
+    "tecnologia_pci": "Agua Nebulizada",
+    "num_plantas": 2, "area_por_planta": 500.0, "area_sala_it": 400.0,
+    "modelo_hidraulico": MODELO_COLECTOR,
+}
+
+# Opciones de los desplegables del formulario (la GUI y el análisis de sensibilidad usan
+# las mismas); los parámetros de texto que no están aquí van fijos en el formulario
+OPCIONES_FORMULARIO = {
+    "redundancia_electrica": ["2N", "N+1", "N"],
+    "suministro_AB": ["2 Lados (A y B)", "1 Lado (A)"],
+    "distribucion_IT_tipo": ["Blindobarra", "Cable"],
+    "tipo_cerramiento": ["Pasillo Frío", "Pasillo Caliente", "Sin Cerramiento"],
+    "prodfrio_tec": ["Condensadora DX", "Chiller A/W", "Chiller A/W con free cooling", "Chiller W/W", "Dry cooler seco",
+                     "Chiller W/W + Torre de refrigeración", "Torre de refrigeración"],
+    "intcalor_tec": ["Placas Soldadas", "Tubular", "Ninguno (Directo)"],
+    "distribfrio_tec": ["CRAH", "CRAC", "Inrow agua", "Inrow DX", "Puerta trasera RDHx", "Inmersión en dieléctrico",
+                        "CDU central", "CDU in-row", "CDU in-rack"],
+    "tipo_gen_frio_dlc": ["Dry cooler adiabático", "Chiller A/W de alta temperatura", "Torre de refrigeración"],
+    "tipo_dist_frio_dlc": ["CDU central", "CDU in-row", "CDU in-rack", "Inmersión en dieléctrico"],
+    "tecnologia_pci": ["Agua Nebulizada", "NOVEC 1230", "ARGONITE", "FM-200"],
+    "modelo_hidraulico": list(MODELOS_HIDRAULICOS),
+}
+
+# Catálogos comerciales (ordenados de menor a mayor)
+CATALOGO_TRAFOS_KVA = [630, 800, 1000, 1250, 1600, 2000, 2500, 3150, 4000]
+CATALOGO_CIRCUITO_RACK_A = [16, 32, 63, 125]
+CATALOGO_BLINDOBARRA_A = [250, 400, 630, 800, 1000, 1250, 1600, 2500, 4000]
+FACTORES_REDUNDANCIA = {"N": 1.0, "N+1": 1.25, "2N": 2.0, "2N+1": 2.25}
+
+# Circuitos hidráulicos por escenario: (prefijo, Q a usar, ΔT)
+CIRCUITOS_HIDRAULICOS = (("HVAC_Prim", "Q_Instalada_kW", 5.0), ("HVAC_Sec", "Q_Instalada_kW", 6.0),
+                         ("DLC_Prim", "Q_DLC_kW", 5.0), ("DLC_Sec", "Q_DLC_kW", 8.0))
+
+CATEGORIAS_CAPEX = ("Civil", "Eléctrico", "HVAC", "DLC", "PCI", "Comms", "BMS", "Seguridad")
+
+# Multiplicadores de las cantidades estimadas por longitud (1.0 = cálculo original)
+FACTORES_CANTIDAD = ("factor_longitud_cableado", "factor_longitud_tuberia", "factor_longitud_comms")
+
+
+def _columnas_lote(escenarios):
+    # Admite DataFrame o dict de columnas/escalares; lo que falte sale de ESCENARIO_DEFECTO
+    if hasattr(escenarios, "columns"):  # DataFrame
+        escenarios = {k: escenarios[k].to_numpy() for k in escenarios.columns}
+    desconocidos = set(escenarios) - set(PARAMETROS_DISENO)
+    if desconocidos:
+        raise KeyError(f"Parámetros desconocidos: {sorted(desconocidos)}")
+    valores = [np.asarray(escenarios.get(k, ESCENARIO_DEFECTO[k])) for k in PARAMETROS_DISENO]
+    return dict(zip(PARAMETROS_DISENO, np.broadcast_arrays(*[np.atleast_1d(v) for v in valores])))
+
+
+def _seleccionar_catalogo(catalogo, requerido, defecto):
+    # Primer valor del catálogo >= requerido (equivale a next(...) del cálculo escalar)
+    cat = np.asarray(catalogo, dtype=float)
+    idx = np.searchsorted(cat, requerido, side="left")
+    return np.where(idx < len(cat), cat[np.minimum(idx, len(cat) - 1)], defecto)
+
+
+def _factor_redundancia_lote(r):
+    factor = np.ones(r.shape)
+    for nombre, valor in FACTORES_REDUNDANCIA.items():
+        factor[r == nombre] = valor
+    return factor
+
+
+def _lineas_presupuesto_lote(c, r, precios, factores=None):
+    # Misma secuencia de partidas que calcular_presupuesto_detallado.
+    # Cada línea: (Cat, Item, Ud, Cant, PU, presente)
+    f = {k: 1.0 for k in FACTORES_CANTIDAD}
+    f.update(factores or {})
+    f_cab = f["factor_longitud_cableado"]; f_tub = f["factor_longitud_tuberia"]; f_com = f["factor_longitud_comms"]
+    S = r["P_IT_demandada"].shape
+    si = np.ones(S, dtype=bool)
+    lado_planta = np.sqrt(c["area_por_planta"])
+    altura_total = c["num_plantas"] * 4.5
+    lados = r["Num_Lados"]
+    racks = r["num_racks_total"]
+    area_total = r["area_total_construida"]
+
+    dist_lineas_sala = ((altura_total / 2) + (lado_planta / 2)) * c["num_cerramientos"] * lados
+    q_hvac = r["Q_Instalada_kW"]
+    n_equipos_hvac = np.ceil(q_hvac / 100)
+    len_hvac = (r["HVAC_Prim_Longitud_Estimada_m"] + r["HVAC_Sec_Longitud_Estimada_m"]) * f_tub
+    len_dlc = (r["DLC_Prim_Longitud_Estimada_m"] + r["DLC_Sec_Longitud_Estimada_m"]) * f_tub
+    con_dlc = c["cerramientos_con_dlc"] > 0
+    pci = c["tecnologia_pci"]
+    nebulizada = pci == "Agua Nebulizada"; novec = pci == "NOVEC 1230"
+    volumen_sala_it = c["area_sala_it"] * 4.5
+    total_fibra = altura_total * 4 + (np.sqrt(c["area_sala_it"]) + 10) * racks
+
+    return [
+        ("Civil", "Adecuación Arquitectónica (Suelo/Pintura)", "m2", area_total, precios["Adecuación Sala/Obra Civil (m2)"], si),
+        ("Civil", "Suelo Técnico Elevado", "m2", c["area_sala_it"], precios["Suelo Técnico (m2)"], si),
+        ("Civil", "Contención Pasillos/Cerramientos", "ud", c["num_cerramientos"], precios["Cerramiento/Contención (ud)"], si),
+        ("Civil", "Racks Servidores", "ud", racks, precios["Rack 42U (ud)"], si),
+        ("Eléctrico", "Celdas Media Tensión", "ud", r["Num_Celdas_MT"], precios["Celda MT (ud)"], si),
+        ("Eléctrico", "Transformadores", "ud", lados, precios["Trafo 1000-2500kVA (ud)"], si),
+        ("Eléctrico", "Grupos Electrógenos", "kVA", r["S_Total_N_kVA"] * r["factor_N_elec"], precios["Generador Diesel (kVA)"], si),
+        ("Eléctrico", "SAI / UPS", "kW", r["P_total_demandada"]/1000 * r["factor_N_elec"], precios["UPS Modular (kW)"], si),
+        ("Eléctrico", "Cuadros CGBT", "ud", lados, precios["CGBT (ud)"], si),
+        ("Eléctrico", "Cableado MT/BT Acometida", "m", ((altura_total + 50) * lados + 20 * lados) * f_cab, precios["Cableado Potencia Grueso (m)"], si),
+        ("Eléctrico", "Blindobarras / Líneas Sala", "m", dist_lineas_sala * f_cab + (racks * 2), precios["Blindobarra (m)"], si),
+        ("Eléctrico", "Bandejas Portacables Elec.", "m", dist_lineas_sala * f_cab, precios["Bandeja Eléctrica (m)"], si),
+        ("Eléctrico", "Cableado Última Milla (Rack)", "ud", racks * 2, precios["Cableado Rack (ud)"], si),
+        ("HVAC", "Equipos Producción (Chillers/Torres)", "kW_frío", q_hvac, precios["Chiller (kW)"], si),
+        ("HVAC", "Equipos Sala (CRAH/InRow)", "ud", n_equipos_hvac, precios["CRAH/InRow (ud)"], si),
+        ("HVAC", "Tuberías Acero (Aisladas)", "m", len_hvac, precios["Tubería Acero DN100-200 (m)"], si),
+        ("HVAC", "Válvulas, Bombas y Accesorios", "Global", 1, len_hvac * precios["Tubería Acero DN100-200 (m)"] * 0.4 + (precios["Bomba Circuladora (ud)"]*r["Bombas_HVAC"]), si),
+        ("DLC", "CDUs (Coolant Distribution Units)", "ud", c["cerramientos_con_dlc"], precios["CDU (ud)"], con_dlc),
+        ("DLC", "Red Hidráulica DLC", "m", len_dlc, precios["Tubería Cobre/PPR Pequeña (m)"], con_dlc),
+        ("DLC", "Manifolds & Latiguillos Rack", "ud", c["cerramientos_con_dlc"] * c["racks_por_cerramiento"], precios["Manifold Rack (ud)"], con_dlc),
+        ("DLC", "Bombas Circuladoras DLC", "ud", r["Bombas_DLC"], precios["Bomba Circuladora (ud)"], con_dlc & (c["modelo_hidraulico"] == MODELO_RED)),
+        ("PCI", "Sistema Detección (Central+Sensores)", "ud", 1, precios["Centralita Incendios (ud)"] + (racks * precios["Detector/Sensor (ud)"]), si),
+        ("PCI", "Grupo Bombeo Nebulizada", "ud", 1, precios["Grupo Bombeo Nebulizada (ud)"], nebulizada),
+        ("PCI", "Red Tubería Inox + Boquillas", "ud", np.trunc(area_total/20), precios["Boquilla Nebulizada (ud)"] * 3, nebulizada),
+        ("PCI", "Gas NOVEC 1230 (Sala IT)", "Kg", volumen_sala_it * 0.75, precios["Cilindro NOVEC 1230 (Kg)"], novec),
+        ("PCI", "Cilindros Gas Inerte (Sala IT)", "m3", volumen_sala_it * 0.5, precios["Cilindro ARGONITE (m3)"], ~nebulizada & ~novec),
+        ("Comms", "Cableado Cobre Cat6A", "m", racks * 24 * 10 * f_com, precios["Cable Cobre Cat6A (m)"], si),
+        ("Comms", "Fibra Óptica (MM/SM)", "m", total_fibra * f_com, precios["Fibra Óptica OM4/OS2 (m)"], si),
+        ("Comms", "Bandejas Fibra/Datos", "m", dist_lineas_sala * f_com, precios["Bandeja Rejilla/Fibra (m)"], si),
+        ("BMS", "Integración BMS/DCIM", "Puntos", (n_equipos_hvac * 10) + (lados * 20) + (racks * 2), precios["Punto BMS/Integración (ud)"], si),
+        ("Seguridad", "CCTV & Accesos", "Global", 1, (c["cctv_unidades"] * precios["Cámara CCTV (ud)"]) + (c["control_accesos_pax"] * precios["Control Acceso (punto)"]), si),
+    ]
+
+
+def _suma_por_filas(m):
+    # Suma por filas con el mismo orden que la suma por pares de NumPy sobre un
+    # vector (la que usa df["Total (€)"].sum()); m.sum(axis=1) acumula en otro orden.
+    S, n = m.shape
+    if n < 8:
+        s = np.zeros(S)
+        for j in range(n): s = s + m[:, j]
+        return s
+    r = m[:, :8].copy(); i = 8
+    while i < n - (n % 8):
+        r += m[:, i:i+8]; i += 8
+    s = ((r[:, 0] + r[:, 1]) + (r[:, 2] + r[:, 3])) + ((r[:, 4] + r[:, 5]) + (r[:, 6] + r[:, 7]))
+    for j in range(i, n): s = s + m[:, j]
+    return s
+
+
+def _sumar_partidas(importes, presentes):
+    # Suma sólo las partidas presentes, agrupando por patrón de partidas para
+    # sumar exactamente la misma secuencia que el DataFrame escalar.
+    total = np.zeros(importes.shape[0])
+    codigos = presentes.astype(np.int64) @ (np.int64(1) << np.arange(presentes.shape[1], dtype=np.int64))
+    for codigo in np.unique(codigos):
+        filas = codigos == codigo
+        total[filas] = _suma_por_filas(importes[filas][:, presentes[filas][0]])
+    return total
+
+
+def _importes_partidas(c, r, precios, factores=None):
+    # Matriz (escenario x partida) de importes, con las partidas ausentes a cero
+    lineas = _lineas_presupuesto_lote(c, r, precios, factores)
+    S = r["P_IT_demandada"].shape[0]
+    importes = np.column_stack([np.broadcast_to(np.multiply(cant, pu), (S,)) for _, _, _, cant, pu, _ in lineas]).astype(float)
+    presentes = np.column_stack([np.broadcast_to(p, (S,)) for *_, p in lineas])
+    categorias = np.array([l[0] for l in lineas])
+    return np.where(presentes, importes, 0.0), presentes, categorias
+
+
+def evaluar_lote(escenarios, precios=None, estricto=True):
+    """Evalúa un lote de escenarios de DisenadorV14 de una sola pasada NumPy.
+
+    `escenarios` es un DataFrame o un dict {parámetro: columna o escalar} con los
+    nombres de PARAMETROS_DISENO. Devuelve un dict {resultado: array} con cargas,
+    selecciones eléctricas, tuberías, KPIs y CAPEX por escenario.
+    Con `estricto=False` los escenarios con tuberías fuera de catálogo no lanzan
+    ErrorDimensionado: quedan con `Valido` a False.
+    """
+    precios = PRECIOS_REF if precios is None else precios
+    c = _columnas_lote(escenarios)
+    r = _evaluar_tecnico(c, estricto)
+
+    # --- CAPEX (calcular_presupuesto_detallado) ---
+    importes, presentes, cats = _importes_partidas(c, r, precios)
+    r["CAPEX_Total"] = _sumar_partidas(importes, presentes)
+    for cat in CATEGORIAS_CAPEX:
+        r[f"CAPEX_{cat}"] = importes[:, cats == cat].sum(axis=1)
+    return r
+
+
+def _evaluar_tecnico(c, estricto=True):
+    # Cargas, selecciones eléctricas, hidráulica y KPIs (todo menos el CAPEX)
+    r = {}
+
+    # --- Cargas (DisenadorV14.__init__) ---
+    nc = c["num_cerramientos"]
+    r["area_total_construida"] = c["num_plantas"] * c["area_por_planta"]
+    r["num_racks_total"] = nc * c["racks_por_cerramiento"]
+    r["N_servidores_total"] = r["num_racks_total"] * c["servidores_por_rack"]
+    P_IT = r["N_servidores_total"] * c["P_max"]
+    r["P_IT_demandada"] = P_IT
+    r["P_IT_por_rack"] = c["servidores_por_rack"] * c["P_max"]
+    r["factor_N_elec"] = _factor_redundancia_lote(c["redundancia_electrica"])
+    r["factor_N_hvac"] = _factor_redundancia_lote(c["redundancia_hvac"])
+    r["P_PCI_calc"] = (c["grupos_bombeo_pci"] * 20000) + (c["centralitas_incendios"] * 500)
+    r["P_Control_calc"] = (c["cctv_unidades"] * 100) + (c["control_accesos_pax"] * 50) + (c["vesda_unidades"] * 150)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraccion_dlc = c["cerramientos_con_dlc"] / nc
+        Q_DLC_capturada = P_IT * fraccion_dlc * c["eficiencia_captura_dlc"]
+        cop_dlc = c["cop_dlc_gen"]; cop_hvac = c["cop_hvac_aire"]
+        P_DLC_gen = np.where(cop_dlc > 0, Q_DLC_capturada / np.where(cop_dlc > 0, cop_dlc, 1), 0)
+        r["P_DLC_demandada"] = P_DLC_gen + c["cerramientos_con_dlc"] * c["pot_aux_dlc_dist"]
+        factor_aire = np.where(c["tipo_cerramiento"] == "Pasillo Frío", 1.05, 1.25)
+        Q_HVAC_aire = (P_IT - Q_DLC_capturada) * factor_aire
+        r["P_HVAC_demandada"] = np.where(cop_hvac > 0, Q_HVAC_aire / np.where(cop_hvac > 0, cop_hvac, 1), 0)
+    redes = _redes_lote(c, r, P_IT, fraccion_dlc, factor_aire, estricto)
+    r["P_Aux_total"] = c["P_iluminacion"] + c["P_otras_fuerza"] + r["P_PCI_calc"] + r["P_Control_calc"]
+    r["P_total_demandada"] = P_IT + r["P_HVAC_demandada"] + r["P_DLC_demandada"] + r["P_Aux_total"]
+
+    # --- Eléctrico (dimensionar_sistema_electrico) ---
+    S_Total_N_kVA = r["P_total_demandada"] / (0.9 * 1000)
+    dos_lados = c["suministro_AB"] == "2 Lados (A y B)"
+    S_por_lado = np.where(dos_lados, S_Total_N_kVA, S_Total_N_kVA * r["factor_N_elec"])
+    r["S_Total_N_kVA"] = S_Total_N_kVA
+    r["T_capacidad"] = _seleccionar_catalogo(CATALOGO_TRAFOS_KVA, S_por_lado, S_por_lado)
+    r["Num_Lados"] = np.where(dos_lados, 2, 1)
+    r["Num_Trafos"] = r["Num_Lados"]
+    r["Num_Celdas_MT"] = 2 + r["Num_Lados"]
+    r["I_cuadro_IT"] = (r["T_capacidad"] * 1000) / (400 * np.sqrt(3))
+    I_rack_A = (r["P_IT_por_rack"] / 400) / np.sqrt(3)
+    r["I_rack_distribucion"] = _seleccionar_catalogo(CATALOGO_CIRCUITO_RACK_A, I_rack_A * 1.25, 32)
+    r["I_blindobarra"] = _seleccionar_catalogo(CATALOGO_BLINDOBARRA_A, r["I_cuadro_IT"], r["I_cuadro_IT"])
+
+    # --- HVAC y DLC (dimensionar_sistema_hvac_completo / dimensionar_dlc_hidraulica) ---
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Q_DLC_kW = (P_IT * fraccion_dlc * c["eficiencia_captura_dlc"]) / 1000
+    r["Q_DLC_kW"] = Q_DLC_kW
+    r["Q_Diseno_kW"] = (P_IT / 1000 - Q_DLC_kW) * factor_aire
+    r["Q_Instalada_kW"] = r["Q_Diseno_kW"] * r["factor_N_hvac"]
+    r["Capacidad_Unit"] = np.where(r["Q_Instalada_kW"] > 1000, 500.0, 100.0)
+    r["Valido"] = np.ones(P_IT.shape, dtype=bool)
+    for prefijo, clave_q, delta_T in CIRCUITOS_HIDRAULICOS:
+        tuberias = dimensionar_tuberias(r[clave_q], delta_T, c["area_por_planta"], c["num_plantas"], estricto=estricto)
+        r["Valido"] &= tuberias.pop("Valido")
+        for k, v in tuberias.items():
+            r[f"{prefijo}_{k}"] = v
+    _aplicar_redes_lote(r, redes)
+
+    # --- KPIs (calcular_kpis_densidad); NaN donde el escalar devuelve {} ---
+    kpi_valido = (c["area_sala_it"] > 0) & (r["area_total_construida"] > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r["Densidad Potencia IT (kW/m² IT)"] = np.where(kpi_valido, (P_IT / 1000) / c["area_sala_it"], np.nan)
+        r["Densidad Potencia Elec. Instalada (kVA/m² Const.)"] = np.where(kpi_valido, S_Total_N_kVA / r["area_total_construida"], np.nan)
+        r["Densidad Térmica Refrigeración (kWth/m² IT)"] = np.where(kpi_valido, r["Q_Instalada_kW"] / c["area_sala_it"], np.nan)
+        r["Densidad Física (Racks/m² IT)"] = np.where(kpi_valido, r["num_racks_total"] / c["area_sala_it"], np.nan)
+        r["PUE"] = np.where(P_IT > 0, r["P_total_demandada"] / P_IT, 1.0)
+    return r
+
+
+def _redes_lote(c, r, P_IT, fraccion_dlc, factor_aire, estricto):
+    # Escenarios con MODELO_RED: bombeo sumado a P_HVAC/P_DLC y nº de bombas para el CAPEX.
+    # Devuelve {fila: redes_diseno(...)} para sustituir después sus tuberías.
+    S = P_IT.shape[0]
+    r["Bombas_HVAC"] = np.full(S, float(BOMBAS_COLECTOR_ESTIMADO)); r["Bombas_DLC"] = np.zeros(S)
+    filas = np.flatnonzero(c["modelo_hidraulico"] == MODELO_RED)
+    if not len(filas):
+        return {}
+    from cpd_hidraulica import redes_diseno
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Q_DLC_kW = (P_IT * fraccion_dlc * c["eficiencia_captura_dlc"]) / 1000
+        Q_Instalada_kW = (P_IT / 1000 - Q_DLC_kW) * factor_aire * r["factor_N_hvac"]
+    redes = {}
+    for i in filas:
+        try:
+            red = redes_diseno(float(Q_Instalada_kW[i]), float(Q_DLC_kW[i]), int(c["num_cerramientos"][i]),
+                               int(c["cerramientos_con_dlc"][i]), int(c["num_plantas"][i]), float(c["area_por_planta"][i]),
+                               float(r["factor_N_hvac"][i]))
+        except ErrorDimensionado as e:
+            if estricto: raise ErrorDimensionado(str(e), indices=np.array([i]))
+            redes[i] = None; continue
+        redes[i] = red
+        r["P_HVAC_demandada"][i] += red["P_bombas_HVAC_W"]; r["P_DLC_demandada"][i] += red["P_bombas_DLC_W"]
+        r["Bombas_HVAC"][i] = red["Bombas_HVAC"]; r["Bombas_DLC"][i] = red["Bombas_DLC"]
+    return redes
+
+
+def _aplicar_redes_lote(r, redes):
+    # Sustituye las tuberías estimadas por las de la red y añade pérdida, altura y potencia de bombeo
+    S = r["P_IT_demandada"].shape[0]
+    for prefijo, _, _ in CIRCUITOS_HIDRAULICOS:
+        for k in ("Perdida_Red_kPa", "Altura_Bomba_m", "P_Bomba_kW"):
+            r[f"{prefijo}_{k}"] = np.zeros(S)
+        for i, red in redes.items():
+            if red is None:
+                r["Valido"][i] = False; continue
+            c = red[prefijo] or {}
+            for k in ("Caudal_Total_m3h", "DN_mm", "Velocidad_ms", "Material", "Num_Circuitos", "Longitud_Estimada_m",
+                      "Perdida_Red_kPa", "Altura_Bomba_m", "P_Bomba_kW"):
+                r[f"{prefijo}_{k}"][i] = c.get(k, "-" if k == "Material" else 0)
+
+
+def descomponer_capex(escenarios, estricto=True):
+    """Expresa el CAPEX como cantidades por precio unitario.
+
+    Devuelve (claves, Q) con Q de forma (categoría, grupo, escenario, precio), donde
+    grupo 0 son las cantidades fijas y el grupo g>0 lo que escala con
+    FACTORES_CANTIDAD[g-1]. Para unos precios p y factores f:
+        CAPEX[cat, s] = sum_g f_g * (Q[cat, g, s, :] @ p),  con f_0 = 1
+    (con todos los factores a 1 y PRECIOS_REF coincide con evaluar_lote salvo redondeo).
+    """
+    c = _columnas_lote(escenarios)
+    r = _evaluar_tecnico(c, estricto)
+    claves = list(PRECIOS_REF)
+    S = r["P_IT_demandada"].shape[0]; K = len(claves)
+    Q = np.zeros((len(CATEGORIAS_CAPEX), len(FACTORES_CANTIDAD) + 1, S, K))
+    # Cada partida es lineal en cada precio y en cada factor: se evalúan las partidas
+    # una vez con los precios unitarios e_k apilados en un eje (K, 1) y, por grupo,
+    # con factores unitarios (grupo 0: todos a cero).
+    unitarios = dict(zip(claves, np.eye(K)[:, :, None]))
+    fijos = {f: 0.0 for f in FACTORES_CANTIDAD}
+    for g, factores in enumerate([fijos] + [{**fijos, f: 1.0} for f in FACTORES_CANTIDAD]):
+        lineas = _lineas_presupuesto_lote(c, r, unitarios, factores)
+        for i, cat in enumerate(CATEGORIAS_CAPEX):
+            acumulado = np.zeros((K, S))
+            for cat_linea, _, _, cant, pu, presente in lineas:
+                if cat_linea == cat: acumulado += np.where(presente, np.multiply(cant, pu), 0.0)
+            Q[i, g] = acumulado.T
+        if g: Q[:, g] -= Q[:, 0]
+    return claves, Q
+
+# ==============================================================================
+# GENERADORES DE TABLAS (RESTAURADOS EXACTAMENTE)
+# ==============================================================================
+
+def generar_tabla_ratios(kpis):
+    import pandas as pd
+    data = [{"Ratio/KPI": k, "Valor": f"{v:.2f}"} for k, v in kpis.items()]
+    return pd.DataFrame(data)
+
+def generar_tabla_electrico(diseno, res):
+    import pandas as pd
+    T_cap = res['T_capacidad']; Lados = res['Num_Lados']
+    data = [
+        {"Zona": "Zona 1 (MT)", "Equipo": "Celdas MT Entrada", "Potencia unitaria": "-", "nº de unidades": int(res['Num_Celdas_MT']), "Potencia total": "-", "Nivel de tensión": "24 kV", "Especificaciones": "GIS/AIS SF6"},
+        {"Zona": "Zona 2 (Transf)", "Equipo": "Trafo MT/BT", "Potencia unitaria": f"{T_cap} kVA", "nº de unidades": int(Lados), "Potencia total": f"{T_cap * Lados} kVA", "Nivel de tensión": "24kV/400V", "Especificaciones": "Seco/Aceite Dyn11"},
+        {"Zona": "Zona 3 (CGBT)", "Equipo": "Cuadro General", "Potencia unitaria": f"{T_cap} kVA", "nº de unidades": int(Lados), "Potencia total": f"{T_cap * Lados} kVA", "Nivel de tensión": "400 V", "Especificaciones": f"In: {res['I_cuadro_IT']:.0f}A, 50kA"},
+        {"Zona": "Zona 4 (UPS)", "Equipo": "SAI Modular", "Potencia unitaria": f"{T_cap} kVA", "nº de unidades": int(Lados), "Potencia total": f"{T_cap * Lados} kVA", "Nivel de tensión": "400 V", "Especificaciones": "Doble Conversión"},
+        {"Zona": "Zona 5 (Rack)", "Equipo": "Blindobarra/Canalis", "Potencia unitaria": f"{res['I_blindobarra']} A", "nº de unidades": int(diseno.num_cerramientos * Lados), "Potencia total": "-", "Nivel de tensión": "400 V", "Especificaciones": f"Distribución {diseno.Distribucion_IT_tipo}"},
+        {"Zona": "Zona 5 (Rack)", "Equipo": "Prot. Circuito Rack", "Potencia unitaria": f"{res['I_rack_distribucion']} A", "nº de unidades": int(diseno.N_servidores_total / diseno.servidores_por_rack * Lados), "Potencia total": f"{diseno.P_IT_demandada/1000:.1f} kW", "Nivel de tensión": "230 V", "Especificaciones": "Magnetotérmico Curva C"}
+    ]
+    return pd.DataFrame(data)
+
+def generar_tabla_hvac_limpia(diseno, res_hvac):
+    import pandas as pd
+    Q_tot = res_hvac['Q_Instalada_kW']; Q_unit = res_hvac['Capacidad_Unit']
+    N_equipos = np.ceil(Q_tot / Q_unit) if Q_unit > 0 else 1
+    data = [
+        {"Zona": "Zona 1 (Prod)", "Equipo": diseno.prodfrio_tec, "Potencia unitaria": f"{Q_unit:.0f} kW", "nº de unidades": int(N_equipos), "Potencia total": f"{Q_tot:.0f} kW", "Nivel de tensión": "400V", "Especificaciones": f"Redundancia {diseno.R_hvac}"},
+        {"Zona": "Zona 2 (Inter)", "Equipo": diseno.intcalor_tec, "Potencia unitaria": f"{Q_unit:.0f} kW", "nº de unidades": int(N_equipos), "Potencia total": f"{Q_tot:.0f} kW", "Nivel de tensión": "-", "Especificaciones": "Intercambio Térmico"},
+        {"Zona": "Zona 3 (Dist)", "Equipo": diseno.distribfrio_tec, "Potencia unitaria": "Var", "nº de unidades": "Var", "Potencia total": f"{Q_tot:.0f} kW", "Nivel de tensión": "230V/400V", "Especificaciones": "Clima Precisión"}
+    ]
+    return pd.DataFrame(data)
+
+def _bombeo(circuito):
+    # Sufijo de la tabla con pérdida y bombeo (sólo con el modelo de red hidráulica)
+    if "P_Bomba_kW" not in circuito: return ""
+    return f". ΔP={circuito['Perdida_Red_kPa']:.0f} kPa, {circuito['Bombas']} bombas ({circuito['P_Bomba_kW']:.1f} kW)"
+
+def generar_tabla_hidraulica_unificada(diseno, res_hvac, res_dlc):
+    import pandas as pd
+    prim_h = res_hvac["Hidro_Prim"]; sec_h = res_hvac["Hidro_Sec"]
+    data = [
+        {"Zona": "HVAC Primario", "Equipo": "Colector Generación", "Potencia unitaria": "-", "nº de unidades": prim_h['Num_Circuitos'], "Potencia total": "-", "Nivel de tensión": "-", "Especificaciones": f"DN{prim_h['DN_mm']} ({prim_h['Material']}). Q={prim_h['Caudal_Total_m3h']:.1f} m3/h" + _bombeo(prim_h)},
+        {"Zona": "HVAC Secundario", "Equipo": "Anillo Sala", "Potencia unitaria": "-", "nº de unidades": sec_h['Num_Circuitos'], "Potencia total": "-", "Nivel de tensión": "-", "Especificaciones": f"DN{sec_h['DN_mm']} ({sec_h['Material']}). V={sec_h['Velocidad_ms']:.2f} m/s" + _bombeo(sec_h)}
+    ]
+    if diseno.cerramientos_con_dlc > 0:
+        prim_d = res_dlc["Hidro_Prim"]; sec_d = res_dlc["Hidro_Sec"]
+        data.append({"Zona": "DLC Primario", "Equipo": "Loop Enfriamiento", "Potencia unitaria": "-", "nº de unidades": prim_d['Num_Circuitos'], "Potencia total": "-", "Nivel de tensión": "-", "Especificaciones": f"DN{prim_d['DN_mm']} ({prim_d['Material']}). Q={prim_d['Caudal_Total_m3h']:.1f} m3/h" + _bombeo(prim_d)})
+        data.append({"Zona": "DLC Secundario", "Equipo": "Loop Chips", "Potencia unitaria": "-", "nº de unidades": sec_d['Num_Circuitos'], "Potencia total": "-", "Nivel de tensión": "-", "Especificaciones": f"DN{sec_d['DN_mm']} ({sec_d['Material']}). V={sec_d['Velocidad_ms']:.2f} m/s" + _bombeo(sec_d)})
+    return pd.DataFrame(data)
+
+def generar_tabla_pci(diseno):
+    import pandas as pd
+    return pd.DataFrame([
+        {"Zona": "General", "Equipo": "Detección + Extinción", "Potencia unitaria": "-", "nº de unidades": int(diseno.centralitas_incendios), "Potencia total": f"{diseno.P_PCI_calc} W", "Nivel de tensión": "230V", "Especificaciones": f"Tecnología: {diseno.tecnologia_pci}"},
+        {"Zona": "Sala Bombas", "Equipo": "Grupo Presión", "Potencia unitaria": "20kW", "nº de unidades": int(diseno.grupos_bombeo_pci), "Potencia total": f"{diseno.grupos_bombeo_pci*20} kW", "Nivel de tensión": "400V", "Especificaciones": "Bomba Ppal + Reserva"}
+    ])
+
+def generar_tabla_control(diseno):
+    import pandas as pd
+    return pd.DataFrame([
+        {"Zona": "Seguridad", "Equipo": "CCTV & Accesos", "Potencia unitaria": "-", "nº de unidades": int(diseno.cctv_unidades), "Potencia total": f"{diseno.P_Control_calc} W", "Nivel de tensión": "PoE", "Especificaciones": f"Cámaras: {diseno.cctv_unidades}, Puntos Acc: {diseno.control_accesos_pax}"}
+    ])
+
+
+# ==============================================================================
+# PROYECTO COMPLETO (MOTOR + TABLAS), COMÚN A GUI Y CLI
+# ==============================================================================
+def calcular_metricas_sostenibilidad(diseno, WCR, CEF):
+    if diseno.P_IT_demandada > 0:
+        PUE = diseno.P_total_demandada / diseno.P_IT_demandada
+        WUE = (diseno.P_HVAC_demandada / diseno.P_IT_demandada) * WCR
+        CUE = PUE * CEF
+    else:
+        PUE = 1.0; WUE = 0.0; CUE = 0.0
+    return {"PUE": PUE, "CUE": CUE, "WUE": WUE}
+
+
+def calcular_proyecto(escenario):
+    # escenario: dict con los parámetros de DisenadorV14 (lo que falte sale de ESCENARIO_DEFECTO)
+    import pandas as pd
+    diseno = DisenadorV14(**{**ESCENARIO_DEFECTO, **escenario})
+    res_elec = diseno.dimensionar_sistema_electrico()
+    res_hvac = diseno.dimensionar_sistema_hvac_completo()
+    res_dlc = diseno.dimensionar_dlc_hidraulica()
+    kpis = diseno.calcular_kpis_densidad(res_hvac['Q_Instalada_kW'], res_elec['S_Total_N_kVA'])
+    dfs = {
+        "capex": diseno.calcular_presupuesto_detallado(res_elec, res_hvac, res_dlc),
+        "elec": generar_tabla_electrico(diseno, res_elec),
+        "hvac": generar_tabla_hvac_limpia(diseno, res_hvac),
+        "hidro": generar_tabla_hidraulica_unificada(diseno, res_hvac, res_dlc),
+        "pci": pd.concat([generar_tabla_pci(diseno), generar_tabla_control(diseno)]),
+        "ratios": generar_tabla_ratios(kpis),
+    }
+    return {"diseno": diseno, "res_elec": res_elec, "res_hvac": res_hvac, "res_dlc": res_dlc,
+            "consumos": diseno.calcular_consumos_desglosados(), "kpis": kpis, "dfs": dfs}
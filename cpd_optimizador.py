@@ -0,0 +1,197 @@
+# ==============================================================================
+# OPTIMIZADOR DEL ESPACIO DE DISEÑO (MÍNIMO CAPEX CON RESTRICCIONES)
+# ==============================================================================
+# Búsqueda evolutiva sobre variables discretas y continuas de DisenadorV14.
+# Cada generación se evalúa con el motor vectorizado (evaluar_lote), repartida
+# en bloques entre un pool de procesos. Admite parada temprana y checkpoints.
+import math
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from cpd_motor import ESCENARIO_DEFECTO, FACTORES_REDUNDANCIA, evaluar_lote
+
+# Variables: ("categoria", valores) | ("entero", min, max) | ("real", min, max)
+# "fraccion_dlc" es la fracción de cerramientos con DLC (se redondea a cerramientos).
+# cop_hvac_aire no entra por defecto: el presupuesto no le asigna precio, así que la
+# búsqueda lo llevaría siempre al máximo; se puede añadir en un `espacio` propio.
+ESPACIO_BUSQUEDA_DEFECTO = {
+    "redundancia_electrica": ("categoria", ["N", "N+1", "2N", "2N+1"]),
+    "tipo_cerramiento": ("categoria", ["Pasillo Frío", "Pasillo Caliente", "Sin Cerramiento"]),
+    "tecnologia_pci": ("categoria", ["Agua Nebulizada", "NOVEC 1230", "ARGONITE", "FM-200"]),
+    "racks_por_cerramiento": ("entero", 6, 24),
+    "fraccion_dlc": ("real", 0.0, 1.0),
+}
+
+# Restricciones por defecto (None = sin límite)
+RESTRICCIONES_DEFECTO = {"PUE_max": None, "densidad_IT_max": None, "trafo_max_kVA": None}
+
+PENALIZACION = 10.0  # multiplicador del CAPEX por unidad de violación relativa
+
+
+# --- Muestreo y construcción de escenarios ---
+def _muestrear(espacio, n, rng):
+    muestras = {}
+    for nombre, var in espacio.items():
+        if var[0] == "categoria":
+            muestras[nombre] = rng.integers(0, len(var[1]), n)
+        elif var[0] == "entero":
+            muestras[nombre] = rng.integers(var[1], var[2] + 1, n)
+        else:
+            muestras[nombre] = rng.uniform(var[1], var[2], n)
+    return muestras
+
+
+def _mutar(espacio, padres, n, sigma, prob_mutacion, rng):
+    # Hijos a partir de padres elegidos al azar: categorías re-sorteadas con
+    # probabilidad prob_mutacion, numéricas con ruido gaussiano de escala sigma
+    elegidos = rng.integers(0, len(next(iter(padres.values()))), n)
+    hijos = {}
+    for nombre, var in espacio.items():
+        base = padres[nombre][elegidos]
+        if var[0] == "categoria":
+            nuevos = rng.integers(0, len(var[1]), n)
+            hijos[nombre] = np.where(rng.random(n) < prob_mutacion, nuevos, base)
+        else:
+            lo, hi = var[1], var[2]
+            valor = np.clip(base + rng.normal(0.0, sigma * (hi - lo), n), lo, hi)
+            hijos[nombre] = np.rint(valor).astype(int) if var[0] == "entero" else valor
+    return hijos
+
+
+def construir_escenarios(espacio, muestras, base=None, racks_objetivo=None):
+    # Traduce las muestras a columnas de evaluar_lote. Si se fija racks_objetivo (escalar
+    # o uno por muestra), el nº de cerramientos se ajusta para mantener la capacidad en racks.
+    base = {**ESCENARIO_DEFECTO, **(base or {})}
+    columnas = {}
+    for nombre, var in espacio.items():
+        if nombre == "fraccion_dlc": continue
+        columnas[nombre] = np.asarray(var[1], dtype=object)[muestras[nombre]] if var[0] == "categoria" else muestras[nombre]
+    rpc = np.asarray(columnas.get("racks_por_cerramiento", base["racks_por_cerramiento"]))
+    if np.any(racks_objetivo):
+        columnas["num_cerramientos"] = np.ceil(racks_objetivo / rpc).astype(int)
+    n_cerr = np.asarray(columnas.get("num_cerramientos", base["num_cerramientos"]))
+    if "fraccion_dlc" in muestras:
+        columnas["cerramientos_con_dlc"] = np.rint(muestras["fraccion_dlc"] * n_cerr).astype(int)
+    for k, v in base.items():
+        columnas.setdefault(k, v)
+    return columnas
+
+
+# --- Evaluación (se ejecuta en los procesos del pool) ---
+def evaluar_objetivo(columnas, restricciones):
+    r = evaluar_lote(columnas, estricto=False)
+    capex = r["CAPEX_Total"]
+    violacion = np.zeros_like(capex)
+    limites = ((restricciones.get("PUE_max"), r["PUE"]),
+               (restricciones.get("densidad_IT_max"), r["Densidad Potencia IT (kW/m² IT)"]),
+               (restricciones.get("trafo_max_kVA"), r["T_capacidad"]))
+    for limite, valor in limites:
+        if limite is not None:
+            violacion += np.maximum(np.nan_to_num(valor, nan=np.inf) / limite - 1.0, 0.0)
+    objetivo = np.where(r["Valido"], capex * (1.0 + PENALIZACION * violacion), np.inf)
+    return {"objetivo": objetivo, "factible": r["Valido"] & (violacion == 0), "CAPEX_Total": capex,
+            "PUE": r["PUE"], "T_capacidad": r["T_capacidad"], "Densidad Potencia IT (kW/m² IT)": r["Densidad Potencia IT (kW/m² IT)"]}
+
+
+def _evaluar_bloque(args):
+    return evaluar_objetivo(*args)
+
+
+def _evaluar_en_pool(pool, columnas, restricciones, n, procesos):
+    if pool is None:
+        return evaluar_objetivo(columnas, restricciones)
+    tam = math.ceil(n / procesos)
+    bloques = []
+    for ini in range(0, n, tam):
+        bloque = {k: (v[ini:ini + tam] if np.ndim(v) else v) for k, v in columnas.items()}
+        bloques.append((bloque, restricciones))
+    partes = list(pool.map(_evaluar_bloque, bloques))
+    return {k: np.concatenate([p[k] for p in partes]) for k in partes[0]}
+
+
+# --- Checkpoints ---
+def _guardar_checkpoint(ruta, estado):
+    tmp = ruta + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(estado, f)
+    os.replace(tmp, ruta)
+
+
+def optimizar(base=None, espacio=None, restricciones=None, racks_objetivo=None,
+              poblacion=2000, generaciones=40, elite=0.1, paciencia=6, tolerancia=1e-4,
+              procesos=None, semilla=0, checkpoint=None, tiempo_max_s=None, progreso=None):
+    """Minimiza el CAPEX total de calcular_presupuesto_detallado sobre `espacio`.
+
+    Restricciones (claves de RESTRICCIONES_DEFECTO) se aplican como penalización;
+    el mejor resultado devuelto es siempre el mejor escenario factible. racks_objetivo
+    (por defecto, los racks de `base`) mantiene la capacidad; 0 la deja libre. Con el
+    espacio por defecto la redundancia eléctrica no baja de la de `base`. Con
+    `checkpoint` el estado se guarda cada generación y se reanuda si el fichero existe.
+    """
+    b = {**ESCENARIO_DEFECTO, **(base or {})}
+    if espacio is None:
+        # Sin restricción de disponibilidad, N siempre sería lo más barato
+        minimo = FACTORES_REDUNDANCIA[b["redundancia_electrica"]]
+        espacio = {**ESPACIO_BUSQUEDA_DEFECTO, "redundancia_electrica": (
+            "categoria", [r for r in ESPACIO_BUSQUEDA_DEFECTO["redundancia_electrica"][1] if FACTORES_REDUNDANCIA[r] >= minimo])}
+    if racks_objetivo is None:
+        # Sin capacidad fija el mínimo CAPEX sería el CPD más pequeño
+        racks_objetivo = int(b["num_cerramientos"]) * int(b["racks_por_cerramiento"])
+    restricciones = {**RESTRICCIONES_DEFECTO, **(restricciones or {})}
+    procesos = procesos or os.cpu_count() or 1
+    rng = np.random.default_rng(semilla)
+    n_elite = max(2, int(poblacion * elite))
+
+    estado = {"generacion": 0, "sigma": 0.25, "padres": None, "mejor": None, "historial": [], "sin_mejora": 0}
+    if checkpoint and os.path.exists(checkpoint):
+        with open(checkpoint, "rb") as f:
+            estado = pickle.load(f)
+        rng.bit_generator.state = estado["rng"]
+
+    t0 = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=procesos) if procesos > 1 else None
+    try:
+        while estado["generacion"] < generaciones:
+            if estado["padres"] is None:
+                muestras = _muestrear(espacio, poblacion, rng)
+            else:
+                muestras = _mutar(espacio, estado["padres"], poblacion, estado["sigma"], 0.2, rng)
+            columnas = construir_escenarios(espacio, muestras, base, racks_objetivo)
+            res = _evaluar_en_pool(pool, columnas, restricciones, poblacion, procesos)
+
+            orden = np.argsort(res["objetivo"], kind="stable")[:n_elite]
+            estado["padres"] = {k: v[orden] for k, v in muestras.items()}
+
+            factibles = np.flatnonzero(res["factible"])
+            mejora = False
+            if factibles.size:
+                i = factibles[np.argmin(res["CAPEX_Total"][factibles])]
+                capex = float(res["CAPEX_Total"][i])
+                previo = estado["mejor"]["CAPEX_Total"] if estado["mejor"] else np.inf
+                if capex < previo * (1 - tolerancia):
+                    mejora = True
+                if capex < previo:
+                    estado["mejor"] = {
+                        "escenario": {k: (v[i].item() if hasattr(v[i], "item") else v[i]) if np.ndim(v) else v
+                                      for k, v in columnas.items()},
+                        "CAPEX_Total": capex, "PUE": float(res["PUE"][i]), "T_capacidad": float(res["T_capacidad"][i]),
+                        "Densidad Potencia IT (kW/m² IT)": float(res["Densidad Potencia IT (kW/m² IT)"][i]),
+                    }
+            estado["sin_mejora"] = 0 if mejora else estado["sin_mejora"] + 1
+            estado["sigma"] *= 0.85
+            estado["generacion"] += 1
+            estado["historial"].append({"generacion": estado["generacion"], "factibles": int(factibles.size),
+                                        "mejor_CAPEX": estado["mejor"]["CAPEX_Total"] if estado["mejor"] else None})
+            estado["rng"] = rng.bit_generator.state
+            if checkpoint: _guardar_checkpoint(checkpoint, estado)
+            if progreso: progreso(estado["historial"][-1])
+
+            if estado["sin_mejora"] >= paciencia: break
+            if tiempo_max_s and time.perf_counter() - t0 > tiempo_max_s: break
+    finally:
+        if pool: pool.shutdown()
+    return estado
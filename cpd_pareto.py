@@ -0,0 +1,187 @@
+# ==============================================================================
+# EXPLORADOR DEL FRENTE DE PARETO (CAPEX / PUE / CUE / HUELLA / DISPONIBILIDAD)
+# ==============================================================================
+# Barrido aleatorio de escenarios de DisenadorV14 a potencia IT constante: la
+# densidad por rack fija el nº de racks y éstos la superficie (mismos m² por rack
+# que el escenario base). Todo vectorizado: evaluar_lote para CAPEX, horas
+# representativas de cpd_anual para PUE/CUE anuales y Markov por lotes para la
+# disponibilidad. El conjunto no dominado sale de una ordenación (O(n log n) en
+# 2-D) más un filtrado por bloques contra el frente acumulado en 3-5 objetivos.
+import time
+
+import numpy as np
+
+from cpd_motor import ESCENARIO_DEFECTO, _columnas_lote, evaluar_lote
+from cpd_optimizador import ESPACIO_BUSQUEDA_DEFECTO, _muestrear, construir_escenarios
+
+ESPACIO_PARETO_DEFECTO = {
+    **ESPACIO_BUSQUEDA_DEFECTO,
+    "redundancia_hvac": ("categoria", ["N", "N+1", "2N"]),
+    "servidores_por_rack": ("entero", 6, 40),
+    "prodfrio_tec": ("categoria", ["Chiller A/W", "Chiller A/W con free cooling", "Chiller W/W + Torre de refrigeración",
+                                   "Dry cooler seco"]),
+}
+
+# Objetivo -> (columna de resultados, etiqueta); todos se minimizan
+OBJETIVOS_PARETO = {
+    "CAPEX": ("CAPEX_Total", "CAPEX (€)"),
+    "PUE": ("PUE_anual", "PUE anual"),
+    "CUE": ("CUE_anual", "CUE anual (kgCO2/kWh)"),
+    "Huella": ("Huella_m2", "Superficie construida (m²)"),
+    "Indisponibilidad": ("Indisponibilidad_min_ano", "Indisponibilidad (min/año)"),
+}
+# Con un único CEF la CUE ordena igual que la PUE: no se incluye por defecto
+OBJETIVOS_DEFECTO = ("CAPEX", "PUE", "Huella", "Indisponibilidad")
+
+_ELEMENTOS_BLOQUE = 4_000_000   # comparaciones por bloque en el filtrado (memoria acotada)
+_BLOQUE_MAX = 2048              # puntos por bloque (la comparación interna es b x b)
+
+
+# --- Conjunto no dominado ---
+def frente_pareto(F):
+    """Máscara de los puntos no dominados de F (n x d, todos los objetivos a minimizar).
+
+    Puntos repetidos no se dominan entre sí: todas las copias quedan en el frente. Filas
+    con NaN nunca forman parte de él. 2-D: orden lexicográfico y mínimo acumulado,
+    O(n log n). d >= 3: mismo orden (un punto sólo puede estar dominado por otros
+    anteriores) y cada bloque se filtra contra el frente ya encontrado, O(n·|frente|).
+    """
+    F = np.asarray(F, dtype=float)
+    if F.ndim == 1: F = F[:, None]
+    n, d = F.shape
+    mascara = np.zeros(n, dtype=bool)
+    validos = np.flatnonzero(~np.isnan(F).any(axis=1))
+    if not validos.size: return mascara
+    U, inversa = np.unique(F[validos], axis=0, return_inverse=True)     # ordenadas lexicográficamente
+    if d == 1:
+        en_frente = np.arange(len(U)) == 0
+    elif d == 2:
+        minimo_previo = np.concatenate([[np.inf], np.minimum.accumulate(U[:-1, 1])])
+        en_frente = U[:, 1] < minimo_previo
+    else:
+        en_frente = np.zeros(len(U), dtype=bool)
+        frente = np.empty((0, d))
+        ini = 0
+        while ini < len(U):
+            b = min(len(U) - ini, _BLOQUE_MAX, max(64, _ELEMENTOS_BLOQUE // max(len(frente), 1)))
+            X = U[ini:ini + b]
+            dominado = np.zeros(b, dtype=bool)
+            if len(frente):
+                cubre = np.ones((b, len(frente)), dtype=bool)
+                for k in range(d):
+                    cubre &= frente[None, :, k] <= X[:, None, k]
+                dominado = cubre.any(axis=1)
+            # Dentro del bloque: sólo los anteriores (j < i) pueden dominar a i
+            idx = np.flatnonzero(~dominado)
+            Y = X[idx]
+            cubre = np.tril(np.ones((len(idx), len(idx)), dtype=bool), -1)
+            for k in range(d):
+                cubre &= Y[None, :, k] <= Y[:, None, k]
+            sobrevive = idx[~cubre.any(axis=1)]
+            en_frente[ini + sobrevive] = True
+            frente = np.concatenate([frente, X[sobrevive]])
+            ini += b
+    mascara[validos] = en_frente[inversa.ravel()]
+    return mascara
+
+
+# --- Barrido ---
+def construir_barrido(n=100_000, espacio=None, base=None, semilla=0):
+    """Columnas de evaluar_lote para n escenarios aleatorios de `espacio`.
+
+    La potencia IT de base se mantiene: servidores_por_rack fija el nº de racks y, con
+    él, los cerramientos, la sala IT y la superficie construida (m² por rack y relación
+    sala/edificio del escenario base). Devuelve (columnas, muestras).
+    """
+    espacio = ESPACIO_PARETO_DEFECTO if espacio is None else espacio
+    base = {**ESCENARIO_DEFECTO, **(base or {})}
+    rng = np.random.default_rng(semilla)
+    muestras = _muestrear(espacio, n, rng)
+    racks_base = base["num_cerramientos"] * base["racks_por_cerramiento"]
+    if racks_base <= 0 or base["area_sala_it"] <= 0:
+        raise ValueError("El escenario base necesita racks y superficie de sala IT")
+    spr = muestras.get("servidores_por_rack", base["servidores_por_rack"])
+    racks = np.ceil(racks_base * base["servidores_por_rack"] / np.asarray(spr)).astype(int)
+    c = construir_escenarios(espacio, muestras, base, racks_objetivo=racks)
+    racks = c["num_cerramientos"] * np.asarray(c["racks_por_cerramiento"])
+    c["area_sala_it"] = racks * (base["area_sala_it"] / racks_base)
+    c["area_por_planta"] = c["area_sala_it"] * (base["area_por_planta"] / base["area_sala_it"])
+    return c, muestras
+
+
+def evaluar_barrido(columnas, CEF=0.35, utilizacion=None, temperatura=None, componentes=None, precios=None,
+                    bloque=20_000, progreso=None):
+    """CAPEX, PUE/CUE anuales, huella e indisponibilidad de cada escenario (dict de arrays).
+
+    PUE anual con las horas representativas de cpd_anual (mismas series por defecto que
+    simular_anual); disponibilidad de Markov vectorizada. progreso(fracción, texto) por bloque.
+    """
+    from cpd_anual import anual_representativo, horas_representativas
+    from cpd_disponibilidad import _disponibilidad_vectorizada
+    c = _columnas_lote(columnas)
+    n = len(c["num_cerramientos"])
+    horas = horas_representativas(utilizacion, temperatura)
+    salida = {k: np.empty(n) for k in ("CAPEX_Total", "PUE_anual", "CUE_anual", "Huella_m2",
+                                       "Disponibilidad", "Indisponibilidad_min_ano", "P_IT_kW")}
+    salida["Valido"] = np.empty(n, dtype=bool)
+    for ini in range(0, n, bloque):
+        sl = slice(ini, min(ini + bloque, n))
+        cb = {k: v[sl] for k, v in c.items()}
+        r = evaluar_lote(cb, precios=precios, estricto=False)
+        anual = anual_representativo(cb, r, horas, CEF=CEF)
+        disp = _disponibilidad_vectorizada(cb, r, componentes)
+        salida["CAPEX_Total"][sl] = r["CAPEX_Total"]
+        salida["PUE_anual"][sl] = anual["PUE_anual"]; salida["CUE_anual"][sl] = anual["CUE_anual"]
+        salida["Huella_m2"][sl] = r["area_total_construida"]
+        salida["Disponibilidad"][sl] = disp["Disponibilidad"]
+        salida["Indisponibilidad_min_ano"][sl] = disp["Indisponibilidad_min_ano"]
+        salida["P_IT_kW"][sl] = r["P_IT_demandada"] / 1000
+        salida["Valido"][sl] = r["Valido"]
+        if progreso: progreso(sl.stop / n, f"Evaluando {sl.stop:,}/{n:,} escenarios")
+    return salida
+
+
+def matriz_objetivos(res, objetivos=OBJETIVOS_DEFECTO):
+    # n x d con las columnas de los objetivos; los escenarios no válidos, a NaN (fuera del frente)
+    F = np.column_stack([res[OBJETIVOS_PARETO[o][0]] for o in objetivos])
+    F[~res["Valido"]] = np.nan
+    return F
+
+
+def escenario_de(columnas, i):
+    # Escenario i del barrido como dict de escalares Python (para DisenadorV14 o el formulario)
+    return {k: (v[i].item() if hasattr(v[i], "item") else v[i]) if np.ndim(v) else v for k, v in columnas.items()}
+
+
+def explorar_pareto(n=100_000, objetivos=OBJETIVOS_DEFECTO, espacio=None, base=None, CEF=0.35, semilla=0,
+                    utilizacion=None, temperatura=None, progreso=None):
+    """Barrido + evaluación + frente de Pareto.
+
+    Devuelve {"columnas", "resultados", "frente" (máscara), "objetivos", "tiempos" (s por fase)}.
+    """
+    objetivos = tuple(objetivos)
+    desconocidos = [o for o in objetivos if o not in OBJETIVOS_PARETO]
+    if desconocidos:
+        raise ValueError(f"Objetivos desconocidos: {desconocidos} (válidos: {list(OBJETIVOS_PARETO)})")
+    tiempos = {}
+    t = time.perf_counter()
+    columnas, _ = construir_barrido(n, espacio, base, semilla)
+    tiempos["barrido_s"] = time.perf_counter() - t; t = time.perf_counter()
+    res = evaluar_barrido(columnas, CEF=CEF, utilizacion=utilizacion, temperatura=temperatura, progreso=progreso)
+    tiempos["evaluacion_s"] = time.perf_counter() - t; t = time.perf_counter()
+    frente = frente_pareto(matriz_objetivos(res, objetivos))
+    tiempos["frente_s"] = time.perf_counter() - t
+    return {"columnas": columnas, "resultados": res, "frente": frente, "objetivos": objetivos, "tiempos": tiempos}
+
+
+def tabla_frente(exploracion, variables=None):
+    # DataFrame con objetivos y variables de diseño de los escenarios del frente (por CAPEX)
+    import pandas as pd
+    c, res = exploracion["columnas"], exploracion["resultados"]
+    idx = np.flatnonzero(exploracion["frente"])
+    idx = idx[np.argsort(res["CAPEX_Total"][idx], kind="stable")]
+    variables = variables or [k for k in ESPACIO_PARETO_DEFECTO if k != "fraccion_dlc"] + ["num_cerramientos", "cerramientos_con_dlc"]
+    datos = {"escenario": idx}
+    datos.update({etiqueta: res[col][idx] for col, etiqueta in OBJETIVOS_PARETO.values()})
+    datos.update({k: np.broadcast_to(c[k], (len(exploracion["frente"]),))[idx] for k in variables if k in c})
+    return pd.DataFrame(datos)
@@ -0,0 +1,187 @@
+# ==============================================================================
+# LIBROS DE PRECIOS: CAPEX COMO MATRIZ CANTIDADES x PRECIOS
+# ==============================================================================
+# Las cantidades del presupuesto se extraen una vez por escenario en una matriz
+# (escenario x par categoría/precio unitario) que sólo guarda los pares que
+# aparecen en alguna partida: ~35 de las 8 x 41 columnas posibles. Los libros de
+# precios (regionales, de fabricante, años de escalado) se leen de ficheros
+# versionados a una matriz (precio x libro). Un único producto matricial valora
+# S escenarios contra B libros, con los subtotales por categoría.
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from cpd_motor import CATEGORIAS_CAPEX, PRECIOS_REF, _columnas_lote, _evaluar_tecnico, _lineas_presupuesto_lote
+
+CLAVES_PRECIOS = tuple(PRECIOS_REF)
+
+
+# --- Libros de precios ---
+class LibrosPrecios:
+    """B libros de precios como matriz P (precio x libro) en el orden de CLAVES_PRECIOS.
+
+    nombres y versiones: una por libro; origen: fichero del que sale cada uno.
+    """
+
+    def __init__(self, nombres, P, versiones=None, origenes=None):
+        self.nombres = list(nombres)
+        self.P = np.asarray(P, dtype=float).reshape(len(CLAVES_PRECIOS), len(self.nombres))
+        self.versiones = list(versiones) if versiones is not None else [""] * len(self.nombres)
+        self.origenes = list(origenes) if origenes is not None else [""] * len(self.nombres)
+        repetidos = sorted({n for n in self.nombres if self.nombres.count(n) > 1})
+        if repetidos:
+            raise ValueError(f"Libros de precios repetidos: {repetidos}")
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def libro(self, nombre):
+        # Precios de un libro como dict (para evaluar_lote o calcular_presupuesto_detallado)
+        return dict(zip(CLAVES_PRECIOS, self.P[:, self.nombres.index(nombre)].tolist()))
+
+    @classmethod
+    def desde_dicts(cls, libros, version="", origen=""):
+        # libros: {nombre: {clave: precio}}; las claves que faltan salen de PRECIOS_REF
+        columnas = []
+        for nombre, precios in libros.items():
+            desconocidas = set(precios) - set(CLAVES_PRECIOS)
+            if desconocidas:
+                raise ValueError(f"Libro '{nombre}': precios desconocidos {sorted(desconocidas)}")
+            columnas.append([float(precios.get(k, PRECIOS_REF[k])) for k in CLAVES_PRECIOS])
+        P = np.array(columnas).T if columnas else np.zeros((len(CLAVES_PRECIOS), 0))
+        return cls(libros, P, [version] * len(libros), [origen] * len(libros))
+
+    @classmethod
+    def unir(cls, partes):
+        partes = list(partes)
+        return cls([n for p in partes for n in p.nombres],
+                   np.concatenate([p.P for p in partes], axis=1) if partes else np.zeros((len(CLAVES_PRECIOS), 0)),
+                   [v for p in partes for v in p.versiones], [o for p in partes for o in p.origenes])
+
+
+def _libros_de_objeto(obj):
+    # Objeto JSON/YAML: {"nombre", "version"?, "precios", "multiplicador"?,
+    # "escalado_anual"?, "ano_base"?, "anos"?}; con "anos" da un libro por año (nombre@año)
+    if "nombre" not in obj:
+        raise ValueError("Cada libro de precios necesita 'nombre'")
+    m = float(obj.get("multiplicador", 1.0))
+    precios = {k: m * float(v) for k, v in {**PRECIOS_REF, **(obj.get("precios") or {})}.items()}
+    if "anos" not in obj:
+        return {str(obj["nombre"]): precios}
+    tasa, base = float(obj.get("escalado_anual", 0.0)), int(obj.get("ano_base", min(obj["anos"])))
+    return {f"{obj['nombre']}@{int(a)}": {k: p * (1 + tasa) ** (int(a) - base) for k, p in precios.items()}
+            for a in obj["anos"]}
+
+
+def cargar_libros_precios(*rutas):
+    """Lee libros de precios de ficheros JSON/YAML (un objeto o una lista) o CSV.
+
+    CSV: columna "partida" con las claves de PRECIOS_REF y una columna por libro (celdas
+    vacías = PRECIOS_REF). Versión: la declarada en el objeto ("version") o, si no hay,
+    los 12 primeros caracteres del SHA-256 del fichero, para trazar qué precios se usaron.
+    """
+    partes = []
+    for ruta in rutas:
+        with open(ruta, "rb") as f:
+            contenido = f.read()
+        huella = hashlib.sha256(contenido).hexdigest()[:12]
+        ext = os.path.splitext(ruta)[1].lower()
+        if ext == ".csv":
+            import pandas as pd
+            df = pd.read_csv(ruta).set_index("partida")
+            libros = {str(col): {k: v for k, v in df[col].items() if not (isinstance(v, float) and np.isnan(v))}
+                      for col in df.columns}
+            partes.append(LibrosPrecios.desde_dicts(libros, huella, ruta))
+            continue
+        if ext in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise SystemExit("Instala 'PyYAML' para leer libros de precios YAML.")
+            datos = yaml.safe_load(contenido)
+        else:
+            datos = json.loads(contenido)
+        for obj in [datos] if isinstance(datos, dict) else datos:
+            partes.append(LibrosPrecios.desde_dicts(_libros_de_objeto(obj), str(obj.get("version", huella)), ruta))
+    return LibrosPrecios.unir(partes)
+
+
+def libros_sinteticos(n=50, semilla=0, anos=5, escalado_anual=0.03):
+    # n libros de prueba: regiones con un índice de precios y desviación por partida,
+    # cada una escalada a `anos` años (n/anos regiones)
+    rng = np.random.default_rng(semilla)
+    base = np.array([PRECIOS_REF[k] for k in CLAVES_PRECIOS])
+    regiones = -(-n // anos)
+    P = (base[:, None] * rng.lognormal(0.0, 0.15, regiones) * rng.uniform(0.9, 1.1, (len(base), regiones)))
+    escala = (1 + escalado_anual) ** np.arange(anos)
+    P = (P[:, :, None] * escala).reshape(len(base), -1)[:, :n]
+    nombres = [f"region_{i // anos + 1:02d}@{2025 + i % anos}" for i in range(n)]
+    return LibrosPrecios(nombres, P, ["sintetico"] * n)
+
+
+# --- Cantidades ---
+class MatrizCantidades:
+    """Cantidades del presupuesto: Q (escenario x par) con pares (categoría, precio).
+
+    Q[s, j] @ precio[clave[j]] es lo que aporta el par j a la categoría categoria[j] del
+    escenario s. Sólo se guardan los pares que alguna partida usa en el lote; el resto
+    de la matriz (escenario x categoría x precio) es cero.
+    """
+
+    def __init__(self, Q, categoria, clave):
+        self.Q = Q
+        self.categoria = categoria
+        self.clave = clave
+
+    def __len__(self):
+        return self.Q.shape[0]
+
+    @property
+    def densidad(self):
+        # Fracción de la matriz completa (escenario x categoría x precio) que se guarda
+        return self.Q.shape[1] / (len(CATEGORIAS_CAPEX) * len(CLAVES_PRECIOS))
+
+
+def extraer_cantidades(escenarios, estricto=True):
+    """MatrizCantidades de un lote (DataFrame o dict de columnas, como evaluar_lote).
+
+    Las partidas son lineales en cada precio: se evalúan una vez con los precios unitarios
+    e_k apilados en un eje y cada línea aporta a los pares (categoría, k) que usa.
+    """
+    c = _columnas_lote(escenarios)
+    r = _evaluar_tecnico(c, estricto)
+    S, K = r["P_IT_demandada"].shape[0], len(CLAVES_PRECIOS)
+    unitarios = dict(zip(CLAVES_PRECIOS, np.eye(K)[:, :, None]))
+    indice_cat = {cat: i for i, cat in enumerate(CATEGORIAS_CAPEX)}
+    pares = {}
+    for cat, _, _, cant, pu, presente in _lineas_presupuesto_lote(c, r, unitarios):
+        pu = np.asarray(pu).reshape(K, -1)
+        importe = np.broadcast_to(np.where(presente, np.multiply(cant, pu), 0.0), (K, S))
+        for k in np.flatnonzero(pu.any(axis=1)):
+            clave = (indice_cat[cat], k)
+            pares[clave] = pares[clave] + importe[k] if clave in pares else importe[k].copy()
+    orden = sorted(pares)
+    Q = np.column_stack([pares[p] for p in orden]) if orden else np.zeros((S, 0))
+    return MatrizCantidades(Q, np.array([p[0] for p in orden], dtype=np.int64), np.array([p[1] for p in orden], dtype=np.int64))
+
+
+def valorar(cantidades, libros, categorias=True):
+    """CAPEX de cada escenario con cada libro: {"CAPEX_Total": (S, B), "CAPEX_<cat>": (S, B)}.
+
+    Con categorias=True un único producto Q @ E, con E (par x categoría·libro) el precio
+    de cada par en la columna de su categoría, da los subtotales; sin ellas, Q @ P[clave].
+    Coincide con evaluar_lote(precios=libro) salvo redondeo.
+    """
+    Q, P = cantidades.Q, libros.P[cantidades.clave]        # P: (par, libro)
+    S, B, C = len(cantidades), len(libros), len(CATEGORIAS_CAPEX)
+    if not categorias:
+        return {"CAPEX_Total": Q @ P}
+    E = np.zeros((Q.shape[1], C, B))
+    E[np.arange(Q.shape[1]), cantidades.categoria] = P
+    por_categoria = (Q @ E.reshape(-1, C * B)).reshape(S, C, B)
+    res = {"CAPEX_Total": por_categoria.sum(axis=1)}
+    for i, cat in enumerate(CATEGORIAS_CAPEX):
+        res[f"CAPEX_{cat}"] = por_categoria[:, i]
+    return res
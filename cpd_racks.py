@@ -0,0 +1,163 @@
+# ==============================================================================
+# INVENTARIO DE RACKS HETEROGÉNEO (ESTRUCTURA DE ARRAYS)
+# ==============================================================================
+# DisenadorV14 supone racks idénticos (servidores_por_rack x P_max). Aquí cada rack
+# tiene su cerramiento, nº de servidores, potencia por servidor, captura DLC y
+# alimentación (A, B o A+B) como una columna NumPy: un elemento por rack, ningún
+# objeto Python por rack. Circuitos de rack, blindobarras por cerramiento y lado,
+# cargas de CDU y totales salen de agregaciones vectorizadas (np.bincount /
+# reduceat sobre el índice de cerramiento).
+import numpy as np
+
+from cpd_motor import CATALOGO_CIRCUITO_RACK_A, CATALOGO_BLINDOBARRA_A, ESCENARIO_DEFECTO
+
+ALIMENTACIONES = ("A", "B", "AB")
+TENSION_V = 400
+FACTOR_CIRCUITO_RACK = 1.25        # margen del magnetotérmico sobre la corriente del rack (como el motor)
+UMBRAL_PUNTO_CALIENTE_KW = 20.0    # racks por encima de esta potencia se listan como puntos calientes
+
+
+def _catalogo(catalogo, requerido):
+    # Primer calibre >= requerido; NaN si no hay ninguno (fuera de catálogo)
+    cat = np.asarray(catalogo, dtype=float)
+    idx = np.searchsorted(cat, requerido, side="left")
+    return np.where(idx < len(cat), cat[np.minimum(idx, len(cat) - 1)], np.nan)
+
+
+class InventarioRacks:
+    """Racks como columnas NumPy (una posición por rack).
+
+    cerramiento: etiqueta del cerramiento de cada rack (se agrupa por ella).
+    servidores, P_max, P_idle (W por servidor), captura_dlc (fracción del calor al
+    circuito DLC) y alimentacion ("A", "B" o "AB"): array por rack o escalar común.
+    """
+
+    def __init__(self, cerramiento, servidores, P_max, P_idle=0.0, captura_dlc=0.0, alimentacion="AB", nombres=None):
+        self.cerramientos, self.cerramiento = np.unique(np.asarray(cerramiento), return_inverse=True)
+        n = len(self.cerramiento)
+        columna = lambda v, dtype: np.ascontiguousarray(np.broadcast_to(np.asarray(v, dtype=dtype), (n,)))
+        self.servidores = columna(servidores, np.int32)
+        self.P_max = columna(P_max, np.float64)
+        self.P_idle = columna(P_idle, np.float64)
+        self.captura_dlc = columna(captura_dlc, np.float64)
+        alimentacion = np.broadcast_to(np.asarray(alimentacion), (n,))
+        self.alimentacion = np.full(n, -1, dtype=np.int8)
+        for i, a in enumerate(ALIMENTACIONES):
+            self.alimentacion[alimentacion == a] = i
+        if (self.alimentacion < 0).any():
+            raise ValueError(f"Alimentación desconocida: {sorted(set(alimentacion[self.alimentacion < 0].tolist()))}")
+        self.nombres = None if nombres is None else np.asarray(nombres)
+
+    def __len__(self):
+        return len(self.cerramiento)
+
+    @classmethod
+    def desde_escenario(cls, escenario):
+        # Racks idénticos de un escenario de DisenadorV14 (los primeros cerramientos llevan DLC)
+        e = {**ESCENARIO_DEFECTO, **escenario}
+        nc, rpc = e["num_cerramientos"], e["racks_por_cerramiento"]
+        cerramiento = np.repeat(np.arange(nc), rpc)
+        return cls(cerramiento, e["servidores_por_rack"], e["P_max"], e["P_idle"],
+                   np.where(cerramiento < e["cerramientos_con_dlc"], e["eficiencia_captura_dlc"], 0.0),
+                   "AB" if e["suministro_AB"] == "2 Lados (A y B)" else "A")
+
+    @classmethod
+    def sintetico(cls, n_racks, racks_por_cerramiento=24, semilla=0):
+        # Campus de prueba: densidades mezcladas, un 20 % de cerramientos con DLC y algunos racks de un solo lado
+        rng = np.random.default_rng(semilla)
+        cerramiento = np.arange(n_racks) // racks_por_cerramiento
+        dlc = rng.random(cerramiento[-1] + 1 if n_racks else 0) < 0.2
+        return cls(cerramiento, rng.integers(4, 41, n_racks), rng.choice([250.0, 400.0, 500.0, 700.0, 1000.0], n_racks),
+                   rng.uniform(80.0, 150.0, n_racks), np.where(dlc[cerramiento], 0.8, 0.0),
+                   rng.choice(np.array(ALIMENTACIONES), n_racks, p=[0.05, 0.05, 0.9]))
+
+
+def dimensionar_racks(inv, utilizacion=1.0):
+    """Circuitos por rack, blindobarras A/B y CDU por cerramiento y totales del inventario.
+
+    utilizacion interpola la potencia por servidor entre P_idle (0) y P_max (1); el
+    dimensionado eléctrico usa siempre P_max. Devuelve {"rack", "cerramiento", "totales"}:
+    dicts de arrays por rack / por cerramiento y un dict de totales.
+    """
+    ncerr = len(inv.cerramientos)
+    suma = lambda w: np.bincount(inv.cerramiento, weights=w, minlength=ncerr)
+
+    # --- Por rack ---
+    P_rack = inv.servidores * inv.P_max
+    P_rack_op = inv.servidores * (inv.P_idle + utilizacion * (inv.P_max - inv.P_idle))
+    I_rack = (P_rack / TENSION_V) / np.sqrt(3)
+    circuito = _catalogo(CATALOGO_CIRCUITO_RACK_A, I_rack * FACTOR_CIRCUITO_RACK)
+    Q_DLC = P_rack_op * inv.captura_dlc
+
+    # --- Por cerramiento: cada lado lleva los racks que alimenta (los A+B, completos en ambos) ---
+    lado_A = inv.alimentacion != 1; lado_B = inv.alimentacion != 0
+    I_bb_A = suma(np.where(lado_A, P_rack, 0.0)) / TENSION_V / np.sqrt(3)
+    I_bb_B = suma(np.where(lado_B, P_rack, 0.0)) / TENSION_V / np.sqrt(3)
+    orden = np.argsort(inv.cerramiento, kind="stable")
+    inicios = np.searchsorted(inv.cerramiento[orden], np.arange(ncerr))
+    cerr = {
+        "cerramiento": inv.cerramientos,
+        "racks": np.bincount(inv.cerramiento, minlength=ncerr),
+        "servidores": np.bincount(inv.cerramiento, weights=inv.servidores, minlength=ncerr).astype(np.int64),
+        "P_IT_kW": suma(P_rack_op) / 1000,
+        "P_rack_max_kW": np.maximum.reduceat(P_rack[orden], inicios) / 1000 if len(inv) else np.zeros(0),
+        "Q_DLC_kW": suma(Q_DLC) / 1000,                 # carga de las CDU del cerramiento
+        "I_blindobarra_A": I_bb_A, "I_blindobarra_B": I_bb_B,
+        "blindobarra_A": _catalogo(CATALOGO_BLINDOBARRA_A, I_bb_A), "blindobarra_B": _catalogo(CATALOGO_BLINDOBARRA_A, I_bb_B),
+    }
+    cerr["Q_aire_kW"] = cerr["P_IT_kW"] - cerr["Q_DLC_kW"]
+
+    # --- Totales ---
+    fuera = np.isnan(circuito)
+    calibres, n_calibre = np.unique(circuito[~fuera], return_counts=True)
+    calientes = np.flatnonzero(P_rack / 1000 > UMBRAL_PUNTO_CALIENTE_KW)
+    totales = {
+        "racks": len(inv), "cerramientos": ncerr, "servidores": int(inv.servidores.sum()),
+        "P_IT_kW": float(cerr["P_IT_kW"].sum()), "P_IT_max_kW": float(P_rack.sum() / 1000),
+        "Q_DLC_kW": float(cerr["Q_DLC_kW"].sum()), "Q_aire_kW": float(cerr["Q_aire_kW"].sum()),
+        "P_rack_max_kW": float(P_rack.max() / 1000) if len(inv) else 0.0,
+        "circuitos_por_calibre": {int(c): int(k) for c, k in zip(calibres, n_calibre)},
+        "racks_fuera_catalogo": int(fuera.sum()),
+        "blindobarras_fuera_catalogo": int(np.isnan(cerr["blindobarra_A"]).sum() + np.isnan(cerr["blindobarra_B"]).sum()),
+        "puntos_calientes": int(calientes.size),
+    }
+    rack = {"P_kW": P_rack / 1000, "P_operacion_kW": P_rack_op / 1000, "I_A": I_rack, "circuito_A": circuito,
+            "Q_DLC_kW": Q_DLC / 1000}
+    return {"rack": rack, "cerramiento": cerr, "totales": totales}
+
+
+def puntos_calientes(inv, res, n=20):
+    # Los n racks de mayor potencia por encima de UMBRAL_PUNTO_CALIENTE_KW (DataFrame)
+    import pandas as pd
+    P = res["rack"]["P_kW"]
+    idx = np.flatnonzero(P > UMBRAL_PUNTO_CALIENTE_KW)
+    idx = idx[np.argsort(-P[idx], kind="stable")[:n]]
+    return pd.DataFrame({"rack": inv.nombres[idx] if inv.nombres is not None else idx,
+                         "cerramiento": inv.cerramientos[inv.cerramiento[idx]],
+                         "P (kW)": P[idx], "Circuito (A)": res["rack"]["circuito_A"][idx]})
+
+
+def escenario_equivalente(inv, base=None):
+    """Parámetros de DisenadorV14 (racks idénticos) con los mismos totales que el inventario.
+
+    num_cerramientos y racks_por_cerramiento/servidores_por_rack redondeados a la media;
+    P_max y P_idle se reescalan para conservar la potencia IT total, y la captura DLC se
+    reparte entre los cerramientos que la tienen.
+    """
+    e = dict(ESCENARIO_DEFECTO if base is None else base)
+    if not len(inv):
+        raise ValueError("Inventario vacío")
+    ncerr = len(inv.cerramientos)
+    rpc = max(1, round(len(inv) / ncerr))
+    spr = max(1, round(int(inv.servidores.sum()) / (ncerr * rpc)))
+    servidores = ncerr * rpc * spr
+    P = inv.servidores * inv.P_max
+    Q_dlc = np.bincount(inv.cerramiento, weights=P * inv.captura_dlc, minlength=ncerr)
+    con_dlc = int((Q_dlc > 0).sum())
+    # El motor captura P_IT x (con_dlc / ncerr) x eficiencia
+    eficiencia = min(1.0, Q_dlc.sum() / (P.sum() * con_dlc / ncerr)) if con_dlc else e["eficiencia_captura_dlc"]
+    e.update(num_cerramientos=ncerr, racks_por_cerramiento=rpc, servidores_por_rack=spr,
+             P_max=float(P.sum() / servidores), P_idle=float((inv.servidores * inv.P_idle).sum() / servidores),
+             cerramientos_con_dlc=con_dlc, eficiencia_captura_dlc=float(eficiencia),
+             suministro_AB="2 Lados (A y B)" if (inv.alimentacion != 0).any() else "1 Lado (A)")
+    return e
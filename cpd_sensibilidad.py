@@ -0,0 +1,275 @@
+# ==============================================================================
+# SENSIBILIDAD (TORNADO) DEL CAPEX Y LA PUE FRENTE A CADA ENTRADA
+# ==============================================================================
+# Cada parámetro numérico de DisenadorV14 se recorre en una rejilla de ±delta
+# alrededor del escenario (los enteros, en sus valores enteros) y cada parámetro
+# de texto en las alternativas del formulario (OPCIONES_FORMULARIO); todas las variantes se evalúan en una única
+# llamada a evaluar_lote. Los precios de PRECIOS_REF entran por la matriz de
+# cantidades de cpd_precios: el CAPEX es lineal en cada precio, así que un único
+# producto valora las 2·K variantes ±delta de forma exacta.
+#
+# Los catálogos (trafo kVA, blindobarra A, DN y nº de circuitos, equipos de sala)
+# hacen el CAPEX escalonado: la derivada en el punto es 0 o infinita según dónde
+# caiga el escalón. La elasticidad es por eso la pendiente por mínimos cuadrados
+# de la variación relativa sobre toda la rejilla (elasticidad de arco), y cada
+# fila indica qué selecciones de catálogo cambian dentro del intervalo y dónde.
+# Un entero pequeño no puede moverse ±delta (num_plantas 2 sólo llega a 1…3, ±50 %):
+# su "paso" real se guarda y el tornado lo ordena por la oscilación escalada a ±delta
+# y lo etiqueta con su paso, en vez de compararlo como si fuera de ±delta.
+import numpy as np
+
+from cpd_motor import ESCENARIO_DEFECTO, OPCIONES_FORMULARIO, PARAMETROS_DISENO, PRECIOS_REF, evaluar_lote
+
+DELTA_DEFECTO = 0.10     # ±10 % sobre el valor del escenario
+PUNTOS_DEFECTO = 9       # puntos de la rejilla de cada entrada numérica (incluido el escenario)
+METRICAS_SENSIBILIDAD = {"CAPEX_Total": "CAPEX", "PUE": "PUE"}
+
+# Límites de las entradas numéricas (mínimo, máximo); el resto, >= 0
+LIMITES = {"num_cerramientos": (1, None), "racks_por_cerramiento": (1, None), "servidores_por_rack": (1, None),
+           "num_plantas": (1, None), "eficiencia_captura_dlc": (0.0, 1.0)}
+
+# Selecciones de catálogo que se vigilan: (etiqueta, resultado de evaluar_lote o función)
+SELECCIONES_CATALOGO = (
+    ("Trafo (kVA)", "T_capacidad"), ("Blindobarra (A)", "I_blindobarra"), ("Circuito rack (A)", "I_rack_distribucion"),
+    ("DN HVAC prim.", "HVAC_Prim_DN_mm"), ("DN HVAC sec.", "HVAC_Sec_DN_mm"),
+    ("DN DLC prim.", "DLC_Prim_DN_mm"), ("DN DLC sec.", "DLC_Sec_DN_mm"),
+    ("Circuitos HVAC prim.", "HVAC_Prim_Num_Circuitos"), ("Circuitos HVAC sec.", "HVAC_Sec_Num_Circuitos"),
+    ("Circuitos DLC prim.", "DLC_Prim_Num_Circuitos"), ("Circuitos DLC sec.", "DLC_Sec_Num_Circuitos"),
+    ("Equipos CRAH/InRow", lambda r: np.ceil(r["Q_Instalada_kW"] / 100)), ("Bombas HVAC", "Bombas_HVAC"),
+)
+
+
+# --- Lote de variantes ---
+def _valores_numericos(p, x, rel, base):
+    # Valores de la rejilla de p (sin el del escenario); base 0: pasos absolutos
+    entero = isinstance(ESCENARIO_DEFECTO[p], (int, np.integer)) and not isinstance(ESCENARIO_DEFECTO[p], bool)
+    valores = x * (1 + rel) if x != 0 else (rel / rel.max() if entero else rel)
+    if entero:
+        valores = np.unique(np.round(valores))
+        valores = np.union1d(valores, [x - 1, x + 1])   # al menos un paso a cada lado
+    minimo, maximo = LIMITES.get(p, (0, None))
+    if p == "cerramientos_con_dlc": maximo = base["num_cerramientos"]
+    valores = np.clip(valores, minimo, maximo if maximo is not None else np.inf)
+    return np.unique(valores[valores != x])
+
+
+def construir_variantes(escenario, delta=DELTA_DEFECTO, puntos=PUNTOS_DEFECTO):
+    """Columnas de evaluar_lote con el escenario (fila 0) y las variantes de cada parámetro.
+
+    Devuelve (columnas, entrada, base): entrada[i] es el índice en PARAMETROS_DISENO del
+    parámetro que cambia en la fila i (-1 en la fila 0).
+    """
+    base = {**ESCENARIO_DEFECTO, **escenario}
+    rel = np.linspace(-delta, delta, puntos)
+    bloques = []
+    for j, p in enumerate(PARAMETROS_DISENO):
+        x = base[p]
+        if isinstance(x, str):
+            valores = [v for v in OPCIONES_FORMULARIO.get(p, []) if v != x]
+        else:
+            valores = _valores_numericos(p, float(x), rel, base).tolist()
+        bloques.append((j, valores))
+    n = 1 + sum(len(v) for _, v in bloques)
+    entrada = np.full(n, -1, dtype=np.int64)
+    columnas = {p: np.full(n, base[p], dtype=object if isinstance(base[p], str) else float) for p in PARAMETROS_DISENO}
+    fila = 1
+    for j, valores in bloques:
+        columnas[PARAMETROS_DISENO[j]][fila:fila + len(valores)] = valores
+        entrada[fila:fila + len(valores)] = j
+        fila += len(valores)
+    return columnas, entrada, base
+
+
+# --- Resumen por entrada ---
+def _por_grupo(ufunc, v, inicio):
+    return ufunc.reduceat(v, inicio) if len(v) else np.zeros(0)
+
+
+def _elasticidades(x, y, x0, y0, inicio):
+    # Pendiente por mínimos cuadrados de y/y0 - 1 frente a x/x0 - 1 en cada grupo (NaN si la
+    # base es 0 o hay menos de dos puntos válidos): sumas por grupo con add.reduceat
+    ok = ~np.isnan(y) & (x0 != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = np.where(ok, x / np.where(x0 != 0, x0, 1) - 1, 0.0)
+        v = np.where(ok, y / y0 - 1, 0.0) if y0 and np.isfinite(y0) else np.zeros_like(u)
+        n, su, sv = (_por_grupo(np.add, a, inicio) for a in (ok.astype(float), u, v))
+        suu, suv = _por_grupo(np.add, u * u, inicio), _por_grupo(np.add, u * v, inicio)
+        pendiente = (suv - su * sv / n) / (suu - su * su / n)
+    valida = (n >= 2) & np.isfinite(pendiente) & bool(y0 and np.isfinite(y0))
+    return np.where(valida, pendiente, np.nan)
+
+
+def _escalones(x, S, etiquetas, i0, x0):
+    # Selección de catálogo más cercana al escenario (columna i0 de S, una fila por selección)
+    # que cambia por debajo y por encima. Sólo cuenta si es escalonada en la rejilla: fuera de
+    # catálogo (trafo = kVA requeridos) o con muchos equipos cambia en cada punto y es, a
+    # efectos prácticos, continua
+    escalonada = (S[:, 1:] == S[:, :-1]).any(axis=1)
+    if not escalonada.any():
+        return ""
+    # Columna False en los extremos para que argmax no falle con el escenario en uno de ellos
+    distinta = np.pad(S != S[:, i0:i0 + 1], ((0, 0), (1, 1)))
+    abajo, arriba = distinta[:, i0::-1], distinta[:, i0 + 2:]
+    cambios = ((abajo.any(axis=1) & escalonada, i0 - 1 - abajo.argmax(axis=1)),
+               (arriba.any(axis=1) & escalonada, i0 + 1 + arriba.argmax(axis=1)))
+    textos = []
+    for k in np.flatnonzero(escalonada):
+        for hay, i in cambios:
+            if hay[k]:
+                cambio = f"{x[i[k]] / x0 - 1:+.0%}" if x0 else f"={x[i[k]]:g}"
+                textos.append(f"{etiquetas[k]} {S[k, i0]:g}→{S[k, i[k]]:g} ({cambio})")
+    return "; ".join(textos)
+
+
+def _formato(v):
+    return f"{v:g}" if isinstance(v, (float, int, np.floating, np.integer)) else str(v)
+
+
+def analizar_sensibilidad(escenario, delta=DELTA_DEFECTO, puntos=PUNTOS_DEFECTO, precios=None, con_precios=True):
+    """Sensibilidad del CAPEX y la PUE a cada parámetro de DisenadorV14 y a cada precio.
+
+    Devuelve un dict de arrays (una fila por entrada) con "entrada", "tipo" (real, entero,
+    texto, precio), "base", "rango", "paso" (mayor desviación relativa recorrida; NaN en las
+    de texto y con base 0) y, por métrica (CAPEX_Total, PUE): "<m>_bajo"/"<m>_alto"
+    (valor con la entrada en su extremo inferior/superior; en las de texto, mínimo y máximo
+    de las alternativas), "<m>_oscilacion" (máximo - mínimo en la rejilla) y
+    "<m>_elasticidad" (de arco, ver cabecera). "escalones" lista las selecciones de
+    catálogo que cambian en el intervalo y "fuera_catalogo" cuenta variantes no dimensionables.
+    Además "referencia" ({métrica: valor del escenario}), "variantes" (filas del lote) y "delta".
+    """
+    precios = PRECIOS_REF if precios is None else precios
+    columnas, entrada, base = construir_variantes(escenario, delta, puntos)
+    r = evaluar_lote(columnas, precios=precios, estricto=False)
+    valido = r["Valido"]
+    metricas = {m: np.where(valido, r[m], np.nan) for m in METRICAS_SENSIBILIDAD}
+    referencia = {m: float(v[0]) for m, v in metricas.items()}
+    S = np.vstack([np.asarray(col(r) if callable(col) else r[col], dtype=float) for _, col in SELECCIONES_CATALOGO])
+    etiquetas = [e for e, _ in SELECCIONES_CATALOGO]
+
+    # Un grupo de filas por entrada (contiguas en el lote) con el escenario (fila 0) intercalado:
+    # las numéricas quedan ordenadas por valor; los resúmenes son reduceat sobre los grupos
+    limites = np.searchsorted(entrada, np.arange(len(PARAMETROS_DISENO) + 1))
+    grupos, xs, pos_base = [], [], []
+    texto = np.array([isinstance(base[p], str) for p in PARAMETROS_DISENO])
+    for j, p in enumerate(PARAMETROS_DISENO):
+        filas_j = np.arange(limites[j], limites[j + 1])
+        if texto[j]:
+            grupos.append(np.insert(filas_j, 0, 0)); xs.append(np.zeros(len(filas_j) + 1)); pos_base.append(0)
+        else:
+            valores = columnas[p][filas_j].astype(float)
+            k = int(np.searchsorted(valores, float(base[p])))
+            grupos.append(np.insert(filas_j, k, 0)); xs.append(np.insert(valores, k, base[p]))
+            pos_base.append(k)
+    tam = np.array([len(g) for g in grupos])
+    inicio = np.r_[0, np.cumsum(tam)[:-1]]; fin = inicio + tam
+    orden, x = np.concatenate(grupos), np.concatenate(xs)
+    x0 = np.array([0.0 if t else float(base[p]) for p, t in zip(PARAMETROS_DISENO, texto)])
+    x0_filas = np.repeat(x0, tam)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        paso = _por_grupo(np.fmax, np.abs(x / np.where(x0_filas != 0, x0_filas, np.nan) - 1), inicio)
+    paso = np.where(texto | (x0 == 0), np.nan, paso)
+    filas = {
+        "entrada": list(PARAMETROS_DISENO),
+        "tipo": ["texto" if t else "entero" if isinstance(ESCENARIO_DEFECTO[p], int) else "real"
+                 for p, t in zip(PARAMETROS_DISENO, texto)],
+        "base": [_formato(base[p]) for p in PARAMETROS_DISENO],
+        "rango": [", ".join(columnas[p][g].astype(str)) if t else f"{x[i]:g} … {x[f - 1]:g}"
+                  for p, t, g, i, f in zip(PARAMETROS_DISENO, texto, grupos, inicio, fin)],
+        "paso": list(paso),
+        "escalones": ["" if t else _escalones(x[i:f], S[:, g], etiquetas, k, x0[j])
+                      for j, (t, g, i, f, k) in enumerate(zip(texto, grupos, inicio, fin, pos_base))],
+        "fuera_catalogo": list(_por_grupo(np.add, (~valido[orden]).astype(np.int64), inicio)),
+    }
+    res_metricas = {}
+    for m, y_lote in metricas.items():
+        y = y_lote[orden]
+        minimo, maximo = _por_grupo(np.fmin, y, inicio), _por_grupo(np.fmax, y, inicio)   # NaN si no hay datos
+        res_metricas[f"{m}_bajo"] = list(np.where(texto | np.isnan(minimo), minimo, y[inicio]))
+        res_metricas[f"{m}_alto"] = list(np.where(texto | np.isnan(maximo), maximo, y[fin - 1]))
+        res_metricas[f"{m}_oscilacion"] = list(maximo - minimo)
+        res_metricas[f"{m}_elasticidad"] = list(np.where(texto, np.nan, _elasticidades(x, y, x0_filas, referencia[m], inicio)))
+
+    if con_precios and valido[0]:
+        _sensibilidad_precios(escenario, precios, delta, referencia, filas, res_metricas)
+    res = {k: np.array(v, dtype=object if k in ("entrada", "tipo", "base", "rango", "escalones") else None)
+           for k, v in {**filas, **res_metricas}.items()}
+    res["referencia"] = referencia
+    res["variantes"] = len(entrada)
+    res["delta"] = delta
+    return res
+
+
+def _sensibilidad_precios(escenario, precios, delta, referencia, filas, res_metricas):
+    # CAPEX lineal en cada precio: 2·K libros (cada precio a ±delta) en un producto Q @ P
+    from cpd_precios import CLAVES_PRECIOS, LibrosPrecios, extraer_cantidades, valorar
+    cantidades = extraer_cantidades({k: [v] for k, v in {**ESCENARIO_DEFECTO, **escenario}.items()})
+    p = np.array([precios.get(k, PRECIOS_REF[k]) for k in CLAVES_PRECIOS], dtype=float)
+    K = len(p)
+    P = np.repeat(p[:, None], 2 * K + 1, axis=1)
+    P[np.arange(K), 1 + 2 * np.arange(K)] *= 1 - delta
+    P[np.arange(K), 2 + 2 * np.arange(K)] *= 1 + delta
+    libros = LibrosPrecios(["base"] + [f"{k} {s}" for k in CLAVES_PRECIOS for s in "-+"], P)
+    capex = valorar(cantidades, libros, categorias=False)["CAPEX_Total"][0]
+    bajo, alto = capex[1::2], capex[2::2]
+    for k, pk, b, a in zip(CLAVES_PRECIOS, p, bajo, alto):
+        filas["entrada"].append(k); filas["tipo"].append("precio"); filas["base"].append(_formato(pk))
+        filas["rango"].append(f"{pk * (1 - delta):g} … {pk * (1 + delta):g}"); filas["paso"].append(delta)
+        filas["escalones"].append(""); filas["fuera_catalogo"].append(0)
+        res_metricas["CAPEX_Total_bajo"].append(b); res_metricas["CAPEX_Total_alto"].append(a)
+        res_metricas["CAPEX_Total_oscilacion"].append(abs(a - b))
+        res_metricas["CAPEX_Total_elasticidad"].append((a - b) / (2 * delta * capex[0]) if capex[0] else np.nan)
+        pue = referencia["PUE"]
+        res_metricas["PUE_bajo"].append(pue); res_metricas["PUE_alto"].append(pue)
+        res_metricas["PUE_oscilacion"].append(0.0); res_metricas["PUE_elasticidad"].append(0.0)
+
+
+# --- Tornado y tabla ---
+def _paso_mayor(sens):
+    # Entradas cuyo paso mínimo (enteros: ±1) supera ±delta
+    return np.nan_to_num(sens["paso"].astype(float)) > sens["delta"] * (1 + 1e-9)
+
+
+def oscilacion_comparable(sens, metrica):
+    """Oscilación de `metrica` escalada a ±delta en las entradas de paso mayor (orden del tornado)."""
+    osc = np.nan_to_num(sens[f"{metrica}_oscilacion"].astype(float))
+    paso = sens["paso"].astype(float)
+    return np.where(_paso_mayor(sens), osc * sens["delta"] / np.where(_paso_mayor(sens), paso, 1.0), osc)
+
+
+def filas_tornado(sens, metrica="CAPEX_Total", n=10):
+    """Las n entradas con mayor oscilación de `metrica` a ±delta: (etiquetas, bajo %, alto %).
+
+    bajo/alto en % sobre el escenario, con el recorrido real de cada entrada; la etiqueta lleva
+    '*' si cruza un escalón de catálogo y [±x%] si su paso real supera ±delta.
+    """
+    osc = oscilacion_comparable(sens, metrica)
+    ref = sens["referencia"][metrica]
+    orden = [i for i in np.argsort(-osc, kind="stable")[:n] if osc[i] > 1e-9 * abs(ref)]
+    mayor = _paso_mayor(sens)
+    etiquetas = [sens["entrada"][i] + (f" [±{sens['paso'][i]:.0%}]" if mayor[i] else "")
+                 + (" *" if sens["escalones"][i] else "") for i in orden]
+    bajo = (sens[f"{metrica}_bajo"][orden].astype(float) / ref - 1) * 100
+    alto = (sens[f"{metrica}_alto"][orden].astype(float) / ref - 1) * 100
+    return etiquetas, bajo, alto
+
+
+def tabla_sensibilidad(sens, n=None):
+    """DataFrame por entrada, ordenado por la mayor oscilación relativa (a ±delta) de CAPEX o PUE."""
+    import pandas as pd
+    cap, pue = sens["referencia"]["CAPEX_Total"], sens["referencia"]["PUE"]
+    oscilacion = np.fmax(oscilacion_comparable(sens, "CAPEX_Total") / cap, oscilacion_comparable(sens, "PUE") / pue)
+    df = pd.DataFrame({
+        "Entrada": sens["entrada"], "Tipo": sens["tipo"], "Base": sens["base"], "Rango": sens["rango"],
+        "Paso (%)": sens["paso"].astype(float) * 100,
+        "ΔCAPEX bajo (%)": (sens["CAPEX_Total_bajo"].astype(float) / cap - 1) * 100,
+        "ΔCAPEX alto (%)": (sens["CAPEX_Total_alto"].astype(float) / cap - 1) * 100,
+        "Elasticidad CAPEX": sens["CAPEX_Total_elasticidad"].astype(float),
+        "ΔPUE bajo (%)": (sens["PUE_bajo"].astype(float) / pue - 1) * 100,
+        "ΔPUE alto (%)": (sens["PUE_alto"].astype(float) / pue - 1) * 100,
+        "Elasticidad PUE": sens["PUE_elasticidad"].astype(float),
+        "Escalones de catálogo": sens["escalones"],
+    })
+    df = df.iloc[np.argsort(-np.nan_to_num(oscilacion), kind="stable")]
+    df = df[np.nan_to_num(oscilacion[df.index]) > 0]
+    return (df if n is None else df.head(n)).reset_index(drop=True).round(3)
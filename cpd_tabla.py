@@ -0,0 +1,184 @@
+# ==============================================================================
+# TABLA VIRTUAL (TREEVIEW CON DESPLAZAMIENTO VIRTUAL)
+# ==============================================================================
+# El Treeview sólo tiene tantas filas como caben en pantalla; al desplazarse se
+# reescriben sus valores con la ventana visible del DataFrame. Orden y filtro son
+# un vector de índices sobre las columnas originales (no se copia el DataFrame) y
+# el formato se aplica por columna sólo a las filas visibles.
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+
+ALTO_FILA_PX = 20          # rowheight por defecto del tema 'clam'
+ANCHO_COLUMNA_PX = 120
+FILAS_POR_MUESCA = 3       # filas por muesca de la rueda del ratón
+ANTIRREBOTE_FILTRO_MS = 150  # pausa de escritura antes de filtrar (como el modo en vivo)
+
+_FORMATO_FLOAT = np.frompyfunc("{:,.2f}".format, 1, 1)
+_A_TEXTO = np.frompyfunc(str, 1, 1)
+
+
+def formatear_columna(valores):
+    # Como la GUI original: floats con separador de miles y 2 decimales, el resto tal cual
+    if valores.dtype.kind == "f":
+        return _FORMATO_FLOAT(valores)
+    if valores.dtype == object:
+        es_float = np.fromiter((isinstance(v, float) for v in valores), bool, len(valores))
+        if es_float.any():
+            texto = _A_TEXTO(valores)
+            texto[es_float] = _FORMATO_FLOAT(valores[es_float])
+            return texto
+    return _A_TEXTO(valores)
+
+
+def _argsort(valores):
+    # Columnas con tipos mezclados se ordenan por su texto
+    try:
+        return np.argsort(valores, kind="stable")
+    except TypeError:
+        return np.argsort(_A_TEXTO(valores).astype(str), kind="stable")
+
+
+class TablaVirtual(ttk.Frame):
+    """Tabla de un DataFrame con desplazamiento virtual, orden por columna y filtro de texto.
+
+    mostrar(df) reutiliza el Treeview existente; clic en una cabecera ordena
+    (otro clic invierte el orden) y el campo "Filtrar" deja las filas que contienen el texto.
+    """
+
+    def __init__(self, master, con_filtro=True):
+        super().__init__(master)
+        self.df = None
+        self._columnas = []      # arrays de valores por columna (vistas, sin copia)
+        self._indices = np.arange(0)
+        self._inicio = 0
+        self._orden = None       # (columna, descendente)
+        self._seleccion = None   # posición en df de la fila seleccionada (sobrevive al repintado)
+        self._textos = None      # columnas formateadas en minúsculas para el filtro (hasta el próximo mostrar)
+        self._id_filtro = None
+        self.filtro_var = tk.StringVar()
+
+        if con_filtro:
+            barra = ttk.Frame(self)
+            barra.pack(side=tk.TOP, fill=tk.X)
+            ttk.Label(barra, text="Filtrar:").pack(side=tk.LEFT)
+            ttk.Entry(barra, textvariable=self.filtro_var, width=25).pack(side=tk.LEFT, padx=(4, 0))
+            self.filtro_var.trace_add("write", lambda *a: self._programar_filtro())
+
+        self.tree = ttk.Treeview(self, show="headings", selectmode="browse")
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self._yview)
+        self.hsb = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.hsb.set)
+        self.hsb.pack(side=tk.BOTTOM, fill=tk.X)
+        self.vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tree.bind("<Configure>", lambda e: self._pintar())
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self._al_seleccionar())
+        # Windows da delta en múltiplos de 120 por muesca; macOS, unidades pequeñas
+        self.tree.bind("<MouseWheel>", lambda e: self._desplazar(
+            -max(1, abs(e.delta) // 120) * FILAS_POR_MUESCA * (1 if e.delta > 0 else -1), "units"))
+        self.tree.bind("<Button-4>", lambda e: self._desplazar(-FILAS_POR_MUESCA, "units"))
+        self.tree.bind("<Button-5>", lambda e: self._desplazar(FILAS_POR_MUESCA, "units"))
+
+    # --- Datos ---
+    def mostrar(self, df):
+        columnas = [str(c) for c in df.columns]
+        if columnas != list(self.tree["columns"]):
+            self.tree.configure(columns=columnas)
+            for i, col in enumerate(columnas):
+                self.tree.heading(col, text=col, command=lambda i=i: self.ordenar(i))
+                self.tree.column(col, width=ANCHO_COLUMNA_PX)
+            self._orden = None
+        # Con otras filas (otro índice) la posición seleccionada ya no es la misma fila
+        if self.df is None or not df.index.equals(self.df.index): self._seleccion = None
+        self.df = df
+        self._columnas = [df.iloc[:, i].to_numpy() for i in range(df.shape[1])]
+        self._textos = None
+        self._recalcular_indices()
+
+    def ordenar(self, columna):
+        descendente = self._orden == (columna, False)
+        self._orden = (columna, descendente)
+        self._recalcular_indices()
+
+    def _programar_filtro(self):
+        if self._id_filtro: self.after_cancel(self._id_filtro)
+        self._id_filtro = self.after(ANTIRREBOTE_FILTRO_MS, self._aplicar_filtro)
+
+    def _aplicar_filtro(self):
+        self._id_filtro = None
+        self._recalcular_indices()
+
+    def _recalcular_indices(self):
+        if self.df is None: return
+        indices = np.arange(len(self.df))
+        texto = self.filtro_var.get().strip().lower()
+        if texto:
+            # El texto formateado se calcula con la primera búsqueda sobre este df y se reutiliza
+            # en cada pulsación: sólo queda np.char.find sobre las columnas ya en minúsculas
+            if self._textos is None:
+                self._textos = [np.char.lower(formatear_columna(valores).astype(str)) for valores in self._columnas]
+            coincide = np.zeros(len(indices), dtype=bool)
+            for textos in self._textos:
+                coincide |= np.char.find(textos, texto) >= 0
+            indices = indices[coincide]
+        if self._orden is not None:
+            columna, descendente = self._orden
+            orden = _argsort(self._columnas[columna][indices])
+            indices = indices[orden[::-1] if descendente else orden]
+        self._indices = indices
+        self._inicio = 0
+        self._pintar()
+
+    def fila_seleccionada(self):
+        # Posición en df de la fila seleccionada (None si no hay o el filtro la oculta); sigue
+        # valiendo aunque el desplazamiento la haya sacado de la ventana visible
+        if self._seleccion is None or not (self._indices == self._seleccion).any(): return None
+        return self._seleccion
+
+    def _al_seleccionar(self):
+        # Sólo los clics fijan la selección: si el repintado la deja fuera de la ventana
+        # (selección vacía en el Treeview) se conserva la posición en df
+        seleccion = self.tree.selection()
+        if seleccion: self._seleccion = int(self._indices[self._inicio + self.tree.index(seleccion[0])])
+
+    # --- Ventana visible ---
+    def _filas_visibles(self):
+        alto = self.tree.winfo_height()
+        return max(1, (alto - ALTO_FILA_PX) // ALTO_FILA_PX) if alto > 1 else 30
+
+    def _pintar(self):
+        n_vis = self._filas_visibles()
+        total = len(self._indices)
+        self._inicio = max(0, min(self._inicio, total - n_vis))
+        ventana = self._indices[self._inicio:self._inicio + n_vis]
+        textos = [formatear_columna(valores[ventana]) for valores in self._columnas]
+
+        items = self.tree.get_children()
+        if len(items) > len(ventana):
+            self.tree.delete(*items[len(ventana):])
+        for fila in range(len(ventana)):
+            valores = [t[fila] for t in textos]
+            if fila < len(items): self.tree.item(items[fila], values=valores)
+            else: self.tree.insert("", tk.END, values=valores)
+        # Las filas del Treeview se reutilizan con otros datos: se vuelve a marcar la fila
+        # seleccionada si está en la ventana y se desmarca si no
+        items = self.tree.get_children()
+        marcar = tuple(items[i] for i in np.flatnonzero(ventana == self._seleccion)) if self._seleccion is not None else ()
+        if self.tree.selection() != marcar: self.tree.selection_set(marcar)
+        if total: self.vsb.set(self._inicio / total, (self._inicio + len(ventana)) / total)
+        else: self.vsb.set(0.0, 1.0)
+
+    def _desplazar(self, n, unidad):
+        paso = self._filas_visibles() if unidad == "pages" else 1
+        self._inicio += n * paso
+        self._pintar()
+
+    def _yview(self, accion, *args):
+        if accion == "moveto":
+            self._inicio = int(float(args[0]) * len(self._indices))
+            self._pintar()
+        else:
+            self._desplazar(int(args[0]), args[1])
@@ -0,0 +1,162 @@
+# ==============================================================================
+# TRAZAS POR FASE (SPANS) Y CAPTURA DE PERFIL
+# ==============================================================================
+# Cada fase de un cálculo o exportación (nodos del grafo, Monte Carlo, almacén,
+# tablas Tk, dibujo de gráficos, DOCX) se envuelve en un span: tiempo real, CPU
+# del hilo y bloques de memoria asignados (sys.getallocatedblocks, casi gratis);
+# con la captura activada, además KB de tracemalloc y un cProfile del hilo de
+# trabajo. Los spans se agrupan por ejecución para el desglose de la barra de
+# estado y se exportan como JSON de Chrome trace (chrome://tracing, Perfetto).
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+TRAZAS_MAXIMAS = 20_000      # spans conservados (los más antiguos se descartan)
+CATEGORIAS = ("motor", "tablas", "montecarlo", "sensibilidad", "almacen", "graficos", "tk", "docx")
+
+
+def categoria_nodo(nombre):
+    # Categoría del desglose para un nodo de cpd_grafo
+    if nombre.startswith("tabla_"): return "tablas"
+    if nombre.startswith("incertidumbre"): return "montecarlo"
+    if nombre == "sensibilidad": return "sensibilidad"
+    if nombre in ("metricas",): return "graficos"
+    return "motor"
+
+
+class Trazador:
+    """Registro de spans seguro entre hilos (hilo de trabajo y hilo de Tk).
+
+    iniciar(nombre) abre una ejecución (cálculo, exportación) y devuelve su id; los spans
+    del hilo que la ejecuta se asocian con en_ejecucion(id), los demás con la última abierta.
+    """
+
+    def __init__(self, maximo=TRAZAS_MAXIMAS):
+        self.eventos = deque(maxlen=maximo)
+        self.ejecuciones = {}            # id -> nombre
+        self.actual = None
+        self.perfil = None               # última captura: {"ejecucion", "estadisticas", "memoria"}
+        self._t0 = time.perf_counter()
+        self._cerrojo = threading.Lock()
+        self._local = threading.local()
+
+    def iniciar(self, nombre):
+        with self._cerrojo:
+            self.actual = len(self.ejecuciones) + 1
+            self.ejecuciones[self.actual] = nombre
+            return self.actual
+
+    @contextlib.contextmanager
+    def en_ejecucion(self, ejecucion):
+        previa = getattr(self._local, "ejecucion", None)
+        self._local.ejecucion = ejecucion
+        try:
+            yield
+        finally:
+            self._local.ejecucion = previa
+
+    @contextlib.contextmanager
+    def span(self, nombre, categoria=None, **args):
+        import tracemalloc
+        memoria = tracemalloc.is_tracing()
+        kb0 = tracemalloc.get_traced_memory()[0] if memoria else 0
+        bloques0 = sys.getallocatedblocks()
+        cpu0, t0 = time.thread_time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            t1, cpu1 = time.perf_counter(), time.thread_time()
+            evento = {"nombre": nombre, "categoria": categoria, "inicio_s": t0 - self._t0, "duracion_s": t1 - t0,
+                      "cpu_s": cpu1 - cpu0, "bloques": sys.getallocatedblocks() - bloques0,
+                      "hilo": threading.current_thread().name,
+                      "ejecucion": getattr(self._local, "ejecucion", None) or self.actual, **args}
+            if memoria: evento["memoria_kb"] = (tracemalloc.get_traced_memory()[0] - kb0) / 1024
+            with self._cerrojo:
+                self.eventos.append(evento)
+
+    def envolver(self, funcion, nombre, categoria=None):
+        # funcion con un span en cada llamada (p. ej. el draw de un lienzo que Tk llama en ocioso)
+        def envuelta(*a, **kw):
+            with self.span(nombre, categoria):
+                return funcion(*a, **kw)
+        return envuelta
+
+    # --- Consultas ---
+    def spans(self, ejecucion=None):
+        with self._cerrojo:
+            eventos = list(self.eventos)
+        return eventos if ejecucion is None else [e for e in eventos if e["ejecucion"] == ejecucion]
+
+    def desglose(self, ejecucion=None):
+        """{categoría: {"ms", "cpu_ms", "n"}} de una ejecución (por defecto la última) en orden de CATEGORIAS."""
+        ejecucion = self.actual if ejecucion is None else ejecucion
+        suma = {}
+        for e in self.spans(ejecucion):
+            if e["categoria"] is None: continue
+            s = suma.setdefault(e["categoria"], {"ms": 0.0, "cpu_ms": 0.0, "n": 0})
+            s["ms"] += e["duracion_s"] * 1000; s["cpu_ms"] += e["cpu_s"] * 1000; s["n"] += 1
+        orden = {c: i for i, c in enumerate(CATEGORIAS)}
+        return dict(sorted(suma.items(), key=lambda kv: orden.get(kv[0], len(orden))))
+
+    def texto_desglose(self, ejecucion=None):
+        # Una línea para la barra de estado: "cálculo: motor 3 ms · tablas 2 ms · ... (total 70 ms)"
+        ejecucion = self.actual if ejecucion is None else ejecucion
+        d = self.desglose(ejecucion)
+        if not d: return ""
+        partes = " · ".join(f"{c} {v['ms']:.0f} ms" for c, v in d.items())
+        return f"{self.ejecuciones.get(ejecucion, '')}: {partes} (total {sum(v['ms'] for v in d.values()):.0f} ms)"
+
+    # --- Exportación ---
+    def chrome_trace(self, ejecucion=None):
+        """Eventos "X" (completos) del formato Chrome trace, en µs, un tid por hilo."""
+        tids = {}
+        eventos = []
+        for e in self.spans(ejecucion):
+            tid = tids.setdefault(e["hilo"], len(tids) + 1)
+            args = {k: v for k, v in e.items() if k not in ("nombre", "categoria", "inicio_s", "duracion_s", "hilo")}
+            args["cpu_ms"] = round(args.pop("cpu_s") * 1000, 3)
+            args["ejecucion"] = f"{e['ejecucion']} {self.ejecuciones.get(e['ejecucion'], '')}".strip()
+            eventos.append({"name": e["nombre"], "cat": e["categoria"] or "ejecucion", "ph": "X", "pid": os.getpid(),
+                            "tid": tid, "ts": round(e["inicio_s"] * 1e6, 1), "dur": round(e["duracion_s"] * 1e6, 1),
+                            "args": args})
+        eventos += [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": hilo}}
+                    for hilo, tid in tids.items()]
+        return {"traceEvents": eventos, "displayTimeUnit": "ms"}
+
+    def exportar(self, ruta, ejecucion=None):
+        # Chrome trace JSON; con una captura de perfil, además ruta.prof (pstats) y ruta.memoria.txt
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(ejecucion), f, ensure_ascii=False)
+        rutas = [ruta]
+        if self.perfil is not None:
+            base = os.path.splitext(ruta)[0]
+            self.perfil["estadisticas"].dump_stats(base + ".prof")
+            with open(base + ".memoria.txt", "w", encoding="utf-8") as f:
+                f.write("\n".join(self.perfil["memoria"]) + "\n")
+            rutas += [base + ".prof", base + ".memoria.txt"]
+        return rutas
+
+    # --- Captura de perfil ---
+    @contextlib.contextmanager
+    def capturar(self, ejecucion=None, lineas_memoria=25):
+        """cProfile del hilo actual y tracemalloc mientras dure el bloque; el resultado queda
+        en self.perfil (pstats.Stats y las líneas con más memoria asignada)."""
+        import cProfile
+        import pstats
+        import tracemalloc
+        propio = not tracemalloc.is_tracing()
+        if propio: tracemalloc.start()
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            instantanea = tracemalloc.take_snapshot()
+            if propio: tracemalloc.stop()
+            memoria = [str(s) for s in instantanea.statistics("lineno")[:lineas_memoria]]
+            self.perfil = {"ejecucion": ejecucion or self.actual, "estadisticas": pstats.Stats(perfil), "memoria": memoria}